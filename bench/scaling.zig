@@ -0,0 +1,213 @@
+//
+// Scaling benchmark for writing large worksheets.
+//
+// Writes a rows x cols block of one cell type with the workbook options
+// given on the command line, and prints the time spent writing cells and
+// closing the workbook as one line of JSON, with the write statistics of
+// xlsxwriter.stats under "stats". Rows beyond the Excel limit continue on
+// additional worksheets. Driven by utils/scaling_bench.py. With --profile
+// the allocations of the Zig side are counted with xlsxwriter.profile and
+// reported under "memory".
+//
+// Usage:
+//   scaling [--rows N] [--cols N] [--type numbers|strings|formulas|dates]
+//           [--constant-memory] [--zip64] [--tmpdir DIR] [--output FILE]
+//           [--progress ROWS] [--profile]
+//
+
+const std = @import("std");
+const xlsxwriter = @import("xlsxwriter");
+
+const CellType = enum { numbers, strings, formulas, dates };
+
+const Config = struct {
+    rows: u64 = 1000,
+    cols: u16 = 50,
+    cell_type: CellType = .numbers,
+    constant_memory: bool = false,
+    use_zip64: bool = false,
+    tmpdir: ?[:0]const u8 = null,
+    output: [:0]const u8 = "zig-scaling.xlsx",
+    /// Rows between progress lines on stderr, 0 for none
+    progress: u64 = 0,
+    profile: bool = false,
+};
+
+fn usage() noreturn {
+    std.debug.print(
+        \\Usage: scaling [--rows N] [--cols N] [--type numbers|strings|formulas|dates]
+        \\               [--constant-memory] [--zip64] [--tmpdir DIR] [--output FILE]
+        \\               [--progress ROWS] [--profile]
+        \\
+    , .{});
+    std.process.exit(2);
+}
+
+fn parseArgs(args: []const [:0]u8) Config {
+    var config = Config{};
+    var i: usize = 1;
+    while (i < args.len) : (i += 1) {
+        const arg = args[i];
+        if (std.mem.eql(u8, arg, "--constant-memory")) {
+            config.constant_memory = true;
+        } else if (std.mem.eql(u8, arg, "--zip64")) {
+            config.use_zip64 = true;
+        } else if (std.mem.eql(u8, arg, "--profile")) {
+            config.profile = true;
+        } else {
+            // All other options take a value
+            if (i + 1 >= args.len) usage();
+            i += 1;
+            const value = args[i];
+            if (std.mem.eql(u8, arg, "--rows")) {
+                config.rows = std.fmt.parseInt(u64, value, 10) catch usage();
+            } else if (std.mem.eql(u8, arg, "--cols")) {
+                config.cols = std.fmt.parseInt(u16, value, 10) catch usage();
+                if (config.cols == 0 or config.cols > xlsxwriter.LXW_COL_MAX) usage();
+            } else if (std.mem.eql(u8, arg, "--type")) {
+                config.cell_type = std.meta.stringToEnum(CellType, value) orelse usage();
+            } else if (std.mem.eql(u8, arg, "--tmpdir")) {
+                config.tmpdir = value;
+            } else if (std.mem.eql(u8, arg, "--output")) {
+                config.output = value;
+            } else if (std.mem.eql(u8, arg, "--progress")) {
+                config.progress = std.fmt.parseInt(u64, value, 10) catch usage();
+            } else {
+                usage();
+            }
+        }
+    }
+    return config;
+}
+
+fn writeCell(
+    worksheet: *xlsxwriter.lxw_worksheet,
+    cell_type: CellType,
+    row: u32,
+    col: u16,
+    index: u64,
+    date_format: *xlsxwriter.lxw_format,
+) xlsxwriter.lxw_error {
+    var buffer: [64]u8 = undefined;
+    switch (cell_type) {
+        .numbers => return xlsxwriter.worksheet_write_number(worksheet, row, col, @floatFromInt(index), null),
+        .strings => {
+            // Unique strings are the worst case for the shared string table
+            const string = std.fmt.bufPrintZ(&buffer, "String {d}", .{index}) catch unreachable;
+            return xlsxwriter.worksheet_write_string(worksheet, row, col, string.ptr, null);
+        },
+        .formulas => {
+            const formula = std.fmt.bufPrintZ(&buffer, "=ROW()*{d}+COLUMN()", .{col + 1}) catch unreachable;
+            return xlsxwriter.worksheet_write_formula(worksheet, row, col, formula.ptr, null);
+        },
+        .dates => {
+            var datetime = xlsxwriter.lxw_datetime{
+                .year = 2000 + @as(c_int, @intCast(index % 50)),
+                .month = 1 + @as(c_int, @intCast(index % 12)),
+                .day = 1 + @as(c_int, @intCast(index % 28)),
+                .hour = @intCast(index % 24),
+                .min = @intCast(index % 60),
+                .sec = 0,
+            };
+            return xlsxwriter.worksheet_write_datetime(worksheet, row, col, &datetime, date_format);
+        },
+    }
+}
+
+fn printProgress(_: ?*anyopaque, progress: xlsxwriter.stats.Progress) void {
+    const seconds = @as(f64, @floatFromInt(progress.elapsed_ns)) / std.time.ns_per_s;
+    std.debug.print("{d} rows, {d} cells, {d:.1} cells/s\n", .{
+        progress.rows,
+        progress.cells,
+        @as(f64, @floatFromInt(progress.cells)) / seconds,
+    });
+}
+
+pub fn main() !void {
+    var gpa = std.heap.GeneralPurposeAllocator(.{}){};
+    defer _ = gpa.deinit();
+    var counting = xlsxwriter.profile.CountingAllocator.init(gpa.allocator());
+    defer counting.deinit();
+
+    const args = try std.process.argsAlloc(gpa.allocator());
+    defer std.process.argsFree(gpa.allocator(), args);
+    const config = parseArgs(args);
+    const allocator = if (config.profile) counting.allocator() else gpa.allocator();
+
+    var options = xlsxwriter.lxw_workbook_options{
+        .constant_memory = if (config.constant_memory) xlsxwriter.LXW_TRUE else xlsxwriter.LXW_FALSE,
+        .tmpdir = if (config.tmpdir) |tmpdir| @constCast(tmpdir.ptr) else null,
+        .use_zip64 = if (config.use_zip64) xlsxwriter.LXW_TRUE else xlsxwriter.LXW_FALSE,
+        .output_buffer = null,
+        .output_buffer_size = null,
+    };
+
+    var recorder = try xlsxwriter.stats.Recorder.init(
+        allocator,
+        if (config.progress > 0) .{ .call = printProgress, .interval = config.progress } else null,
+    );
+    defer recorder.deinit();
+
+    const workbook = xlsxwriter.workbook_new_opt(config.output.ptr, &options) orelse {
+        std.debug.print("Error creating workbook {s}\n", .{config.output});
+        std.process.exit(1);
+    };
+    const date_format = try recorder.addFormat(workbook);
+    _ = xlsxwriter.format_set_num_format(date_format, "yyyy-mm-dd hh:mm");
+
+    var worksheet: *xlsxwriter.lxw_worksheet = undefined;
+    var sheets: u32 = 0;
+    var index: u64 = 0;
+    var total_row: u64 = 0;
+    while (total_row < config.rows) : (total_row += 1) {
+        const row: u32 = @intCast(total_row % xlsxwriter.LXW_ROW_MAX);
+        if (row == 0) {
+            worksheet = xlsxwriter.workbook_add_worksheet(workbook, null) orelse {
+                std.debug.print("Error adding worksheet {d}\n", .{sheets + 1});
+                std.process.exit(1);
+            };
+            sheets += 1;
+        }
+
+        var col: u16 = 0;
+        while (col < config.cols) : (col += 1) {
+            const err = writeCell(worksheet, config.cell_type, row, col, index, date_format);
+            if (err != xlsxwriter.LXW_NO_ERROR) {
+                std.debug.print("Error writing cell ({d}, {d}): {s}\n", .{ row, col, xlsxwriter.lxw_strerror(err) });
+                std.process.exit(1);
+            }
+            index += 1;
+        }
+        recorder.countCells(switch (config.cell_type) {
+            .numbers => .number,
+            .strings => .string,
+            .formulas => .formula,
+            .dates => .datetime,
+        }, config.cols);
+        recorder.rowWritten();
+    }
+
+    recorder.close(workbook, config.output) catch |err| {
+        std.debug.print("Error closing workbook: {s}\n", .{@errorName(err)});
+        std.process.exit(1);
+    };
+
+    const stdout = std.io.getStdOut().writer();
+    try stdout.print(
+        "{{\"rows\": {d}, \"cols\": {d}, \"sheets\": {d}, \"cells\": {d}, \"write_seconds\": {d:.6}, \"close_seconds\": {d:.6}, \"stats\": ",
+        .{
+            config.rows,
+            config.cols,
+            sheets,
+            index,
+            @as(f64, @floatFromInt(recorder.phases.get(.write))) / std.time.ns_per_s,
+            @as(f64, @floatFromInt(recorder.phases.get(.close))) / std.time.ns_per_s,
+        },
+    );
+    try recorder.writeJson(stdout, .{});
+    if (config.profile) {
+        try stdout.writeAll(", \"memory\": ");
+        try counting.writeJson(stdout, .{});
+    }
+    try stdout.writeAll("}\n");
+}
@@ -33,8 +33,13 @@ pub fn build(b: *std.Build) void {
     // Add mktmp module
     const mktmp_module = b.addModule("mktmp", .{
         .root_source_file = b.path("src/mktmp.zig"),
+        // ramTmpDir reads the free space of /dev/shm with statvfs
+        .link_libc = true,
     });
 
+    // The asset API keeps path-only inputs in anonymous temporary files
+    xlsxwriter_module.addImport("mktmp", mktmp_module);
+
     // get libxlsxwriter
     xlsxwriter_module.linkLibrary(xlsxwriter_dep.artifact("xlsxwriter"));
     xlsxwriter_module.link_libc = true;
@@ -48,6 +53,76 @@ pub fn build(b: *std.Build) void {
     // Create a default step to build all examples
     const all_step = b.getInstallStep();
 
+    // Add a step to build the benchmark programs in bench/
+    const bench_step = b.step(
+        "bench",
+        "Build the benchmark programs in bench/",
+    );
+    if (std.fs.cwd().access("bench", .{})) {
+        const scaling_exe = b.addExecutable(.{
+            .name = "scaling",
+            .root_source_file = b.path("bench/scaling.zig"),
+            .target = target,
+            .optimize = optimize,
+        });
+        scaling_exe.root_module.addImport("xlsxwriter", xlsxwriter_module);
+        bench_step.dependOn(&b.addInstallArtifact(scaling_exe, .{}).step);
+    } else |_| {}
+
+    // Add a step to build the shared library used by utils/numpy_writer.py
+    const python_step = b.step(
+        "python",
+        "Build the zigxlsxwriter shared library for utils/numpy_writer.py",
+    );
+    const capi_lib = b.addSharedLibrary(.{
+        .name = "zigxlsxwriter",
+        .root_source_file = b.path("src/capi.zig"),
+        .target = target,
+        .optimize = optimize,
+    });
+    capi_lib.root_module.addImport("mktmp", mktmp_module);
+    capi_lib.linkLibrary(xlsxwriter_dep.artifact("xlsxwriter"));
+    capi_lib.linkLibC();
+    python_step.dependOn(&b.addInstallArtifact(capi_lib, .{}).step);
+
+    // Add a step running the tests of the modules in src/
+    const test_step = b.step(
+        "test",
+        "Run the module tests",
+    );
+    for (test_modules) |name| {
+        const module_tests = b.addTest(.{
+            .root_source_file = b.path(b.fmt("src/{s}.zig", .{name})),
+            .target = target,
+            .optimize = optimize,
+        });
+        // mktmp is its own module and cannot import itself
+        if (!std.mem.eql(u8, name, "mktmp")) {
+            module_tests.root_module.addImport("mktmp", mktmp_module);
+        }
+        module_tests.linkLibrary(xlsxwriter_dep.artifact("xlsxwriter"));
+        module_tests.linkLibC();
+
+        // Some tests read reference files relative to the build root
+        const run_tests = b.addRunArtifact(module_tests);
+        run_tests.setCwd(b.path("."));
+        test_step.dependOn(&run_tests.step);
+    }
+
+    // Add a step to build the malloc hook preloaded by utils/batch_run.py --profile
+    const profile_step = b.step(
+        "profile",
+        "Build the zxwprofile malloc hook library for memory profiles",
+    );
+    const profile_lib = b.addSharedLibrary(.{
+        .name = "zxwprofile",
+        .root_source_file = b.path("src/malloc_hook.zig"),
+        .target = target,
+        .optimize = .ReleaseFast,
+    });
+    profile_lib.linkLibC();
+    profile_step.dependOn(&b.addInstallArtifact(profile_lib, .{}).step);
+
     // Check if examples/ directory exists. This is necessary to avoid warnings
     // when this is used as a dependency.
     const examples_dir = "examples";
@@ -77,6 +152,9 @@ pub fn build(b: *std.Build) void {
 
         defer dir.close();
 
+        // Example names for the registry of the runner binary
+        var example_names = std.ArrayList([]const u8).init(b.allocator);
+
         var iter = dir.iterate();
         while (iter.next() catch |err| {
             std.debug.print(
@@ -107,10 +185,89 @@ pub fn build(b: *std.Build) void {
 
             // Make the default step depend on building all examples
             all_step.dependOn(install_step);
+
+            example_names.append(b.dupe(getExampleName(entry.name))) catch @panic("OOM");
+        }
+
+        addRunner(b, .{
+            .names = example_names.items,
+            .module = xlsxwriter_module,
+            .mktmp_module = mktmp_module,
+            .target = target,
+            .optimize = optimize,
+        });
+    }
+}
+
+/// Modules in src/ with tests, run by the test step
+const test_modules = [_][]const u8{
+    "errors",
+    "bulk",
+    "format_cache",
+    "parallel",
+    "mktmp",
+    "assets",
+    "compression",
+    "capi",
+    "deterministic",
+    "staging",
+    "datetime",
+    "stats",
+    "profile",
+};
+
+/// Adds a step building every example into one `examples` binary. A
+/// generated registry module imports each example as a module of its own.
+fn addRunner(b: *std.Build, options: RunnerInfo) void {
+    const runner_step = b.step(
+        "runner",
+        "Build all examples into one runner binary",
+    );
+
+    // Sorted so the generated registry only changes with the examples
+    std.mem.sort([]const u8, options.names, {}, struct {
+        fn lessThan(_: void, a: []const u8, b_name: []const u8) bool {
+            return std.mem.lessThan(u8, a, b_name);
         }
+    }.lessThan);
+
+    var source = std.ArrayList(u8).init(b.allocator);
+    const writer = source.writer();
+    writer.writeAll("// Generated by build.zig\npub const examples = .{\n") catch @panic("OOM");
+    for (options.names) |name| {
+        writer.print("    .{{ \"{s}\", @import(\"example_{s}\") }},\n", .{ name, name }) catch @panic("OOM");
     }
+    writer.writeAll("};\n") catch @panic("OOM");
+
+    const registry_file = b.addWriteFiles().add("registry.zig", source.items);
+    const registry_module = b.createModule(.{ .root_source_file = registry_file });
+    for (options.names) |name| {
+        const example_module = b.createModule(.{
+            .root_source_file = b.path(b.fmt("examples/{s}.zig", .{name})),
+        });
+        example_module.addImport("xlsxwriter", options.module);
+        example_module.addImport("mktmp", options.mktmp_module);
+        registry_module.addImport(b.fmt("example_{s}", .{name}), example_module);
+    }
+
+    const exe = b.addExecutable(.{
+        .name = "examples",
+        .root_source_file = b.path("utils/example_runner.zig"),
+        .target = options.target,
+        .optimize = options.optimize,
+    });
+    exe.root_module.addImport("registry", registry_module);
+    runner_step.dependOn(&b.addInstallArtifact(exe, .{}).step);
 }
 
+const RunnerInfo = struct {
+    names: [][]const u8,
+    module: *std.Build.Module,
+    mktmp_module: *std.Build.Module,
+    target: std.Build.ResolvedTarget,
+    optimize: std.builtin.OptimizeMode,
+};
+
 fn getExampleName(filename: []const u8) []const u8 {
     var split =
         std.mem.splitSequence(u8, filename, ".");
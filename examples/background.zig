@@ -7,27 +7,18 @@
 
 const std = @import("std");
 const xlsxwriter = @import("xlsxwriter");
-const mktmp = @import("mktmp");
 
 // Embed the logo image directly into the executable
 const logo_data = @embedFile("logo.png");
 
 pub fn main() !void {
-    // Create a temporary file for the logo using the TmpFile API
-    var arena = std.heap.ArenaAllocator.init(
-        std.heap.page_allocator,
-    );
-    defer arena.deinit();
-    const allocator = arena.allocator();
-
-    var tmp_file = try mktmp.TmpFile.create(
-        allocator,
-        "logo_",
-    );
-    defer tmp_file.cleanUp();
-
-    // Write the embedded data to the temporary file
-    try tmp_file.write(logo_data);
+    // Keep the embedded logo as an asset, passed to libxlsxwriter from memory
+    var gpa = std.heap.GeneralPurposeAllocator(.{}){};
+    defer _ = gpa.deinit();
+    var assets = xlsxwriter.assets.AssetStore.init(gpa.allocator());
+    defer assets.deinit();
+
+    const logo = try assets.add("logo.png", logo_data);
 
     // Create the workbook and add a worksheet
     const workbook =
@@ -41,19 +32,9 @@ pub fn main() !void {
             null,
         );
 
-    // Set the background using the temporary file
-    // Convert the path to a null-terminated C string pointer
-    const c_path = @as(
-        [*c]const u8,
-        @ptrCast(tmp_file.path.ptr),
-    );
-    _ = xlsxwriter.worksheet_set_background(
-        worksheet,
-        c_path,
-    );
+    // Set the background image
+    try xlsxwriter.assets.setBackground(worksheet, logo);
 
     // Close the workbook
     _ = xlsxwriter.workbook_close(workbook);
-
-    // The temporary file will be automatically cleaned up by the defer statement
 }
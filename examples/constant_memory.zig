@@ -26,12 +26,11 @@ pub fn main() !void {
     const workbook = xlsxwriter.workbook_new_opt("zig-constant_memory.xlsx", &options);
     const worksheet = xlsxwriter.workbook_add_worksheet(workbook, null);
 
+    // Write the same row of numbers to every row, one batch per row.
+    const numbers = [_]f64{123.45} ** col_max;
     var row: u32 = 0;
     while (row < row_max) : (row += 1) {
-        var col: u16 = 0;
-        while (col < col_max) : (col += 1) {
-            _ = xlsxwriter.worksheet_write_number(worksheet, row, col, 123.45, null);
-        }
+        try xlsxwriter.bulk.writeRow(worksheet, row, 0, &numbers, null);
     }
 
     _ = xlsxwriter.workbook_close(workbook);
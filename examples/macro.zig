@@ -15,22 +15,19 @@
 
 const std = @import("std");
 const xlsxwriter = @import("xlsxwriter");
-const mktmp = @import("mktmp");
 
 // Embed the VBA project binary
 const vba_data = @embedFile("vbaProject.bin");
 
 pub fn main() !void {
-    // Create a temporary file for the VBA project using the TmpFile API
-    var arena = std.heap.ArenaAllocator.init(std.heap.page_allocator);
-    defer arena.deinit();
-    const allocator = arena.allocator();
+    // Keep the VBA project as an asset. libxlsxwriter reads it from a path,
+    // which the asset store provides without writing it to disk.
+    var gpa = std.heap.GeneralPurposeAllocator(.{}){};
+    defer _ = gpa.deinit();
+    var assets = xlsxwriter.assets.AssetStore.init(gpa.allocator());
+    defer assets.deinit();
 
-    var tmp_file = try mktmp.TmpFile.create(allocator, "vba_data");
-    defer tmp_file.cleanUp();
-
-    // Write the embedded data to the temporary file
-    try tmp_file.write(vba_data);
+    const vba_project = try assets.add("vbaProject.bin", vba_data);
 
     // Note the xlsm extension of the filename
     const workbook = xlsxwriter.workbook_new("zig-macro.xlsm");
@@ -39,9 +36,7 @@ pub fn main() !void {
     _ = xlsxwriter.worksheet_set_column(worksheet, 0, 0, 30, null);
 
     // Add a macro file extracted from an Excel workbook
-    // Convert the path to a null-terminated C string pointer
-    const c_path = @as([*c]const u8, @ptrCast(tmp_file.path.ptr));
-    _ = xlsxwriter.workbook_add_vba_project(workbook, c_path);
+    try xlsxwriter.assets.addVbaProject(workbook, &assets, vba_project);
 
     _ = xlsxwriter.worksheet_write_string(worksheet, 2, 0, "Press the button to say hello.", null);
 
@@ -55,6 +50,4 @@ pub fn main() !void {
     _ = xlsxwriter.worksheet_insert_button(worksheet, 2, 1, &options);
 
     _ = xlsxwriter.workbook_close(workbook);
-
-    // The temporary file will be automatically cleaned up by the defer statement
 }
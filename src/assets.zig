@@ -0,0 +1,234 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const c = @import("xlsxwriter.zig");
+const mktmp = @import("mktmp");
+const bulk = @import("bulk.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+const fs = std.fs;
+const mem = std.mem;
+const Sha256 = std.crypto.hash.sha2.Sha256;
+
+/// Bytes of an image or other input file, shared by every use in a workbook
+pub const Asset = struct {
+    /// Name recorded as the image description, as libxlsxwriter does with
+    /// the file name when inserting from a path
+    name: [:0]const u8,
+    bytes: []const u8,
+    digest: [Sha256.digest_length]u8,
+    mapping: ?[]align(std.heap.page_size_min) const u8 = null,
+    owned: ?[]const u8 = null,
+    tmp_file: ?mktmp.TmpFile = null,
+    path: ?[:0]const u8 = null,
+};
+
+/// Holds the assets of a workbook, de-duplicated by content.
+///
+/// Images are passed to libxlsxwriter straight from memory through its
+/// buffer functions. Functions that only accept a path get one anonymous
+/// in-memory file per asset, created on first use and shared afterwards.
+/// The store must outlive workbook_close, which reads those files.
+pub const AssetStore = struct {
+    allocator: mem.Allocator,
+    assets: std.AutoHashMapUnmanaged([Sha256.digest_length]u8, *Asset),
+
+    pub fn init(allocator: mem.Allocator) AssetStore {
+        return .{
+            .allocator = allocator,
+            .assets = .{},
+        };
+    }
+
+    pub fn deinit(self: *AssetStore) void {
+        var iter = self.assets.valueIterator();
+        while (iter.next()) |asset_ptr| {
+            const asset = asset_ptr.*;
+            if (asset.tmp_file) |*tmp_file| tmp_file.cleanUp();
+            if (asset.path) |path| self.allocator.free(path);
+            if (asset.mapping) |mapping| std.posix.munmap(mapping);
+            if (asset.owned) |owned| self.allocator.free(owned);
+            self.allocator.free(asset.name);
+            self.allocator.destroy(asset);
+        }
+        self.assets.deinit(self.allocator);
+    }
+
+    /// Adds bytes that outlive the store, such as an @embedFile.
+    /// Returns the existing asset if the same content was added before.
+    pub fn add(self: *AssetStore, name: []const u8, bytes: []const u8) !*Asset {
+        return self.addWithMapping(name, bytes, null);
+    }
+
+    /// Adds the contents of a file by memory mapping it
+    pub fn addFile(self: *AssetStore, path: []const u8) !*Asset {
+        const file = try fs.cwd().openFile(path, .{});
+        defer file.close();
+        const size = try file.getEndPos();
+
+        if (builtin.os.tag == .windows or size == 0) {
+            const bytes = try file.readToEndAlloc(self.allocator, std.math.maxInt(usize));
+            errdefer self.allocator.free(bytes);
+            const asset = try self.add(fs.path.basename(path), bytes);
+            // The store only keeps one copy of the same content
+            if (asset.bytes.ptr == bytes.ptr) {
+                asset.owned = bytes;
+            } else {
+                self.allocator.free(bytes);
+            }
+            return asset;
+        }
+
+        const mapping = try std.posix.mmap(
+            null,
+            size,
+            std.posix.PROT.READ,
+            .{ .TYPE = .PRIVATE },
+            file.handle,
+            0,
+        );
+        const asset = self.addWithMapping(fs.path.basename(path), mapping, mapping) catch |err| {
+            std.posix.munmap(mapping);
+            return err;
+        };
+        if (asset.mapping == null or asset.mapping.?.ptr != mapping.ptr) std.posix.munmap(mapping);
+        return asset;
+    }
+
+    fn addWithMapping(
+        self: *AssetStore,
+        name: []const u8,
+        bytes: []const u8,
+        mapping: ?[]align(std.heap.page_size_min) const u8,
+    ) !*Asset {
+        var digest: [Sha256.digest_length]u8 = undefined;
+        Sha256.hash(bytes, &digest, .{});
+
+        const entry = try self.assets.getOrPut(self.allocator, digest);
+        if (entry.found_existing) return entry.value_ptr.*;
+        errdefer self.assets.removeByPtr(entry.key_ptr);
+
+        const asset = try self.allocator.create(Asset);
+        errdefer self.allocator.destroy(asset);
+        asset.* = .{
+            .name = try self.allocator.dupeZ(u8, name),
+            .bytes = bytes,
+            .digest = digest,
+            .mapping = mapping,
+        };
+        entry.value_ptr.* = asset;
+        return asset;
+    }
+
+    /// Returns a path for functions that can only read files. The file is
+    /// written once per asset and shared by all later calls.
+    pub fn filePath(self: *AssetStore, asset: *Asset) ![:0]const u8 {
+        if (asset.path) |path| return path;
+
+        var tmp_file = try mktmp.TmpFile.createAnonymous(self.allocator, asset.name, null);
+        errdefer tmp_file.cleanUp();
+        try tmp_file.write(asset.bytes);
+
+        asset.path = try self.allocator.dupeZ(u8, tmp_file.path);
+        asset.tmp_file = tmp_file;
+        return asset.path.?;
+    }
+};
+
+/// Inserts an image from memory, like worksheet_insert_image_opt
+pub fn insertImage(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    asset: *const Asset,
+    options: ?c.lxw_image_options,
+) XlsxError!void {
+    var image_options = options orelse mem.zeroes(c.lxw_image_options);
+    if (image_options.description == null) image_options.description = asset.name.ptr;
+    return bulk.check(c.worksheet_insert_image_buffer_opt(
+        worksheet,
+        row,
+        col,
+        asset.bytes.ptr,
+        asset.bytes.len,
+        &image_options,
+    ));
+}
+
+/// Embeds an image in a cell from memory, like worksheet_embed_image
+pub fn embedImage(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    asset: *const Asset,
+) XlsxError!void {
+    return bulk.check(c.worksheet_embed_image_buffer(
+        worksheet,
+        row,
+        col,
+        asset.bytes.ptr,
+        asset.bytes.len,
+    ));
+}
+
+/// Sets the worksheet background image from memory
+pub fn setBackground(worksheet: *c.lxw_worksheet, asset: *const Asset) XlsxError!void {
+    return bulk.check(c.worksheet_set_background_buffer(
+        worksheet,
+        asset.bytes.ptr,
+        asset.bytes.len,
+    ));
+}
+
+/// Adds a vbaProject.bin. libxlsxwriter only reads it from a path, so the
+/// shared anonymous file of the asset is used.
+pub fn addVbaProject(workbook: *c.lxw_workbook, store: *AssetStore, asset: *Asset) !void {
+    const path = try store.filePath(asset);
+    return bulk.check(c.workbook_add_vba_project(workbook, path.ptr));
+}
+
+test "AssetStore de-duplicates by content" {
+    const allocator = std.testing.allocator;
+    var store = AssetStore.init(allocator);
+    defer store.deinit();
+
+    const logo = try store.add("logo.png", "not really a png");
+    const again = try store.add("copy.png", "not really a png");
+    const other = try store.add("other.png", "other bytes");
+
+    try std.testing.expect(logo == again);
+    try std.testing.expect(logo != other);
+    try std.testing.expectEqualStrings("logo.png", again.name);
+    try std.testing.expectEqual(@as(u32, 2), store.assets.count());
+}
+
+test "AssetStore shares one file per asset" {
+    const allocator = std.testing.allocator;
+    var store = AssetStore.init(allocator);
+    defer store.deinit();
+
+    const asset = try store.add("vbaProject.bin", "vba bytes");
+    const path = try store.filePath(asset);
+    try std.testing.expectEqualStrings(path, try store.filePath(asset));
+
+    const file = try fs.openFileAbsolute(path, .{});
+    defer file.close();
+    var buffer: [32]u8 = undefined;
+    const bytes_read = try file.readAll(&buffer);
+    try std.testing.expectEqualStrings("vba bytes", buffer[0..bytes_read]);
+}
+
+test "AssetStore maps files" {
+    const allocator = std.testing.allocator;
+    var store = AssetStore.init(allocator);
+    defer store.deinit();
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+    try tmp_dir.dir.writeFile(.{ .sub_path = "logo.png", .data = "mapped bytes" });
+    const path = try tmp_dir.dir.realpathAlloc(allocator, "logo.png");
+    defer allocator.free(path);
+
+    const mapped = try store.addFile(path);
+    try std.testing.expectEqualStrings("mapped bytes", mapped.bytes);
+    try std.testing.expectEqualStrings("logo.png", mapped.name);
+    try std.testing.expect(mapped == try store.add("embedded.png", "mapped bytes"));
+}
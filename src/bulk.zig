@@ -0,0 +1,233 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+
+/// A single cell value of any supported type
+pub const Cell = union(enum) {
+    number: f64,
+    string: [:0]const u8,
+    formula: [:0]const u8,
+    boolean: bool,
+    datetime: c.lxw_datetime,
+    blank,
+};
+
+/// Maps a libxlsxwriter return code to an XlsxError
+pub fn check(err: c.lxw_error) XlsxError!void {
+    return switch (err) {
+        c.LXW_NO_ERROR => {},
+        c.LXW_ERROR_MEMORY_MALLOC_FAILED => error.MemoryMallocFailed,
+        c.LXW_ERROR_CREATING_XLSX_FILE,
+        c.LXW_ERROR_CREATING_TMPFILE,
+        c.LXW_ERROR_READING_TMPFILE,
+        c.LXW_ERROR_ZIP_FILE_OPERATION,
+        c.LXW_ERROR_ZIP_PARAMETER_ERROR,
+        c.LXW_ERROR_ZIP_BAD_ZIP_FILE,
+        c.LXW_ERROR_ZIP_INTERNAL_ERROR,
+        c.LXW_ERROR_ZIP_FILE_ADD,
+        c.LXW_ERROR_ZIP_CLOSE,
+        => error.IoError,
+        c.LXW_ERROR_FEATURE_NOT_SUPPORTED => error.FeatureNotSupported,
+        c.LXW_ERROR_NULL_PARAMETER_IGNORED => error.NullParameterIgnored,
+        c.LXW_ERROR_PARAMETER_VALIDATION => error.ParameterValidationError,
+        c.LXW_ERROR_PARAMETER_IS_EMPTY => error.ParameterIsEmpty,
+        c.LXW_ERROR_SHEETNAME_LENGTH_EXCEEDED => error.SheetnameLengthExceeded,
+        c.LXW_ERROR_INVALID_SHEETNAME_CHARACTER => error.SheetnameContainsInvalidCharacter,
+        c.LXW_ERROR_SHEETNAME_START_END_APOSTROPHE => error.SheetnameStartsOrEndsWithApostrophe,
+        c.LXW_ERROR_SHEETNAME_ALREADY_USED => error.SheetnameReused,
+        c.LXW_ERROR_32_STRING_LENGTH_EXCEEDED,
+        c.LXW_ERROR_128_STRING_LENGTH_EXCEEDED,
+        c.LXW_ERROR_255_STRING_LENGTH_EXCEEDED,
+        c.LXW_ERROR_MAX_STRING_LENGTH_EXCEEDED,
+        => error.MaxStringLengthExceeded,
+        c.LXW_ERROR_SHARED_STRING_INDEX_NOT_FOUND => error.SharedStringIndexNotFound,
+        c.LXW_ERROR_WORKSHEET_INDEX_OUT_OF_RANGE => error.RowColumnLimitError,
+        c.LXW_ERROR_WORKSHEET_MAX_URL_LENGTH_EXCEEDED => error.MaxUrlLengthExceeded,
+        c.LXW_ERROR_WORKSHEET_MAX_NUMBER_URLS_EXCEEDED => error.MaxNumberUrlsExceeded,
+        c.LXW_ERROR_IMAGE_DIMENSIONS => error.ImageDimensionsError,
+        else => error.IoError,
+    };
+}
+
+/// Writes one value to a cell without checking the result.
+/// Numbers of any int or float type, sentinel terminated strings, Cells
+/// and optionals of those are accepted; null optionals are skipped.
+fn writeValue(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    value: anytype,
+    format: ?*c.lxw_format,
+) c.lxw_error {
+    const T = @TypeOf(value);
+    if (T == Cell) return writeCell(worksheet, row, col, value, format);
+    switch (@typeInfo(T)) {
+        .float, .comptime_float => return c.worksheet_write_number(worksheet, row, col, @floatCast(value), format),
+        .int, .comptime_int => return c.worksheet_write_number(worksheet, row, col, @floatFromInt(value), format),
+        .bool => return c.worksheet_write_boolean(worksheet, row, col, @intFromBool(value), format),
+        .optional => return if (value) |inner| writeValue(worksheet, row, col, inner, format) else c.LXW_NO_ERROR,
+        else => {
+            if (comptime isString(T)) return c.worksheet_write_string(worksheet, row, col, value.ptr, format);
+            @compileError("unsupported cell value type " ++ @typeName(T));
+        },
+    }
+}
+
+/// Writes one Cell without checking the result
+pub fn writeCell(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    cell: Cell,
+    format: ?*c.lxw_format,
+) c.lxw_error {
+    return switch (cell) {
+        .number => |number| c.worksheet_write_number(worksheet, row, col, number, format),
+        .string => |string| c.worksheet_write_string(worksheet, row, col, string.ptr, format),
+        .formula => |formula| c.worksheet_write_formula(worksheet, row, col, formula.ptr, format),
+        .boolean => |boolean| c.worksheet_write_boolean(worksheet, row, col, @intFromBool(boolean), format),
+        .datetime => |datetime| blk: {
+            var datetime_copy = datetime;
+            break :blk c.worksheet_write_datetime(worksheet, row, col, &datetime_copy, format);
+        },
+        .blank => c.worksheet_write_blank(worksheet, row, col, format),
+    };
+}
+
+/// True for null terminated byte strings such as [:0]const u8 and string literals
+fn isString(comptime T: type) bool {
+    const info = @typeInfo(T);
+    if (info != .pointer) return false;
+    const pointer = info.pointer;
+    return switch (pointer.size) {
+        .slice => pointer.child == u8 and pointer.sentinel() == 0,
+        .one => switch (@typeInfo(pointer.child)) {
+            .array => |array| array.child == u8 and array.sentinel() == 0,
+            else => false,
+        },
+        else => false,
+    };
+}
+
+/// Checks that count cells starting at first fit within limit
+fn checkRange(first: u64, count: usize, limit: u64) XlsxError!void {
+    if (count > 0 and first + count > limit) return error.RowColumnLimitError;
+}
+
+/// Writes a slice of values to consecutive columns of one row.
+/// The whole range is checked against the worksheet limits before the
+/// first cell is written, and writing stops at the first failing cell.
+pub fn writeRow(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    first_col: c.lxw_col_t,
+    values: anytype,
+    format: ?*c.lxw_format,
+) XlsxError!void {
+    try checkRange(row, 1, c.LXW_ROW_MAX);
+    try checkRange(first_col, values.len, c.LXW_COL_MAX);
+
+    var err: c.lxw_error = c.LXW_NO_ERROR;
+    var col = first_col;
+    for (values) |value| {
+        err = writeValue(worksheet, row, col, value, format);
+        if (err != c.LXW_NO_ERROR) break;
+        col += 1;
+    }
+    return check(err);
+}
+
+/// Writes a slice of values to consecutive rows of one column.
+/// In constant_memory mode rows must be written in order, so a column can
+/// only be written below the last row written so far.
+pub fn writeColumn(
+    worksheet: *c.lxw_worksheet,
+    first_row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    values: anytype,
+    format: ?*c.lxw_format,
+) XlsxError!void {
+    try checkRange(first_row, values.len, c.LXW_ROW_MAX);
+    try checkRange(col, 1, c.LXW_COL_MAX);
+
+    var err: c.lxw_error = c.LXW_NO_ERROR;
+    var row = first_row;
+    for (values) |value| {
+        err = writeValue(worksheet, row, col, value, format);
+        if (err != c.LXW_NO_ERROR) break;
+        row += 1;
+    }
+    return check(err);
+}
+
+/// Writes a slice of rows, each a slice of values, starting at the given
+/// cell. Rows may differ in length. Cells are written row by row, which is
+/// the order constant_memory mode requires.
+pub fn writeMatrix(
+    worksheet: *c.lxw_worksheet,
+    first_row: c.lxw_row_t,
+    first_col: c.lxw_col_t,
+    rows: anytype,
+    format: ?*c.lxw_format,
+) XlsxError!void {
+    var max_cols: usize = 0;
+    for (rows) |values| max_cols = @max(max_cols, values.len);
+    try checkRange(first_row, rows.len, c.LXW_ROW_MAX);
+    try checkRange(first_col, max_cols, c.LXW_COL_MAX);
+
+    var err: c.lxw_error = c.LXW_NO_ERROR;
+    var row = first_row;
+    outer: for (rows) |values| {
+        var col = first_col;
+        for (values) |value| {
+            err = writeValue(worksheet, row, col, value, format);
+            if (err != c.LXW_NO_ERROR) break :outer;
+            col += 1;
+        }
+        row += 1;
+    }
+    return check(err);
+}
+
+test "isString" {
+    try std.testing.expect(isString([:0]const u8));
+    try std.testing.expect(isString(@TypeOf("literal")));
+    try std.testing.expect(!isString([]const u8));
+    try std.testing.expect(!isString(f64));
+}
+
+test "check maps libxlsxwriter errors" {
+    try check(c.LXW_NO_ERROR);
+    try std.testing.expectError(error.RowColumnLimitError, check(c.LXW_ERROR_WORKSHEET_INDEX_OUT_OF_RANGE));
+    try std.testing.expectError(error.MaxStringLengthExceeded, check(c.LXW_ERROR_255_STRING_LENGTH_EXCEEDED));
+    try std.testing.expectError(error.IoError, check(c.LXW_ERROR_CREATING_TMPFILE));
+}
+
+test "bulk writes" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "bulk.xlsx" });
+    defer allocator.free(path);
+
+    const workbook = c.workbook_new(path.ptr);
+    const worksheet = c.workbook_add_worksheet(workbook, null);
+
+    try writeRow(worksheet, 0, 0, &[_][:0]const u8{ "Name", "Count" }, null);
+    try writeColumn(worksheet, 1, 1, &[_]f64{ 1, 2, 3 }, null);
+    try writeMatrix(worksheet, 4, 0, &[_][]const Cell{
+        &.{ .{ .string = "Total" }, .{ .formula = "=SUM(B2:B4)" } },
+        &.{ .blank, .{ .boolean = true }, .{ .number = 1.5 } },
+    }, null);
+    try writeRow(worksheet, 6, 0, &[_]?u32{ 1, null, 3 }, null);
+
+    try std.testing.expectError(
+        error.RowColumnLimitError,
+        writeRow(worksheet, 7, c.LXW_COL_MAX - 1, &[_]f64{ 1, 2 }, null),
+    );
+
+    try check(c.workbook_close(workbook));
+}
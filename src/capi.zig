@@ -0,0 +1,267 @@
+//! C ABI for writing whole arrays from other languages.
+//!
+//! Built as the zigxlsxwriter shared library by `zig build python` and used
+//! by utils/numpy_writer.py through ctypes. Arrays are passed as a pointer,
+//! a row stride in bytes and an element kind, so NumPy buffers are read in
+//! place without converting each cell to a language level object.
+
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+const mem = std.mem;
+
+/// Element type of a column, matching the NumPy dtypes that are accepted
+pub const ColumnKind = enum(c_int) {
+    /// f64, NaN cells are skipped
+    float64,
+    /// i64
+    int64,
+    /// u8, zero is false
+    boolean,
+    /// i64 ticks since 1970-01-01, NaT cells are skipped
+    datetime64,
+    /// Fixed width bytes, padded with NULs ('S' dtype)
+    bytes,
+    /// Fixed width native endian UTF-32, padded with NULs ('U' dtype)
+    unicode,
+};
+
+/// One column of a block. Element r of the column is at data + r * stride,
+/// where stride is negative for a reversed NumPy view.
+pub const Column = extern struct {
+    /// A ColumnKind, checked before any cell is written
+    kind: c_int,
+    data: [*]const u8,
+    stride: isize,
+    /// Size of one element in bytes, used by the string kinds
+    itemsize: usize,
+    /// datetime64 ticks in one day, such as 86400 for seconds
+    ticks_per_day: f64,
+    format: ?*c.lxw_format,
+};
+
+/// NumPy's NaT, the smallest i64
+const not_a_time = std.math.minInt(i64);
+
+/// Excel serial date of 1970-01-01 in the 1900 date system
+const unix_epoch_serial = 25569.0;
+
+pub export fn zxw_workbook_new(
+    filename: [*:0]const u8,
+    constant_memory: bool,
+    tmpdir: ?[*:0]const u8,
+    use_zip64: bool,
+) ?*c.lxw_workbook {
+    var options = c.lxw_workbook_options{
+        .constant_memory = if (constant_memory) c.LXW_TRUE else c.LXW_FALSE,
+        .tmpdir = @constCast(tmpdir),
+        .use_zip64 = if (use_zip64) c.LXW_TRUE else c.LXW_FALSE,
+        .output_buffer = null,
+        .output_buffer_size = null,
+    };
+    return c.workbook_new_opt(filename, &options);
+}
+
+pub export fn zxw_workbook_close(workbook: *c.lxw_workbook) c.lxw_error {
+    return c.workbook_close(workbook);
+}
+
+pub export fn zxw_add_worksheet(workbook: *c.lxw_workbook, name: ?[*:0]const u8) ?*c.lxw_worksheet {
+    return c.workbook_add_worksheet(workbook, name);
+}
+
+/// Adds a format with only a number format set, such as a date format
+pub export fn zxw_add_num_format(workbook: *c.lxw_workbook, num_format: [*:0]const u8) ?*c.lxw_format {
+    const format: *c.lxw_format = c.workbook_add_format(workbook) orelse return null;
+    c.format_set_num_format(format, num_format);
+    return format;
+}
+
+pub export fn zxw_strerror(err: c.lxw_error) [*:0]const u8 {
+    return c.lxw_strerror(err);
+}
+
+/// Writes row_count rows of a block of columns starting at the given cell.
+/// Cells are written row by row, the order constant_memory mode requires,
+/// so a chunk of rows from columns of different types can be written in
+/// one call. The block is checked against the worksheet limits and the
+/// column kinds before the first cell is written, and writing stops at the
+/// first failing cell.
+pub export fn zxw_write_columns(
+    worksheet: *c.lxw_worksheet,
+    first_row: c.lxw_row_t,
+    first_col: c.lxw_col_t,
+    columns: [*]const Column,
+    column_count: usize,
+    row_count: usize,
+) c.lxw_error {
+    if (row_count > 0 and @as(u64, first_row) + row_count > c.LXW_ROW_MAX or
+        column_count > 0 and @as(u64, first_col) + column_count > c.LXW_COL_MAX)
+    {
+        return c.LXW_ERROR_WORKSHEET_INDEX_OUT_OF_RANGE;
+    }
+    for (columns[0..column_count]) |column| {
+        _ = std.meta.intToEnum(ColumnKind, column.kind) catch return c.LXW_ERROR_PARAMETER_VALIDATION;
+    }
+
+    var string_buffer = std.ArrayList(u8).init(std.heap.c_allocator);
+    defer string_buffer.deinit();
+
+    for (0..row_count) |index| {
+        const row: c.lxw_row_t = @intCast(first_row + index);
+        for (columns[0..column_count], 0..) |column, col_index| {
+            const col: c.lxw_col_t = @intCast(first_col + col_index);
+            const err = writeElement(worksheet, row, col, column, elementAt(column, index), &string_buffer);
+            if (err != c.LXW_NO_ERROR) return err;
+        }
+    }
+    return c.LXW_NO_ERROR;
+}
+
+/// Returns element index of a column, stepping back from data when the
+/// stride is negative
+fn elementAt(column: Column, index: usize) [*]const u8 {
+    const offset = @as(isize, @intCast(index)) * column.stride;
+    if (offset < 0) return column.data - @abs(offset);
+    return column.data + @as(usize, @intCast(offset));
+}
+
+fn writeElement(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    column: Column,
+    element: [*]const u8,
+    string_buffer: *std.ArrayList(u8),
+) c.lxw_error {
+    const kind: ColumnKind = @enumFromInt(column.kind);
+    switch (kind) {
+        .float64 => {
+            const value = load(f64, element);
+            if (std.math.isNan(value)) return c.LXW_NO_ERROR;
+            return c.worksheet_write_number(worksheet, row, col, value, column.format);
+        },
+        .int64 => {
+            const value: f64 = @floatFromInt(load(i64, element));
+            return c.worksheet_write_number(worksheet, row, col, value, column.format);
+        },
+        .boolean => {
+            return c.worksheet_write_boolean(worksheet, row, col, @intFromBool(element[0] != 0), column.format);
+        },
+        .datetime64 => {
+            const ticks = load(i64, element);
+            if (ticks == not_a_time) return c.LXW_NO_ERROR;
+            var serial = @as(f64, @floatFromInt(ticks)) / column.ticks_per_day + unix_epoch_serial;
+            // Excel counts 1900-02-29, which did not exist
+            if (serial < 61) serial -= 1;
+            return c.worksheet_write_number(worksheet, row, col, serial, column.format);
+        },
+        .bytes => {
+            const bytes = element[0..column.itemsize];
+            const len = mem.indexOfScalar(u8, bytes, 0) orelse bytes.len;
+            if (len == 0) return c.LXW_NO_ERROR;
+            string_buffer.clearRetainingCapacity();
+            string_buffer.appendSlice(bytes[0..len]) catch return c.LXW_ERROR_MEMORY_MALLOC_FAILED;
+            return writeString(worksheet, row, col, string_buffer, column.format);
+        },
+        .unicode => {
+            string_buffer.clearRetainingCapacity();
+            var offset: usize = 0;
+            while (offset + 4 <= column.itemsize) : (offset += 4) {
+                const codepoint = load(u32, element + offset);
+                if (codepoint == 0) break;
+                var utf8: [4]u8 = undefined;
+                const len = std.unicode.utf8Encode(std.math.cast(u21, codepoint) orelse
+                    return c.LXW_ERROR_PARAMETER_VALIDATION, &utf8) catch
+                    return c.LXW_ERROR_PARAMETER_VALIDATION;
+                string_buffer.appendSlice(utf8[0..len]) catch return c.LXW_ERROR_MEMORY_MALLOC_FAILED;
+            }
+            if (string_buffer.items.len == 0) return c.LXW_NO_ERROR;
+            return writeString(worksheet, row, col, string_buffer, column.format);
+        },
+    }
+}
+
+fn writeString(
+    worksheet: *c.lxw_worksheet,
+    row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    string_buffer: *std.ArrayList(u8),
+    format: ?*c.lxw_format,
+) c.lxw_error {
+    string_buffer.append(0) catch return c.LXW_ERROR_MEMORY_MALLOC_FAILED;
+    const string = string_buffer.items[0 .. string_buffer.items.len - 1 :0];
+    return c.worksheet_write_string(worksheet, row, col, string.ptr, format);
+}
+
+/// Reads a value that may not be aligned, as in a packed record array
+fn load(comptime T: type, element: [*]const u8) T {
+    return mem.bytesToValue(T, element[0..@sizeOf(T)]);
+}
+
+test "zxw_write_columns" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "capi.xlsx" });
+    defer allocator.free(path);
+
+    const workbook = zxw_workbook_new(path.ptr, true, null, false).?;
+    const worksheet = zxw_add_worksheet(workbook, null).?;
+    const date_format = zxw_add_num_format(workbook, "yyyy-mm-dd");
+
+    // A row-major 2x2 matrix, and a column of dates and one of strings
+    const matrix = [_]f64{ 1, 2, std.math.nan(f64), 4 };
+    const days = [_]i64{ 0, not_a_time };
+    const names = [_][3]u32{ .{ 'a', 'b', 0 }, .{ 0x00e9, 0, 0 } };
+    const columns = [_]Column{
+        .{ .kind = @intFromEnum(ColumnKind.float64), .data = mem.sliceAsBytes(&matrix).ptr, .stride = 16, .itemsize = 8, .ticks_per_day = 0, .format = null },
+        .{ .kind = @intFromEnum(ColumnKind.float64), .data = mem.sliceAsBytes(matrix[1..]).ptr, .stride = 16, .itemsize = 8, .ticks_per_day = 0, .format = null },
+        .{ .kind = @intFromEnum(ColumnKind.datetime64), .data = mem.sliceAsBytes(&days).ptr, .stride = 8, .itemsize = 8, .ticks_per_day = 1, .format = date_format },
+        .{ .kind = @intFromEnum(ColumnKind.unicode), .data = mem.sliceAsBytes(&names).ptr, .stride = 12, .itemsize = 12, .ticks_per_day = 0, .format = null },
+    };
+    try bulk.check(zxw_write_columns(worksheet, 0, 0, &columns, columns.len, 2));
+    try std.testing.expectError(
+        error.RowColumnLimitError,
+        bulk.check(zxw_write_columns(worksheet, c.LXW_ROW_MAX - 1, 0, &columns, columns.len, 2)),
+    );
+    try bulk.check(zxw_workbook_close(workbook));
+}
+
+test "reversed columns and unknown kinds" {
+    // A reversed NumPy view points at the last element with a negative stride
+    const values = [_]f64{ 1, 2, 3 };
+    const reversed = Column{
+        .kind = @intFromEnum(ColumnKind.float64),
+        .data = mem.sliceAsBytes(values[2..]).ptr,
+        .stride = -8,
+        .itemsize = 8,
+        .ticks_per_day = 0,
+        .format = null,
+    };
+    for (0..values.len) |index| {
+        try std.testing.expectEqual(values[values.len - 1 - index], load(f64, elementAt(reversed, index)));
+    }
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+    const dir_path = try tmp_dir.dir.realpathAlloc(std.testing.allocator, ".");
+    defer std.testing.allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(std.testing.allocator, &.{ dir_path, "reversed.xlsx" });
+    defer std.testing.allocator.free(path);
+
+    const workbook = zxw_workbook_new(path.ptr, false, null, false).?;
+    const worksheet = zxw_add_worksheet(workbook, null).?;
+    try bulk.check(zxw_write_columns(worksheet, 0, 0, &.{reversed}, 1, values.len));
+
+    var unknown = reversed;
+    unknown.kind = std.meta.fields(ColumnKind).len;
+    try std.testing.expectEqual(
+        @as(c.lxw_error, c.LXW_ERROR_PARAMETER_VALIDATION),
+        zxw_write_columns(worksheet, 0, 1, &.{unknown}, 1, values.len),
+    );
+    try bulk.check(zxw_workbook_close(workbook));
+}
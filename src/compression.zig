@@ -0,0 +1,105 @@
+//! Sizes of the parts of a closed workbook.
+//!
+//! libxlsxwriter deflates every part at zlib's default level inside
+//! workbook_close and has no setting for the level or for compressing parts
+//! on several threads. Re-packing the closed file at another level is a
+//! second pass that can only add to the time of workbook_close, so no level
+//! is offered; this module reports what workbook_close wrote.
+
+const std = @import("std");
+const fs = std.fs;
+const mem = std.mem;
+const zip = std.zip;
+
+/// Sizes of one part of the container
+pub const PartReport = struct {
+    name: []const u8,
+    uncompressed_size: u64,
+    compressed_size: u64,
+};
+
+pub const Report = struct {
+    allocator: mem.Allocator,
+    parts: []PartReport,
+
+    pub fn deinit(self: *Report) void {
+        for (self.parts) |part| self.allocator.free(part.name);
+        self.allocator.free(self.parts);
+    }
+
+    /// Writes the report as a table, one line per part and a total
+    pub fn format(
+        self: Report,
+        comptime _: []const u8,
+        _: std.fmt.FormatOptions,
+        writer: anytype,
+    ) !void {
+        try writer.print("{s:<40} {s:>12} {s:>12}\n", .{ "PART", "SIZE", "COMPRESSED" });
+        var total = PartReport{
+            .name = "total",
+            .uncompressed_size = 0,
+            .compressed_size = 0,
+        };
+        for (self.parts) |part| {
+            try writePart(writer, part);
+            total.uncompressed_size += part.uncompressed_size;
+            total.compressed_size += part.compressed_size;
+        }
+        try writePart(writer, total);
+    }
+
+    fn writePart(writer: anytype, part: PartReport) !void {
+        try writer.print("{s:<40} {d:>12} {d:>12}\n", .{
+            part.name,
+            part.uncompressed_size,
+            part.compressed_size,
+        });
+    }
+};
+
+/// Reports the part sizes of a container, in central directory order,
+/// without changing it
+pub fn partSizes(allocator: mem.Allocator, path: []const u8) !Report {
+    const file = try fs.cwd().openFile(path, .{});
+    defer file.close();
+
+    var iter = try zip.Iterator(fs.File.SeekableStream).init(file.seekableStream());
+
+    var parts = std.ArrayList(PartReport).init(allocator);
+    defer parts.deinit();
+    errdefer for (parts.items) |part| allocator.free(part.name);
+
+    while (try iter.next()) |entry| {
+        const name = try allocator.alloc(u8, entry.filename_len);
+        errdefer allocator.free(name);
+        try file.seekTo(entry.header_zip_offset + @sizeOf(zip.CentralDirectoryFileHeader));
+        try file.reader().readNoEof(name);
+
+        try parts.append(.{
+            .name = name,
+            .uncompressed_size = entry.uncompressed_size,
+            .compressed_size = entry.compressed_size,
+        });
+    }
+    return .{
+        .allocator = allocator,
+        .parts = try parts.toOwnedSlice(),
+    };
+}
+
+test "partSizes reads the central directory" {
+    const allocator = std.testing.allocator;
+
+    var report = try partSizes(allocator, "testing/c-output-xls/hello.xlsx");
+    defer report.deinit();
+    try std.testing.expectEqual(@as(usize, 10), report.parts.len);
+    try std.testing.expectEqualStrings("[Content_Types].xml", report.parts[0].name);
+    try std.testing.expectEqualStrings("xl/worksheets/sheet1.xml", report.parts[3].name);
+    try std.testing.expectEqual(@as(u64, 578), report.parts[3].uncompressed_size);
+    try std.testing.expectEqual(@as(u64, 325), report.parts[3].compressed_size);
+
+    var table = std.ArrayList(u8).init(allocator);
+    defer table.deinit();
+    try table.writer().print("{}", .{report});
+    try std.testing.expect(mem.endsWith(u8, table.items, "total" ++ " " ** 35 ++ "        12997         4125\n"));
+}
@@ -0,0 +1,280 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+
+pub const Options = struct {
+    /// Use the 1904 date system, as workbooks made by Excel for Mac do
+    date_1904: bool = false,
+};
+
+/// Resolution of Unix timestamps
+pub const Unit = enum {
+    seconds,
+    milliseconds,
+    microseconds,
+    nanoseconds,
+
+    fn ticksPerDay(unit: Unit) i64 {
+        const seconds_per_day = std.time.s_per_day;
+        return switch (unit) {
+            .seconds => seconds_per_day,
+            .milliseconds => seconds_per_day * std.time.ms_per_s,
+            .microseconds => seconds_per_day * std.time.us_per_s,
+            .nanoseconds => seconds_per_day * std.time.ns_per_s,
+        };
+    }
+};
+
+/// Days from day 0 of each date system to 1970-01-01, not counting the
+/// 1900-02-29 that Excel has in its 1900 calendar
+const unix_days_1900 = 25568;
+const unix_days_1904 = 24107;
+
+const lanes = std.simd.suggestVectorLength(f64) orelse 4;
+const F = @Vector(lanes, f64);
+const I = @Vector(lanes, i64);
+
+/// Values converted and written per chunk by the column writers
+const chunk_len = 1024;
+
+/// Converts Unix timestamps to Excel serial dates, a vector of values at
+/// a time. out must be at least as long as ticks. Seconds are converted
+/// like lxw_unixtime_to_excel_date_epoch and give the same numbers as
+/// worksheet_write_unixtime; finer units keep their sub-second part.
+pub fn unixToSerial(ticks: []const i64, unit: Unit, out: []f64, options: Options) void {
+    std.debug.assert(out.len >= ticks.len);
+    var index: usize = 0;
+    while (index + lanes <= ticks.len) : (index += lanes) {
+        out[index..][0..lanes].* = unixVector(ticks[index..][0..lanes].*, unit, options);
+    }
+    if (index < ticks.len) {
+        const rest = ticks.len - index;
+        var padded: [lanes]i64 = @splat(0);
+        @memcpy(padded[0..rest], ticks[index..]);
+        const serials: [lanes]f64 = unixVector(padded, unit, options);
+        @memcpy(out[index..ticks.len], serials[0..rest]);
+    }
+}
+
+/// Converts lxw_datetime values to Excel serial dates, a vector of values
+/// at a time, giving the same numbers as worksheet_write_datetime. Dates
+/// with a year of 0 are times only. out must be at least as long as
+/// datetimes.
+pub fn datetimeToSerial(datetimes: []const c.lxw_datetime, out: []f64, options: Options) void {
+    std.debug.assert(out.len >= datetimes.len);
+    var index: usize = 0;
+    while (index + lanes <= datetimes.len) : (index += lanes) {
+        out[index..][0..lanes].* = datetimeVector(datetimes[index..][0..lanes], options);
+    }
+    if (index < datetimes.len) {
+        const rest = datetimes.len - index;
+        var padded = [_]c.lxw_datetime{.{ .year = 0, .month = 0, .day = 0, .hour = 0, .min = 0, .sec = 0 }} ** lanes;
+        @memcpy(padded[0..rest], datetimes[index..]);
+        const serials: [lanes]f64 = datetimeVector(&padded, options);
+        @memcpy(out[index..datetimes.len], serials[0..rest]);
+    }
+}
+
+fn unixVector(ticks: I, unit: Unit, options: Options) F {
+    const serial: F = switch (unit) {
+        // The same operations as libxlsxwriter, for the same bits
+        .seconds => @as(F, @splat(if (options.date_1904) unix_days_1904 else unix_days_1900)) +
+            @as(F, @floatFromInt(ticks)) / @as(F, @splat(std.time.s_per_day)),
+        else => blk: {
+            // Whole days and the time of day apart, so that large tick
+            // counts do not lose the time to rounding
+            const per_day: I = @splat(unit.ticksPerDay());
+            const days = @divFloor(ticks, per_day);
+            const time = ticks - days * per_day;
+            const epoch: I = @splat(if (options.date_1904) unix_days_1904 else unix_days_1900);
+            break :blk @as(F, @floatFromInt(days + epoch)) +
+                @as(F, @floatFromInt(time)) / @as(F, @floatFromInt(per_day));
+        },
+    };
+    if (options.date_1904) return serial;
+    // Excel counts 1900-02-29, which did not exist
+    return @select(f64, serial >= @as(F, @splat(60.0)), serial + @as(F, @splat(1.0)), serial);
+}
+
+fn datetimeVector(datetimes: *const [lanes]c.lxw_datetime, options: Options) F {
+    var year: I = undefined;
+    var month: I = undefined;
+    var day: I = undefined;
+    var clock: I = undefined;
+    var sec: F = undefined;
+    inline for (0..lanes) |lane| {
+        const datetime = datetimes[lane];
+        year[lane] = datetime.year;
+        month[lane] = datetime.month;
+        day[lane] = datetime.day;
+        clock[lane] = @as(i64, datetime.hour) * 60 * 60 + @as(i64, datetime.min) * 60;
+        sec[lane] = datetime.sec;
+    }
+
+    // Days since 1970-01-01 of the proleptic Gregorian calendar, counting
+    // years from March so that the leap day comes last
+    const one: I = @splat(1);
+    const before_march = month <= @as(I, @splat(2));
+    const y = year - @select(i64, before_march, one, @as(I, @splat(0)));
+    const era = @divFloor(y, @as(I, @splat(400)));
+    const year_of_era = y - era * @as(I, @splat(400));
+    const march_month = month + @select(i64, before_march, @as(I, @splat(9)), @as(I, @splat(-3)));
+    const day_of_year = @divTrunc(@as(I, @splat(153)) * march_month + @as(I, @splat(2)), @as(I, @splat(5))) + day - one;
+    const day_of_era = year_of_era * @as(I, @splat(365)) + @divTrunc(year_of_era, @as(I, @splat(4))) -
+        @divTrunc(year_of_era, @as(I, @splat(100))) + day_of_year;
+    const unix_days = era * @as(I, @splat(146097)) + day_of_era - @as(I, @splat(719468));
+
+    const zero: I = @splat(0);
+    const time_only = year == zero;
+    var days: I = undefined;
+    if (options.date_1904) {
+        days = unix_days + @as(I, @splat(unix_days_1904));
+    } else {
+        days = unix_days + @as(I, @splat(unix_days_1900));
+        days = @select(i64, days > @as(I, @splat(59)), days + one, days);
+        // 1900-02-29 is day 60 of Excel's calendar
+        const leap_bug = @select(bool, year == @as(I, @splat(1900)), month == @as(I, @splat(2)), @as(@Vector(lanes, bool), @splat(false)));
+        days = @select(i64, @select(bool, leap_bug, day == @as(I, @splat(29)), leap_bug), @as(I, @splat(60)), days);
+    }
+    days = @select(i64, time_only, zero, days);
+
+    const seconds = (@as(F, @floatFromInt(clock)) + sec) / @as(F, @splat(std.time.s_per_day));
+    return @as(F, @floatFromInt(days)) + seconds;
+}
+
+/// Writes Unix timestamps to consecutive rows of one column as Excel dates,
+/// all with the same date format
+pub fn writeUnixColumn(
+    worksheet: *c.lxw_worksheet,
+    first_row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    ticks: []const i64,
+    unit: Unit,
+    format: ?*c.lxw_format,
+    options: Options,
+) XlsxError!void {
+    try checkColumn(first_row, col, ticks.len);
+    var serials: [chunk_len]f64 = undefined;
+    var start: usize = 0;
+    while (start < ticks.len) : (start += chunk_len) {
+        const chunk = ticks[start..@min(start + chunk_len, ticks.len)];
+        unixToSerial(chunk, unit, &serials, options);
+        try bulk.writeColumn(worksheet, @intCast(first_row + start), col, serials[0..chunk.len], format);
+    }
+}
+
+/// Writes lxw_datetime values to consecutive rows of one column, all with
+/// the same date format
+pub fn writeDatetimeColumn(
+    worksheet: *c.lxw_worksheet,
+    first_row: c.lxw_row_t,
+    col: c.lxw_col_t,
+    datetimes: []const c.lxw_datetime,
+    format: ?*c.lxw_format,
+    options: Options,
+) XlsxError!void {
+    try checkColumn(first_row, col, datetimes.len);
+    var serials: [chunk_len]f64 = undefined;
+    var start: usize = 0;
+    while (start < datetimes.len) : (start += chunk_len) {
+        const chunk = datetimes[start..@min(start + chunk_len, datetimes.len)];
+        datetimeToSerial(chunk, &serials, options);
+        try bulk.writeColumn(worksheet, @intCast(first_row + start), col, serials[0..chunk.len], format);
+    }
+}
+
+/// Checks the whole column before the first cell is written, as bulk does
+fn checkColumn(first_row: c.lxw_row_t, col: c.lxw_col_t, count: usize) XlsxError!void {
+    if (count > 0 and @as(u64, first_row) + count > c.LXW_ROW_MAX) return error.RowColumnLimitError;
+    if (col >= c.LXW_COL_MAX) return error.RowColumnLimitError;
+}
+
+fn datetimeOf(year: c_int, month: c_int, day: c_int, hour: c_int, min: c_int, sec: f64) c.lxw_datetime {
+    return .{ .year = year, .month = month, .day = day, .hour = hour, .min = min, .sec = sec };
+}
+
+test "datetimeToSerial" {
+    const datetimes = [_]c.lxw_datetime{
+        datetimeOf(2013, 2, 28, 12, 0, 0),
+        datetimeOf(1970, 1, 1, 0, 0, 0),
+        datetimeOf(1900, 1, 1, 0, 0, 0),
+        datetimeOf(1900, 2, 28, 0, 0, 0),
+        datetimeOf(1900, 2, 29, 0, 0, 0),
+        datetimeOf(1900, 3, 1, 0, 0, 0),
+        datetimeOf(1900, 1, 0, 0, 0, 0),
+        datetimeOf(0, 0, 0, 12, 30, 0),
+        datetimeOf(2000, 12, 31, 23, 59, 59.5),
+        datetimeOf(9999, 12, 31, 0, 0, 0),
+    };
+    const expected = [_]f64{ 41333.5, 25569, 1, 59, 60, 61, 0, 0.5208333333333334, 36891 + (86399.5 / 86400.0), 2958465 };
+    var serials: [datetimes.len]f64 = undefined;
+    datetimeToSerial(&datetimes, &serials, .{});
+    for (expected, serials) |want, got| try std.testing.expectApproxEqAbs(want, got, 1e-9);
+
+    datetimeToSerial(datetimes[0..2], &serials, .{ .date_1904 = true });
+    try std.testing.expectEqual(@as(f64, 41333.5 - 1462), serials[0]);
+    try std.testing.expectEqual(@as(f64, 24107), serials[1]);
+}
+
+test "unixToSerial matches datetimeToSerial" {
+    const allocator = std.testing.allocator;
+    const count = 50000;
+    const seconds = try allocator.alloc(i64, count);
+    defer allocator.free(seconds);
+    const datetimes = try allocator.alloc(c.lxw_datetime, count);
+    defer allocator.free(datetimes);
+
+    // One date every 3 days and 17 minutes from 1970 on
+    for (seconds, datetimes, 0..) |*second, *datetime, index| {
+        second.* = @intCast(index * (3 * std.time.s_per_day + 17 * 60));
+        const epoch_seconds = std.time.epoch.EpochSeconds{ .secs = @intCast(second.*) };
+        const year_day = epoch_seconds.getEpochDay().calculateYearDay();
+        const month_day = year_day.calculateMonthDay();
+        const day_seconds = epoch_seconds.getDaySeconds();
+        datetime.* = datetimeOf(year_day.year, month_day.month.numeric(), month_day.day_index + 1, day_seconds.getHoursIntoDay(), day_seconds.getMinutesIntoHour(), 0);
+    }
+
+    for ([_]Options{ .{}, .{ .date_1904 = true } }) |options| {
+        const from_unix = try allocator.alloc(f64, count);
+        defer allocator.free(from_unix);
+        const from_datetime = try allocator.alloc(f64, count);
+        defer allocator.free(from_datetime);
+        unixToSerial(seconds, .seconds, from_unix, options);
+        datetimeToSerial(datetimes, from_datetime, options);
+        for (from_unix, from_datetime) |a, b| try std.testing.expectApproxEqAbs(a, b, 1e-9);
+    }
+
+    const nanoseconds = [_]i64{ 0, -1_000_000_000, 1_500_000_000, 1_700_000_000_123_456_789 };
+    var serials: [nanoseconds.len]f64 = undefined;
+    unixToSerial(&nanoseconds, .nanoseconds, &serials, .{});
+    try std.testing.expectEqual(@as(f64, 25569), serials[0]);
+    try std.testing.expectApproxEqAbs(@as(f64, 25569 - 1.0 / 86400.0), serials[1], 1e-12);
+    try std.testing.expectApproxEqAbs(@as(f64, 25569 + 1.5 / 86400.0), serials[2], 1e-12);
+    try std.testing.expectApproxEqAbs(@as(f64, 25569 + 1_700_000_000.123456789 / 86400.0), serials[3], 1e-9);
+}
+
+test "datetime columns" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "datetime.xlsx" });
+    defer allocator.free(path);
+
+    const workbook = c.workbook_new(path.ptr);
+    const worksheet = c.workbook_add_worksheet(workbook, null);
+    const date_format = c.workbook_add_format(workbook);
+    c.format_set_num_format(date_format, "yyyy-mm-dd hh:mm");
+
+    try writeUnixColumn(worksheet, 0, 0, &[_]i64{ 0, 1_700_000_000 }, .seconds, date_format, .{});
+    try writeDatetimeColumn(worksheet, 0, 1, &[_]c.lxw_datetime{datetimeOf(2013, 2, 28, 12, 0, 0)}, date_format, .{});
+    try std.testing.expectError(
+        error.RowColumnLimitError,
+        writeUnixColumn(worksheet, c.LXW_ROW_MAX - 1, 0, &[_]i64{ 0, 0 }, .seconds, date_format, .{}),
+    );
+
+    try bulk.check(c.workbook_close(workbook));
+}
@@ -0,0 +1,72 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+
+/// Time pinned when SOURCE_DATE_EPOCH is not set, 2000-01-01T00:00:00Z
+pub const default_timestamp: i64 = 946684800;
+
+/// The pinned time in seconds since the Unix epoch: SOURCE_DATE_EPOCH if
+/// set, as in other reproducible builds, or default_timestamp
+pub fn timestamp() i64 {
+    const value = std.posix.getenv("SOURCE_DATE_EPOCH") orelse return default_timestamp;
+    return std.fmt.parseInt(i64, value, 10) catch default_timestamp;
+}
+
+/// Closes the workbook so that the same calls always give the same bytes.
+///
+/// libxlsxwriter stamps every zip entry with 1980-01-01 already, so the
+/// only time in the file is the document creation time, which
+/// docProps/core.xml also uses as the modification time. It is pinned to
+/// timestamp() unless it was set with workbook_set_properties. C and Zig
+/// programs making the same calls and pinning the same time give
+/// identical files.
+pub fn close(workbook: *c.lxw_workbook) !void {
+    _ = pin(workbook);
+    try bulk.check(c.workbook_close(workbook));
+}
+
+/// Pins the document creation time, keeping one set explicitly, and
+/// returns it
+pub fn pin(workbook: *c.lxw_workbook) i64 {
+    if (workbook.properties != null) {
+        if (workbook.properties.*.created == 0) workbook.properties.*.created = @intCast(timestamp());
+        return workbook.properties.*.created;
+    }
+    var properties = std.mem.zeroes(c.lxw_doc_properties);
+    properties.created = @intCast(timestamp());
+    _ = c.workbook_set_properties(workbook, &properties);
+    return properties.created;
+}
+
+test "close matches the C reference" {
+    const allocator = std.testing.allocator;
+    // Written by examples/c/hello.c, run from the build root
+    const reference = std.fs.cwd().readFileAlloc(allocator, "testing/c-output-xls/hello.xlsx", 1 << 20) catch |err| switch (err) {
+        error.FileNotFound => return error.SkipZigTest,
+        else => return err,
+    };
+    defer allocator.free(reference);
+
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "hello.xlsx" });
+    defer allocator.free(path);
+
+    const workbook = c.workbook_new(path.ptr);
+    // The creation time of the reference, 2025-03-14T18:53:05Z
+    var properties = std.mem.zeroes(c.lxw_doc_properties);
+    properties.created = 1741978385;
+    try bulk.check(c.workbook_set_properties(workbook, &properties));
+    try std.testing.expectEqual(@as(i64, 1741978385), pin(workbook));
+
+    const worksheet = c.workbook_add_worksheet(workbook, null);
+    try bulk.check(c.worksheet_write_string(worksheet, 0, 0, "Hello", null));
+    try bulk.check(c.worksheet_write_number(worksheet, 1, 0, 123, null));
+    try close(workbook);
+
+    const output = try tmp_dir.dir.readFileAlloc(allocator, "hello.xlsx", 1 << 20);
+    defer allocator.free(output);
+    try std.testing.expectEqualSlices(u8, reference, output);
+}
@@ -15,6 +15,14 @@ pub const XlsxError = error {
     MergeRangeOverlaps,
     MaxUrlLengthExceeded,
     UnknownUrlType,
+    MaxNumberUrlsExceeded,
+    ImageDimensionsError,
+    SharedStringIndexNotFound,
+    FeatureNotSupported,
+    NullParameterIgnored,
+    ParameterValidationError,
+    ParameterIsEmpty,
+    MemoryMallocFailed,
     IoError
 };
 
@@ -34,6 +42,14 @@ pub fn formatErr(err: XlsxError) XlsxError![]const u8 {
         error.MergeRangeOverlaps => "Merge Range Overlaps",
         error.MaxUrlLengthExceeded => "Max Url Length Exceeded",
         error.UnknownUrlType => "Unknown Url Type",
+        error.MaxNumberUrlsExceeded => "Max Number Urls Exceeded",
+        error.ImageDimensionsError => "Image Dimensions Error",
+        error.SharedStringIndexNotFound => "Shared String Index Not Found",
+        error.FeatureNotSupported => "Feature Not Supported",
+        error.NullParameterIgnored => "Null Parameter Ignored",
+        error.ParameterValidationError => "Parameter Validation Error",
+        error.ParameterIsEmpty => "Parameter Is Empty",
+        error.MemoryMallocFailed => "Memory Malloc Failed",
         error.IoError => "I/O Error",
     };
 }
@@ -52,5 +68,13 @@ test "Error name" {
     try testing.expectEqualStrings("Merge Range Overlaps", try formatErr(error.MergeRangeOverlaps));
     try testing.expectEqualStrings("Max Url Length Exceeded", try formatErr(error.MaxUrlLengthExceeded));
     try testing.expectEqualStrings("Unknown Url Type", try formatErr(error.UnknownUrlType));
+    try testing.expectEqualStrings("Max Number Urls Exceeded", try formatErr(error.MaxNumberUrlsExceeded));
+    try testing.expectEqualStrings("Image Dimensions Error", try formatErr(error.ImageDimensionsError));
+    try testing.expectEqualStrings("Shared String Index Not Found", try formatErr(error.SharedStringIndexNotFound));
+    try testing.expectEqualStrings("Feature Not Supported", try formatErr(error.FeatureNotSupported));
+    try testing.expectEqualStrings("Null Parameter Ignored", try formatErr(error.NullParameterIgnored));
+    try testing.expectEqualStrings("Parameter Validation Error", try formatErr(error.ParameterValidationError));
+    try testing.expectEqualStrings("Parameter Is Empty", try formatErr(error.ParameterIsEmpty));
+    try testing.expectEqualStrings("Memory Malloc Failed", try formatErr(error.MemoryMallocFailed));
     try testing.expectEqualStrings("I/O Error", try formatErr(error.IoError));
 }
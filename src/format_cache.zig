@@ -0,0 +1,192 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+const mem = std.mem;
+
+/// Declarative description of a cell format.
+/// Fields left at their defaults are not applied to the format.
+pub const FormatSpec = struct {
+    bold: bool = false,
+    italic: bool = false,
+    underline: u8 = c.LXW_UNDERLINE_NONE,
+    font_name: ?[:0]const u8 = null,
+    font_size: ?f64 = null,
+    font_color: ?c.lxw_color_t = null,
+    num_format: ?[:0]const u8 = null,
+    num_format_index: ?u8 = null,
+    alignment: ?u8 = null,
+    vertical_alignment: ?u8 = null,
+    text_wrap: bool = false,
+    pattern: ?u8 = null,
+    bg_color: ?c.lxw_color_t = null,
+    fg_color: ?c.lxw_color_t = null,
+    border: ?u8 = null,
+
+    /// Applies every set property to a libxlsxwriter format
+    fn apply(self: FormatSpec, format: *c.lxw_format) void {
+        if (self.bold) c.format_set_bold(format);
+        if (self.italic) c.format_set_italic(format);
+        if (self.underline != c.LXW_UNDERLINE_NONE) c.format_set_underline(format, self.underline);
+        if (self.font_name) |font_name| c.format_set_font_name(format, font_name.ptr);
+        if (self.font_size) |font_size| c.format_set_font_size(format, font_size);
+        if (self.font_color) |font_color| c.format_set_font_color(format, font_color);
+        if (self.num_format) |num_format| c.format_set_num_format(format, num_format.ptr);
+        if (self.num_format_index) |index| c.format_set_num_format_index(format, index);
+        if (self.alignment) |alignment| c.format_set_align(format, alignment);
+        if (self.vertical_alignment) |alignment| c.format_set_align(format, alignment);
+        if (self.text_wrap) c.format_set_text_wrap(format);
+        if (self.pattern) |pattern| c.format_set_pattern(format, pattern);
+        if (self.bg_color) |bg_color| c.format_set_bg_color(format, bg_color);
+        if (self.fg_color) |fg_color| c.format_set_fg_color(format, fg_color);
+        if (self.border) |border| c.format_set_border(format, border);
+    }
+};
+
+/// Hash map context comparing FormatSpecs by value, including string contents
+const SpecContext = struct {
+    pub fn hash(_: SpecContext, spec: FormatSpec) u64 {
+        var hasher = std.hash.Wyhash.init(0);
+        inline for (std.meta.fields(FormatSpec)) |field| {
+            hashValue(&hasher, @field(spec, field.name));
+        }
+        return hasher.final();
+    }
+
+    pub fn eql(_: SpecContext, a: FormatSpec, b: FormatSpec) bool {
+        inline for (std.meta.fields(FormatSpec)) |field| {
+            if (!eqlValue(@field(a, field.name), @field(b, field.name))) return false;
+        }
+        return true;
+    }
+
+    fn hashValue(hasher: *std.hash.Wyhash, value: anytype) void {
+        switch (@typeInfo(@TypeOf(value))) {
+            .optional => {
+                hasher.update(&.{@intFromBool(value != null)});
+                if (value) |inner| hashValue(hasher, inner);
+            },
+            .float => hasher.update(mem.asBytes(&@as(u64, @bitCast(@as(f64, value))))),
+            .pointer => {
+                hasher.update(value);
+                hasher.update(&.{0});
+            },
+            else => std.hash.autoHash(hasher, value),
+        }
+    }
+
+    fn eqlValue(a: anytype, b: @TypeOf(a)) bool {
+        switch (@typeInfo(@TypeOf(a))) {
+            .optional => {
+                if (a == null or b == null) return a == null and b == null;
+                return eqlValue(a.?, b.?);
+            },
+            .pointer => return mem.eql(u8, a, b),
+            else => return a == b,
+        }
+    }
+};
+
+/// Returns one libxlsxwriter format per distinct FormatSpec.
+/// Formats built per cell or per row in a loop then share a single
+/// lxw_format instead of allocating a new one for every cell.
+pub const FormatCache = struct {
+    workbook: *c.lxw_workbook,
+    formats: std.HashMapUnmanaged(FormatSpec, *c.lxw_format, SpecContext, std.hash_map.default_max_load_percentage),
+    allocator: mem.Allocator,
+    strings: std.heap.ArenaAllocator,
+    hits: u64,
+    misses: u64,
+
+    pub const Stats = struct {
+        hits: u64,
+        misses: u64,
+        formats: usize,
+    };
+
+    pub fn init(allocator: mem.Allocator, workbook: *c.lxw_workbook) FormatCache {
+        return .{
+            .workbook = workbook,
+            .formats = .{},
+            .allocator = allocator,
+            .strings = std.heap.ArenaAllocator.init(allocator),
+            .hits = 0,
+            .misses = 0,
+        };
+    }
+
+    /// Frees the cache. The formats belong to the workbook and stay valid.
+    pub fn deinit(self: *FormatCache) void {
+        self.formats.deinit(self.allocator);
+        self.strings.deinit();
+    }
+
+    /// Returns the format for a spec, creating it on first use
+    pub fn get(self: *FormatCache, spec: FormatSpec) !*c.lxw_format {
+        const entry = try self.formats.getOrPut(self.allocator, spec);
+        if (entry.found_existing) {
+            self.hits += 1;
+            return entry.value_ptr.*;
+        }
+        errdefer self.formats.removeByPtr(entry.key_ptr);
+
+        // The key must outlive the caller's strings
+        const arena = self.strings.allocator();
+        if (spec.font_name) |font_name| entry.key_ptr.font_name = try arena.dupeZ(u8, font_name);
+        if (spec.num_format) |num_format| entry.key_ptr.num_format = try arena.dupeZ(u8, num_format);
+
+        const format: *c.lxw_format = c.workbook_add_format(self.workbook) orelse return XlsxError.MemoryMallocFailed;
+        spec.apply(format);
+        entry.value_ptr.* = format;
+        self.misses += 1;
+        return format;
+    }
+
+    pub fn stats(self: *const FormatCache) Stats {
+        return .{
+            .hits = self.hits,
+            .misses = self.misses,
+            .formats = self.formats.count(),
+        };
+    }
+};
+
+test "FormatSpec equality and hashing" {
+    const context = SpecContext{};
+    var buffer = "0.00".*;
+    const a = FormatSpec{ .bold = true, .num_format = "0.00", .font_size = 11 };
+    const b = FormatSpec{ .bold = true, .num_format = buffer[0..4 :0], .font_size = 11 };
+    const other = FormatSpec{ .bold = true, .num_format = "0.00", .font_size = 12 };
+
+    try std.testing.expect(context.eql(a, b));
+    try std.testing.expectEqual(context.hash(a), context.hash(b));
+    try std.testing.expect(!context.eql(a, other));
+    try std.testing.expect(!context.eql(a, .{ .bold = true, .font_size = 11 }));
+}
+
+test "FormatCache reuses formats" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "format_cache.xlsx" });
+    defer allocator.free(path);
+
+    const workbook = c.workbook_new(path.ptr);
+    var cache = FormatCache.init(allocator, workbook);
+    defer cache.deinit();
+
+    var row: u32 = 0;
+    while (row < 100) : (row += 1) {
+        const spec = FormatSpec{ .bold = row % 2 == 0, .num_format = "0.00" };
+        _ = try cache.get(spec);
+    }
+
+    const stats = cache.stats();
+    try std.testing.expectEqual(@as(usize, 2), stats.formats);
+    try std.testing.expectEqual(@as(u64, 2), stats.misses);
+    try std.testing.expectEqual(@as(u64, 98), stats.hits);
+
+    _ = c.workbook_close(workbook);
+}
@@ -0,0 +1,333 @@
+const std = @import("std");
+const posix = std.posix;
+
+// Counts the C allocations of a program, libxlsxwriter's among them, when
+// preloaded on Linux with glibc:
+//
+//     LD_PRELOAD=zig-out/lib/libzxwprofile.so ZXW_PROFILE_OUT=out.json prog
+//
+// malloc and friends are replaced by functions that call the glibc
+// implementations and count the requested bytes by phase and call site.
+// The report is written as JSON when the program exits, to the file named
+// by ZXW_PROFILE_OUT or to stderr. profile.setPhase() switches the phase.
+//
+// Everything here runs inside malloc, so it must not allocate itself: the
+// tables live in memory mapped directly and the report is formatted on
+// the stack.
+
+extern "c" fn __libc_malloc(size: usize) ?*anyopaque;
+extern "c" fn __libc_calloc(count: usize, size: usize) ?*anyopaque;
+extern "c" fn __libc_realloc(ptr: ?*anyopaque, size: usize) ?*anyopaque;
+extern "c" fn __libc_memalign(alignment: usize, size: usize) ?*anyopaque;
+extern "c" fn __libc_free(ptr: ?*anyopaque) void;
+
+const DlInfo = extern struct {
+    fname: ?[*:0]const u8,
+    fbase: ?*anyopaque,
+    sname: ?[*:0]const u8,
+    saddr: ?*anyopaque,
+};
+extern "c" fn dladdr(address: *const anyopaque, info: *DlInfo) c_int;
+
+const Phase = @import("profile.zig").Phase;
+
+const Counts = struct {
+    allocations: u64 = 0,
+    total_bytes: u64 = 0,
+    peak_bytes: u64 = 0,
+};
+
+const Site = struct {
+    address: usize,
+    phase: Phase,
+    allocations: u64,
+    total_bytes: u64,
+    live_bytes: u64,
+    peak_bytes: u64,
+};
+
+/// Size and site of a live block. address 0 marks a free slot.
+const Block = struct {
+    address: usize,
+    size: usize,
+    site: u32,
+};
+
+/// Sites beyond this are counted in the last one
+const max_sites = 1 << 16;
+const initial_blocks = 1 << 16;
+
+var mutex: std.Thread.Mutex = .{};
+var phase: Phase = .write;
+var live_bytes: u64 = 0;
+var peak_bytes: u64 = 0;
+var phases = std.EnumArray(Phase, Counts).initFill(.{});
+var sites: []Site = &.{};
+var site_count: u32 = 0;
+var blocks: []Block = &.{};
+var block_count: usize = 0;
+
+export fn zxw_profile_phase(new_phase: c_int) void {
+    mutex.lock();
+    defer mutex.unlock();
+    phase = std.meta.intToEnum(Phase, new_phase) catch return;
+    const counts = phases.getPtr(phase);
+    counts.peak_bytes = @max(counts.peak_bytes, live_bytes);
+}
+
+export fn malloc(size: usize) ?*anyopaque {
+    const ptr = __libc_malloc(size);
+    allocated(ptr, size, @returnAddress());
+    return ptr;
+}
+
+export fn calloc(count: usize, size: usize) ?*anyopaque {
+    const ptr = __libc_calloc(count, size);
+    allocated(ptr, count *% size, @returnAddress());
+    return ptr;
+}
+
+export fn realloc(old: ?*anyopaque, size: usize) ?*anyopaque {
+    const ptr = __libc_realloc(old, size);
+    // A failed realloc leaves the old block alone
+    if (ptr == null and size != 0) return null;
+    freed(old);
+    allocated(ptr, size, @returnAddress());
+    return ptr;
+}
+
+export fn free(ptr: ?*anyopaque) void {
+    freed(ptr);
+    __libc_free(ptr);
+}
+
+export fn memalign(alignment: usize, size: usize) ?*anyopaque {
+    const ptr = __libc_memalign(alignment, size);
+    allocated(ptr, size, @returnAddress());
+    return ptr;
+}
+
+export fn aligned_alloc(alignment: usize, size: usize) ?*anyopaque {
+    const ptr = __libc_memalign(alignment, size);
+    allocated(ptr, size, @returnAddress());
+    return ptr;
+}
+
+export fn posix_memalign(result: *?*anyopaque, alignment: usize, size: usize) c_int {
+    if (alignment < @sizeOf(usize) or !std.math.isPowerOfTwo(alignment)) return @intFromEnum(posix.E.INVAL);
+    const ptr = __libc_memalign(alignment, size) orelse return @intFromEnum(posix.E.NOMEM);
+    allocated(ptr, size, @returnAddress());
+    result.* = ptr;
+    return 0;
+}
+
+fn allocated(ptr: ?*anyopaque, size: usize, return_address: usize) void {
+    const address = @intFromPtr(ptr orelse return);
+    mutex.lock();
+    defer mutex.unlock();
+
+    live_bytes += size;
+    peak_bytes = @max(peak_bytes, live_bytes);
+    const counts = phases.getPtr(phase);
+    counts.allocations += 1;
+    counts.total_bytes += size;
+    counts.peak_bytes = @max(counts.peak_bytes, live_bytes);
+
+    const site_index = findSite(return_address) orelse return;
+    const site = &sites[site_index];
+    site.allocations += 1;
+    site.total_bytes += size;
+    site.live_bytes += size;
+    site.peak_bytes = @max(site.peak_bytes, site.live_bytes);
+
+    if (!insertBlock(.{ .address = address, .size = size, .site = site_index })) {
+        // Without room to remember the block its free cannot be counted
+        live_bytes -= size;
+        site.live_bytes -= size;
+    }
+}
+
+fn freed(ptr: ?*anyopaque) void {
+    const address = @intFromPtr(ptr orelse return);
+    mutex.lock();
+    defer mutex.unlock();
+
+    // Blocks allocated before the tables existed are not known
+    const block = removeBlock(address) orelse return;
+    live_bytes -= block.size;
+    sites[block.site].live_bytes -= block.size;
+}
+
+/// Index of the site of a return address in the current phase, found by
+/// linear probing. The last slot counts the sites that did not fit.
+fn findSite(address: usize) ?u32 {
+    if (sites.len == 0) {
+        sites = mapSlice(Site, max_sites) orelse return null;
+    }
+    // The last slot is kept out of the probing
+    const slots = max_sites - 1;
+    const key = address ^ @as(usize, @intCast(@intFromEnum(phase)));
+    var index: u32 = @intCast(hash(key) % slots);
+    var probes: usize = 0;
+    while (probes < max_sites / 2) : (probes += 1) {
+        const site = &sites[index];
+        if (site.allocations == 0) {
+            site.* = .{ .address = address, .phase = phase, .allocations = 0, .total_bytes = 0, .live_bytes = 0, .peak_bytes = 0 };
+            site_count += 1;
+            return index;
+        }
+        if (site.address == address and site.phase == phase) return index;
+        index = (index + 1) % slots;
+    }
+    const overflow = &sites[max_sites - 1];
+    if (overflow.allocations == 0) overflow.* = .{ .address = 0, .phase = phase, .allocations = 0, .total_bytes = 0, .live_bytes = 0, .peak_bytes = 0 };
+    return max_sites - 1;
+}
+
+/// Adds a block to the open addressing table, doubling it at half full
+fn insertBlock(block: Block) bool {
+    if ((block_count + 1) * 2 > blocks.len) {
+        const grown = mapSlice(Block, @max(initial_blocks, blocks.len * 2)) orelse return false;
+        const old = blocks;
+        blocks = grown;
+        block_count = 0;
+        for (old) |entry| {
+            if (entry.address != 0) putBlock(entry);
+        }
+        if (old.len > 0) posix.munmap(@alignCast(std.mem.sliceAsBytes(old)));
+    }
+    putBlock(block);
+    return true;
+}
+
+fn putBlock(block: Block) void {
+    const mask = blocks.len - 1;
+    var index = hash(block.address) & mask;
+    while (blocks[index].address != 0 and blocks[index].address != block.address) index = (index + 1) & mask;
+    if (blocks[index].address == 0) block_count += 1;
+    blocks[index] = block;
+}
+
+/// Removes a block, shifting back the entries after it so that lookups
+/// never need tombstones
+fn removeBlock(address: usize) ?Block {
+    if (blocks.len == 0) return null;
+    const mask = blocks.len - 1;
+    var index = hash(address) & mask;
+    while (blocks[index].address != address) {
+        if (blocks[index].address == 0) return null;
+        index = (index + 1) & mask;
+    }
+    const removed = blocks[index];
+    block_count -= 1;
+
+    var hole = index;
+    var next = (index + 1) & mask;
+    while (blocks[next].address != 0) : (next = (next + 1) & mask) {
+        const home = hash(blocks[next].address) & mask;
+        // Move the entry into the hole unless its home lies after the hole
+        if (((next -% home) & mask) >= ((next -% hole) & mask)) {
+            blocks[hole] = blocks[next];
+            hole = next;
+        }
+    }
+    blocks[hole].address = 0;
+    return removed;
+}
+
+fn hash(key: usize) usize {
+    return @truncate(std.hash.int(@as(u64, key)));
+}
+
+fn mapSlice(comptime T: type, count: usize) ?[]T {
+    const bytes = posix.mmap(
+        null,
+        count * @sizeOf(T),
+        posix.PROT.READ | posix.PROT.WRITE,
+        .{ .TYPE = .PRIVATE, .ANONYMOUS = true },
+        -1,
+        0,
+    ) catch return null;
+    // Anonymous mappings are zeroed, so every slot starts free
+    return @as([*]T, @ptrCast(@alignCast(bytes.ptr)))[0..count];
+}
+
+export const zxw_profile_fini linksection(".fini_array") = &report;
+
+/// Writes the report when the program exits
+fn report() callconv(.c) void {
+    mutex.lock();
+    defer mutex.unlock();
+
+    var fd: posix.fd_t = posix.STDERR_FILENO;
+    if (posix.getenv("ZXW_PROFILE_OUT")) |path| {
+        fd = posix.open(path, .{ .ACCMODE = .WRONLY, .CREAT = true, .TRUNC = true, .CLOEXEC = true }, 0o644) catch return;
+    }
+    defer if (fd != posix.STDERR_FILENO) posix.close(fd);
+
+    const file = std.fs.File{ .handle = fd };
+    var buffered = std.io.bufferedWriter(file.writer());
+    writeReport(buffered.writer()) catch return;
+    buffered.flush() catch return;
+}
+
+fn writeReport(writer: anytype) !void {
+    var total_bytes: u64 = 0;
+    var allocations: u64 = 0;
+    for (phases.values) |counts| {
+        total_bytes += counts.total_bytes;
+        allocations += counts.allocations;
+    }
+
+    var executable_buffer: [std.fs.max_path_bytes]u8 = undefined;
+    const executable = std.fs.selfExePath(&executable_buffer) catch "";
+
+    var json = std.json.writeStream(writer, .{});
+    try json.beginObject();
+    try json.objectField("program");
+    try json.write(executable);
+    try json.objectField("peak_bytes");
+    try json.write(peak_bytes);
+    try json.objectField("live_bytes");
+    try json.write(live_bytes);
+    try json.objectField("total_bytes");
+    try json.write(total_bytes);
+    try json.objectField("allocations");
+    try json.write(allocations);
+
+    try json.objectField("phases");
+    try json.beginObject();
+    for (std.enums.values(Phase)) |each| {
+        try json.objectField(@tagName(each));
+        try json.write(phases.get(each));
+    }
+    try json.endObject();
+
+    // Addresses are reported as offsets into the file mapped there, which
+    // the harness turns into function names with addr2line
+    try json.objectField("sites");
+    try json.beginArray();
+    for (sites) |site| {
+        if (site.allocations == 0) continue;
+        try json.beginObject();
+        var info: DlInfo = undefined;
+        if (site.address != 0 and dladdr(@ptrFromInt(site.address), &info) != 0 and info.fname != null) {
+            try json.objectField("module");
+            try json.write(std.mem.span(info.fname.?));
+            try json.objectField("offset");
+            try json.write(site.address - @intFromPtr(info.fbase));
+        }
+        try json.objectField("address");
+        try json.write(site.address);
+        try json.objectField("phase");
+        try json.write(@tagName(site.phase));
+        inline for (.{ "allocations", "total_bytes", "live_bytes", "peak_bytes" }) |field| {
+            try json.objectField(field);
+            try json.write(@field(site, field));
+        }
+        try json.endObject();
+    }
+    try json.endArray();
+    try json.endObject();
+    try writer.writeByte('\n');
+}
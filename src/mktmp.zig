@@ -5,12 +5,54 @@ const builtin = @import("builtin");
 const crypto = std.crypto;
 const mem = std.mem;
 const process = std.process;
+const statvfs = if (builtin.os.tag == .linux) @cImport(@cInclude("sys/statvfs.h")) else struct {};
+
+/// Limits how many bytes anonymous temporary files keep in memory.
+/// One budget can be shared by any number of files. A file whose write
+/// would exceed the limit moves its contents to disk.
+pub const MemoryBudget = struct {
+    limit: usize,
+    used: std.atomic.Value(usize),
+
+    pub fn init(limit: usize) MemoryBudget {
+        return .{
+            .limit = limit,
+            .used = std.atomic.Value(usize).init(0),
+        };
+    }
+
+    /// Reserves bytes, returns false if that would exceed the limit
+    pub fn reserve(self: *MemoryBudget, bytes: usize) bool {
+        var used = self.used.load(.monotonic);
+        while (true) {
+            if (bytes > self.limit - used) return false;
+            used = self.used.cmpxchgWeak(
+                used,
+                used + bytes,
+                .monotonic,
+                .monotonic,
+            ) orelse return true;
+        }
+    }
+
+    /// Returns bytes reserved earlier
+    pub fn release(self: *MemoryBudget, bytes: usize) void {
+        _ = self.used.fetchSub(bytes, .monotonic);
+    }
+};
 
 /// A temporary file that automatically handles cleanup
 pub const TmpFile = struct {
     file: fs.File,
     path: []const u8,
     allocator: mem.Allocator,
+    /// The file has no directory entry, path refers to its descriptor
+    anonymous: bool = false,
+    /// Budget charged while the file is in memory, null when unlimited
+    budget: ?*MemoryBudget = null,
+    /// Bytes reserved from the budget, 0 once the file is on disk
+    reserved: usize = 0,
+    in_memory: bool = false,
 
     /// Creates a new temporary file with the given prefix
     pub fn create(
@@ -25,11 +67,72 @@ pub const TmpFile = struct {
         };
     }
 
+    /// Creates an anonymous temporary file that is already unlinked.
+    /// On Linux the file starts in memory (memfd_create) and moves to an
+    /// O_TMPFILE file on disk when a write through write() would exceed
+    /// the budget; a null budget keeps it in memory. path is a
+    /// /proc/self/fd link that C code can open while the file is alive,
+    /// and it changes when the file moves to disk. Other platforms get a
+    /// regular temporary file from create().
+    pub fn createAnonymous(
+        allocator: mem.Allocator,
+        prefix: []const u8,
+        budget: ?*MemoryBudget,
+    ) !TmpFile {
+        if (builtin.os.tag != .linux) return create(allocator, prefix);
+
+        var in_memory = true;
+        const file = if (std.posix.memfd_create(prefix, std.os.linux.MFD.CLOEXEC)) |fd|
+            fs.File{ .handle = fd }
+        else |_| blk: {
+            in_memory = false;
+            break :blk try openAnonymousDisk(allocator);
+        };
+        errdefer file.close();
+
+        return TmpFile{
+            .file = file,
+            .path = try fdPath(allocator, file),
+            .allocator = allocator,
+            .anonymous = true,
+            .budget = budget,
+            .in_memory = in_memory,
+        };
+    }
+
     /// Writes data to the temporary file
     pub fn write(self: *TmpFile, data: []const u8) !void {
+        if (self.in_memory) {
+            if (self.budget) |budget| {
+                if (budget.reserve(data.len)) {
+                    self.reserved += data.len;
+                } else {
+                    try self.spill();
+                }
+            }
+        }
         try self.file.writeAll(data);
     }
 
+    /// Moves an in-memory file to an anonymous file on disk
+    fn spill(self: *TmpFile) !void {
+        const disk = try openAnonymousDisk(self.allocator);
+        errdefer disk.close();
+
+        const size = try self.file.getEndPos();
+        _ = try self.file.copyRangeAll(0, disk, 0, size);
+        try disk.seekTo(try self.file.getPos());
+        const path = try fdPath(self.allocator, disk);
+
+        self.file.close();
+        self.allocator.free(self.path);
+        self.file = disk;
+        self.path = path;
+        self.in_memory = false;
+        if (self.budget) |budget| budget.release(self.reserved);
+        self.reserved = 0;
+    }
+
     /// Reads the entire content of the temporary file
     pub fn readAll(
         self: *TmpFile,
@@ -43,11 +146,94 @@ pub const TmpFile = struct {
     /// Closes the file and deletes it, freeing all resources
     pub fn cleanUp(self: *TmpFile) void {
         self.file.close();
-        fs.deleteFileAbsolute(self.path) catch {};
+        if (!self.anonymous) fs.deleteFileAbsolute(self.path) catch {};
+        if (self.budget) |budget| budget.release(self.reserved);
         self.allocator.free(self.path);
     }
 };
 
+/// Opens an unlinked file in the temporary directory, using O_TMPFILE
+/// where the filesystem supports it
+fn openAnonymousDisk(allocator: mem.Allocator) !fs.File {
+    const tmp_dir_path = try getTmpDir(allocator);
+    defer allocator.free(tmp_dir_path);
+
+    if (builtin.os.tag == .linux) {
+        if (openTmpFile(tmp_dir_path)) |file| return file else |_| {}
+    }
+
+    // Fall back to a named file that is deleted right away
+    const unique_path = try generateUniquePath(
+        allocator,
+        tmp_dir_path,
+        "anon_",
+    );
+    defer allocator.free(unique_path);
+    const file = try fs.createFileAbsolute(
+        unique_path,
+        .{ .read = true, .exclusive = true },
+    );
+    fs.deleteFileAbsolute(unique_path) catch {};
+    return file;
+}
+
+/// Opens a file without a name in dir_path with O_TMPFILE. Linux only
+/// accepts O_TMPFILE together with O_DIRECTORY and fails with EINVAL
+/// otherwise; filesystems without support fail with EOPNOTSUPP.
+fn openTmpFile(dir_path: []const u8) !fs.File {
+    const fd = try std.posix.open(
+        dir_path,
+        .{ .ACCMODE = .RDWR, .TMPFILE = true, .DIRECTORY = true, .CLOEXEC = true },
+        0o600,
+    );
+    return fs.File{ .handle = fd };
+}
+
+/// Returns a path that opens the given file through its descriptor
+fn fdPath(allocator: mem.Allocator, file: fs.File) ![]const u8 {
+    return std.fmt.allocPrint(allocator, "/proc/self/fd/{d}", .{file.handle});
+}
+
+/// Share of the free space of the tmpfs one estimate of ramTmpDir may
+/// take, so a workbook that writes more than estimated still has room
+const ram_tmp_headroom = 2;
+
+/// Returns a memory backed directory for a workbook's tmpdir option, or
+/// null to keep the default. libxlsxwriter creates and unlinks its own
+/// temporary files, so they are put in memory by pointing tmpdir at a
+/// tmpfs. null is returned when estimated_bytes is 0, since the usage is
+/// then unknown, or more than half of the free space of the tmpfs. If a
+/// budget is given, estimated_bytes are reserved from it and must be
+/// released by the caller after workbook_close; null is returned when
+/// they do not fit.
+///
+/// Nothing spills to disk once the directory is chosen: if the workbook
+/// writes more than estimated_bytes, the files stay on the tmpfs, whose
+/// pages count against the memory limit of a container, and a full tmpfs
+/// makes workbook_close fail. Pass an upper bound, such as the size of
+/// the worksheet XML, for large constant_memory exports.
+pub fn ramTmpDir(budget: ?*MemoryBudget, estimated_bytes: usize) ?[:0]const u8 {
+    if (builtin.os.tag != .linux) return null;
+    if (estimated_bytes == 0) return null;
+
+    const shm_dir = "/dev/shm";
+    std.posix.access(shm_dir, std.posix.W_OK) catch return null;
+    const free_bytes = freeSpace(shm_dir) orelse return null;
+    if (estimated_bytes > free_bytes / ram_tmp_headroom) return null;
+    if (budget) |memory_budget| {
+        if (!memory_budget.reserve(estimated_bytes)) return null;
+    }
+    return shm_dir;
+}
+
+/// Bytes an unprivileged process can still write to the file system of
+/// path, or null if it cannot be queried
+fn freeSpace(path: [:0]const u8) ?u64 {
+    var info: statvfs.struct_statvfs = undefined;
+    if (statvfs.statvfs(path, &info) != 0) return null;
+    return @as(u64, info.f_bavail) * info.f_frsize;
+}
+
 /// Creates a unique temporary file with the given prefix.
 /// The file will be created in:
 /// - TMP environment variable path if defined and exists
@@ -214,3 +400,93 @@ test "TmpFile interface" {
         content,
     );
 }
+
+test "anonymous TmpFile spills to disk" {
+    if (builtin.os.tag != .linux) return error.SkipZigTest;
+    const allocator = std.testing.allocator;
+
+    var budget = MemoryBudget.init(16);
+    var tmp = try TmpFile.createAnonymous(allocator, "test_", &budget);
+    defer tmp.cleanUp();
+
+    try tmp.write("0123456789");
+    try std.testing.expect(tmp.in_memory);
+    try std.testing.expectEqual(@as(usize, 10), budget.used.load(.monotonic));
+
+    // Exceeds the budget, so the file moves to disk and frees its reservation
+    try tmp.write("abcdefghij");
+    try std.testing.expect(!tmp.in_memory);
+    try std.testing.expectEqual(@as(usize, 0), budget.used.load(.monotonic));
+
+    var buffer: [100]u8 = undefined;
+    try std.testing.expectEqualStrings(
+        "0123456789abcdefghij",
+        try tmp.readAll(&buffer),
+    );
+
+    // The path can be opened like a regular file
+    const reopened = try fs.openFileAbsolute(tmp.path, .{});
+    defer reopened.close();
+    const bytes_read = try reopened.readAll(&buffer);
+    try std.testing.expectEqualStrings(
+        "0123456789abcdefghij",
+        buffer[0..bytes_read],
+    );
+}
+
+test "anonymous disk files use O_TMPFILE" {
+    if (builtin.os.tag != .linux) return error.SkipZigTest;
+    const allocator = std.testing.allocator;
+
+    const tmp_dir_path = try getTmpDir(allocator);
+    defer allocator.free(tmp_dir_path);
+    // Filesystems without O_TMPFILE support take the fallback
+    const probe = openTmpFile(tmp_dir_path) catch |err| switch (err) {
+        error.FileLocksNotSupported => return error.SkipZigTest,
+        else => return err,
+    };
+    probe.close();
+
+    const file = try openAnonymousDisk(allocator);
+    defer file.close();
+    const path = try fdPath(allocator, file);
+    defer allocator.free(path);
+
+    // The kernel names a file that never had a directory entry
+    // "#<inode> (deleted)", where the fallback keeps its deleted name
+    var buffer: [fs.max_path_bytes]u8 = undefined;
+    const target = try std.posix.readlink(path, &buffer);
+    const suffix = " (deleted)";
+    try std.testing.expect(mem.endsWith(u8, target, suffix));
+    const name = fs.path.basename(target[0 .. target.len - suffix.len]);
+    try std.testing.expect(mem.startsWith(u8, name, "#"));
+
+    var dir = try fs.openDirAbsolute(tmp_dir_path, .{});
+    defer dir.close();
+    try std.testing.expectError(error.FileNotFound, dir.access(name, .{}));
+}
+
+test "ramTmpDir respects the budget" {
+    var budget = MemoryBudget.init(100);
+    if (ramTmpDir(&budget, 60)) |dir| {
+        try std.testing.expect(dirExists(dir));
+        try std.testing.expect(ramTmpDir(&budget, 60) == null);
+        budget.release(60);
+    }
+    try std.testing.expectEqual(@as(usize, 0), budget.used.load(.monotonic));
+}
+
+test "ramTmpDir keeps the disk tmpdir when the estimate does not fit" {
+    var budget = MemoryBudget.init(std.math.maxInt(usize));
+
+    // An unknown usage and one larger than the free space of the tmpfs
+    try std.testing.expect(ramTmpDir(&budget, 0) == null);
+    try std.testing.expect(ramTmpDir(&budget, std.math.maxInt(usize)) == null);
+    if (builtin.os.tag == .linux) {
+        if (freeSpace("/dev/shm")) |free_bytes| {
+            const over = free_bytes / ram_tmp_headroom + 1;
+            try std.testing.expect(ramTmpDir(&budget, @intCast(over)) == null);
+        }
+    }
+    try std.testing.expectEqual(@as(usize, 0), budget.used.load(.monotonic));
+}
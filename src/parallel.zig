@@ -0,0 +1,246 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+const mem = std.mem;
+
+/// Fills one worksheet. Runs on a worker thread, so it may only write to
+/// the worksheet it is given, using formats created before run().
+pub const Producer = struct {
+    context: *anyopaque,
+    fill: *const fn (context: *anyopaque, worksheet: *c.lxw_worksheet) anyerror!void,
+
+    /// Makes a Producer from a pointer to any type with a
+    /// `fill(self, worksheet) !void` method
+    pub fn from(pointer: anytype) Producer {
+        const T = @typeInfo(@TypeOf(pointer)).pointer.child;
+        const wrapper = struct {
+            fn fill(context: *anyopaque, worksheet: *c.lxw_worksheet) anyerror!void {
+                const self: *T = @ptrCast(@alignCast(context));
+                return self.fill(worksheet);
+            }
+        };
+        return .{ .context = pointer, .fill = wrapper.fill };
+    }
+};
+
+pub const Options = struct {
+    tmpdir: ?[:0]const u8 = null,
+    use_zip64: bool = false,
+    /// Maximum number of worker threads, defaults to the CPU count
+    max_threads: ?usize = null,
+};
+
+/// Builds a multi-sheet workbook with each worksheet filled on its own thread.
+///
+/// The workbook is opened in constant_memory mode, so every worksheet
+/// streams its rows into a separate temporary file and worksheets share no
+/// state while being written. Worksheets and formats are added on the
+/// calling thread as with workbook_add_worksheet and workbook_add_format,
+/// run() fills all worksheets in parallel, and close() assembles the file
+/// on a single writer.
+///
+/// Producers must write rows in order, as constant_memory mode requires,
+/// and must not add formats, images, charts or other workbook level objects.
+/// A builder that is never closed, such as after a failed run(), frees its
+/// workbook in deinit() without writing the file.
+pub const ParallelBuilder = struct {
+    allocator: mem.Allocator,
+    workbook: *c.lxw_workbook,
+    /// Set by close(), after which the workbook is freed
+    closed: bool,
+    jobs: std.ArrayListUnmanaged(Job),
+    formats: std.ArrayListUnmanaged(*c.lxw_format),
+    max_threads: usize,
+
+    const Job = struct {
+        worksheet: *c.lxw_worksheet,
+        producer: Producer,
+        err: ?anyerror = null,
+    };
+
+    pub fn init(allocator: mem.Allocator, filename: [:0]const u8, options: Options) !ParallelBuilder {
+        var workbook_options = c.lxw_workbook_options{
+            .constant_memory = c.LXW_TRUE,
+            .tmpdir = if (options.tmpdir) |tmpdir| @constCast(tmpdir.ptr) else null,
+            .use_zip64 = if (options.use_zip64) c.LXW_TRUE else c.LXW_FALSE,
+            .output_buffer = null,
+            .output_buffer_size = null,
+        };
+        const workbook: *c.lxw_workbook = c.workbook_new_opt(filename.ptr, &workbook_options) orelse
+            return XlsxError.IoError;
+
+        return .{
+            .allocator = allocator,
+            .workbook = workbook,
+            .closed = false,
+            .jobs = .{},
+            .formats = .{},
+            .max_threads = options.max_threads orelse std.Thread.getCpuCount() catch 1,
+        };
+    }
+
+    pub fn deinit(self: *ParallelBuilder) void {
+        if (!self.closed) c.lxw_workbook_free(self.workbook);
+        self.jobs.deinit(self.allocator);
+        self.formats.deinit(self.allocator);
+    }
+
+    /// Adds a worksheet that will be filled by producer during run()
+    pub fn addWorksheet(self: *ParallelBuilder, name: ?[:0]const u8, producer: Producer) !*c.lxw_worksheet {
+        const worksheet: *c.lxw_worksheet = c.workbook_add_worksheet(
+            self.workbook,
+            if (name) |sheet_name| sheet_name.ptr else null,
+        ) orelse return XlsxError.ParameterValidationError;
+        try self.jobs.append(self.allocator, .{ .worksheet = worksheet, .producer = producer });
+        return worksheet;
+    }
+
+    /// Adds a format that producers may use
+    pub fn addFormat(self: *ParallelBuilder) !*c.lxw_format {
+        const format: *c.lxw_format = c.workbook_add_format(self.workbook) orelse
+            return XlsxError.MemoryMallocFailed;
+        try self.registerFormat(format);
+        return format;
+    }
+
+    /// Registers a format created elsewhere, such as by a FormatCache on
+    /// this workbook, so producers may use it
+    pub fn registerFormat(self: *ParallelBuilder, format: *c.lxw_format) !void {
+        try self.formats.append(self.allocator, format);
+    }
+
+    /// Fills all worksheets in parallel and returns the first producer error
+    pub fn run(self: *ParallelBuilder) !void {
+        // Writing a cell assigns the format its XF index through a table
+        // shared by the whole workbook. Assigning all indexes here leaves
+        // the workers with nothing shared to update.
+        for (self.formats.items) |format| {
+            _ = c.lxw_format_get_xf_index(format);
+        }
+
+        var next = std.atomic.Value(usize).init(0);
+        const thread_count = @min(self.max_threads, self.jobs.items.len);
+        if (thread_count <= 1) {
+            worker(self.jobs.items, &next);
+        } else {
+            const threads = try self.allocator.alloc(std.Thread, thread_count - 1);
+            defer self.allocator.free(threads);
+
+            var spawned: usize = 0;
+            defer for (threads[0..spawned]) |thread| thread.join();
+            for (threads) |*thread| {
+                thread.* = std.Thread.spawn(.{}, worker, .{ self.jobs.items, &next }) catch break;
+                spawned += 1;
+            }
+            worker(self.jobs.items, &next);
+        }
+
+        for (self.jobs.items) |job| {
+            if (job.err) |err| return err;
+        }
+    }
+
+    /// Assembles and writes the workbook, freeing it
+    pub fn close(self: *ParallelBuilder) XlsxError!void {
+        // workbook_close frees the workbook even when writing fails
+        self.closed = true;
+        return bulk.check(c.workbook_close(self.workbook));
+    }
+
+    fn worker(jobs: []Job, next: *std.atomic.Value(usize)) void {
+        while (true) {
+            const index = next.fetchAdd(1, .monotonic);
+            if (index >= jobs.len) return;
+            const job = &jobs[index];
+            job.producer.fill(job.producer.context, job.worksheet) catch |err| {
+                job.err = err;
+            };
+        }
+    }
+};
+
+const TestSheet = struct {
+    rows: u32,
+    format: *c.lxw_format,
+
+    fn fill(self: *TestSheet, worksheet: *c.lxw_worksheet) !void {
+        var row: u32 = 0;
+        while (row < self.rows) : (row += 1) {
+            try bulk.writeRow(worksheet, row, 0, &[_]f64{ 1, 2, 3 }, self.format);
+        }
+    }
+};
+
+const FailingSheet = struct {
+    fn fill(_: *FailingSheet, worksheet: *c.lxw_worksheet) !void {
+        try bulk.writeRow(worksheet, 0, c.LXW_COL_MAX, &[_]f64{1}, null);
+    }
+};
+
+test "ParallelBuilder fills worksheets" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "parallel.xlsx" });
+    defer allocator.free(path);
+
+    var builder = try ParallelBuilder.init(allocator, path, .{ .max_threads = 4 });
+    defer builder.deinit();
+
+    const bold = try builder.addFormat();
+    c.format_set_bold(bold);
+
+    var sheets: [8]TestSheet = undefined;
+    for (&sheets) |*sheet| {
+        sheet.* = .{ .rows = 100, .format = bold };
+        _ = try builder.addWorksheet(null, Producer.from(sheet));
+    }
+
+    try builder.run();
+    try builder.close();
+}
+
+test "ParallelBuilder returns producer errors" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "parallel_error.xlsx" });
+    defer allocator.free(path);
+
+    var builder = try ParallelBuilder.init(allocator, path, .{});
+    defer builder.deinit();
+
+    var failing = FailingSheet{};
+    _ = try builder.addWorksheet("Failing", Producer.from(&failing));
+
+    try std.testing.expectError(error.RowColumnLimitError, builder.run());
+    try builder.close();
+}
+
+test "ParallelBuilder frees a workbook that is not closed" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "parallel_abandoned.xlsx" });
+    defer allocator.free(path);
+
+    {
+        var builder = try ParallelBuilder.init(allocator, path, .{});
+        defer builder.deinit();
+
+        var failing = FailingSheet{};
+        _ = try builder.addWorksheet("Failing", Producer.from(&failing));
+        try std.testing.expectError(error.RowColumnLimitError, builder.run());
+    }
+    try std.testing.expectError(error.FileNotFound, tmp_dir.dir.access("parallel_abandoned.xlsx", .{}));
+}
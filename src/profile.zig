@@ -0,0 +1,299 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const mem = std.mem;
+const Allocator = mem.Allocator;
+
+/// Phases of writing a workbook. libxlsxwriter writes the sheet XML,
+/// styles and zip container in one workbook_close call, so close covers
+/// all of them.
+pub const Phase = enum(c_int) { write, close };
+
+/// Function exported by the malloc hook library built with
+/// `zig build profile`, which counts the C allocations when preloaded
+const hook_phase_symbol = "zxw_profile_phase";
+
+var current_phase = std.atomic.Value(Phase).init(.write);
+
+/// Starts a phase for every CountingAllocator and, when the program runs
+/// with the malloc hook preloaded, for the C allocations as well
+pub fn setPhase(phase: Phase) void {
+    current_phase.store(phase, .monotonic);
+    if (comptime !builtin.link_libc or builtin.os.tag != .linux) return;
+    if (std.c.dlsym(null, hook_phase_symbol)) |symbol| {
+        const setHookPhase: *const fn (c_int) callconv(.c) void = @ptrCast(@alignCast(symbol));
+        setHookPhase(@intFromEnum(phase));
+    }
+}
+
+pub fn currentPhase() Phase {
+    return current_phase.load(.monotonic);
+}
+
+/// Counters of one phase. peak_bytes is the most memory live at once
+/// while the phase was current.
+pub const Counts = struct {
+    allocations: u64 = 0,
+    total_bytes: u64 = 0,
+    peak_bytes: u64 = 0,
+};
+
+/// Allocations made from one return address in one phase. Memory grown
+/// in place or remapped stays with the site that allocated it.
+pub const Site = struct {
+    address: usize,
+    phase: Phase,
+    allocations: u64 = 0,
+    total_bytes: u64 = 0,
+    live_bytes: u64 = 0,
+    peak_bytes: u64 = 0,
+};
+
+const SiteKey = struct {
+    address: usize,
+    phase: Phase,
+};
+
+/// Wraps an allocator and counts the bytes allocated through it: live,
+/// peak and total bytes overall, by phase and by call site.
+///
+/// This covers the Zig side of a program, the C allocations of
+/// libxlsxwriter are counted by the malloc hook library. Bookkeeping is
+/// done under a mutex, so one CountingAllocator can be shared by threads.
+pub const CountingAllocator = struct {
+    child: Allocator,
+    mutex: std.Thread.Mutex = .{},
+    live_bytes: u64 = 0,
+    peak_bytes: u64 = 0,
+    phases: std.EnumArray(Phase, Counts) = std.EnumArray(Phase, Counts).initFill(.{}),
+    sites: std.AutoArrayHashMapUnmanaged(SiteKey, Site) = .{},
+    /// Site of every live block, by address
+    blocks: std.AutoHashMapUnmanaged(usize, SiteKey) = .{},
+
+    pub fn init(child: Allocator) CountingAllocator {
+        return .{ .child = child };
+    }
+
+    pub fn deinit(self: *CountingAllocator) void {
+        self.sites.deinit(self.child);
+        self.blocks.deinit(self.child);
+    }
+
+    pub fn allocator(self: *CountingAllocator) Allocator {
+        return .{
+            .ptr = self,
+            .vtable = &.{
+                .alloc = alloc,
+                .resize = resize,
+                .remap = remap,
+                .free = free,
+            },
+        };
+    }
+
+    pub fn totalBytes(self: *const CountingAllocator) u64 {
+        var total: u64 = 0;
+        for (self.phases.values) |counts| total += counts.total_bytes;
+        return total;
+    }
+
+    pub fn allocations(self: *const CountingAllocator) u64 {
+        var total: u64 = 0;
+        for (self.phases.values) |counts| total += counts.allocations;
+        return total;
+    }
+
+    fn alloc(context: *anyopaque, len: usize, alignment: mem.Alignment, ret_addr: usize) ?[*]u8 {
+        const self: *CountingAllocator = @ptrCast(@alignCast(context));
+        const ptr = self.child.rawAlloc(len, alignment, ret_addr) orelse return null;
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.allocated(@intFromPtr(ptr), len, ret_addr);
+        return ptr;
+    }
+
+    fn resize(context: *anyopaque, memory: []u8, alignment: mem.Alignment, new_len: usize, ret_addr: usize) bool {
+        const self: *CountingAllocator = @ptrCast(@alignCast(context));
+        if (!self.child.rawResize(memory, alignment, new_len, ret_addr)) return false;
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.resized(@intFromPtr(memory.ptr), memory.len, @intFromPtr(memory.ptr), new_len);
+        return true;
+    }
+
+    fn remap(context: *anyopaque, memory: []u8, alignment: mem.Alignment, new_len: usize, ret_addr: usize) ?[*]u8 {
+        const self: *CountingAllocator = @ptrCast(@alignCast(context));
+        const ptr = self.child.rawRemap(memory, alignment, new_len, ret_addr) orelse return null;
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.resized(@intFromPtr(memory.ptr), memory.len, @intFromPtr(ptr), new_len);
+        return ptr;
+    }
+
+    fn free(context: *anyopaque, memory: []u8, alignment: mem.Alignment, ret_addr: usize) void {
+        const self: *CountingAllocator = @ptrCast(@alignCast(context));
+        self.child.rawFree(memory, alignment, ret_addr);
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.live_bytes -= memory.len;
+        const removed = self.blocks.fetchRemove(@intFromPtr(memory.ptr)) orelse return;
+        if (self.sites.getPtr(removed.value)) |site| site.live_bytes -= memory.len;
+    }
+
+    fn allocated(self: *CountingAllocator, address: usize, len: usize, ret_addr: usize) void {
+        const phase = currentPhase();
+        const counts = self.phases.getPtr(phase);
+        counts.allocations += 1;
+        counts.total_bytes += len;
+        self.grow(phase, len);
+
+        // Losing the site of a block only loses detail, so running out of
+        // memory for the bookkeeping does not fail the allocation
+        const key = SiteKey{ .address = ret_addr, .phase = phase };
+        const entry = self.sites.getOrPut(self.child, key) catch return;
+        if (!entry.found_existing) entry.value_ptr.* = .{ .address = ret_addr, .phase = phase };
+        const site = entry.value_ptr;
+        site.allocations += 1;
+        site.total_bytes += len;
+        site.live_bytes += len;
+        site.peak_bytes = @max(site.peak_bytes, site.live_bytes);
+        self.blocks.put(self.child, address, key) catch {
+            site.live_bytes -= len;
+        };
+    }
+
+    fn resized(self: *CountingAllocator, old_address: usize, old_len: usize, new_address: usize, new_len: usize) void {
+        const phase = currentPhase();
+        self.live_bytes -= old_len;
+        self.grow(phase, new_len);
+        if (new_len > old_len) self.phases.getPtr(phase).total_bytes += new_len - old_len;
+
+        const key = (self.blocks.fetchRemove(old_address) orelse return).value;
+        const site = self.sites.getPtr(key) orelse return;
+        site.live_bytes = site.live_bytes - old_len + new_len;
+        site.peak_bytes = @max(site.peak_bytes, site.live_bytes);
+        if (new_len > old_len) site.total_bytes += new_len - old_len;
+        self.blocks.put(self.child, new_address, key) catch {
+            site.live_bytes -= new_len;
+        };
+    }
+
+    fn grow(self: *CountingAllocator, phase: Phase, len: usize) void {
+        self.live_bytes += len;
+        self.peak_bytes = @max(self.peak_bytes, self.live_bytes);
+        const counts = self.phases.getPtr(phase);
+        counts.peak_bytes = @max(counts.peak_bytes, self.live_bytes);
+    }
+
+    /// Writes the counters as JSON, with the sites largest peak first and
+    /// named after their function and source line where debug info allows
+    pub fn writeJson(self: *CountingAllocator, writer: anytype, options: std.json.StringifyOptions) !void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        var json = std.json.writeStream(writer, options);
+        defer json.deinit();
+
+        try json.beginObject();
+        try json.objectField("peak_bytes");
+        try json.write(self.peak_bytes);
+        try json.objectField("live_bytes");
+        try json.write(self.live_bytes);
+        try json.objectField("total_bytes");
+        try json.write(self.totalBytes());
+        try json.objectField("allocations");
+        try json.write(self.allocations());
+
+        try json.objectField("phases");
+        try json.beginObject();
+        for (std.enums.values(Phase)) |phase| {
+            try json.objectField(@tagName(phase));
+            try json.write(self.phases.get(phase));
+        }
+        try json.endObject();
+
+        const sites = try self.child.dupe(Site, self.sites.values());
+        defer self.child.free(sites);
+        mem.sort(Site, sites, {}, struct {
+            fn greater(_: void, a: Site, b: Site) bool {
+                return a.peak_bytes > b.peak_bytes;
+            }
+        }.greater);
+
+        const debug_info = std.debug.getSelfDebugInfo() catch null;
+        try json.objectField("sites");
+        try json.beginArray();
+        for (sites) |site| {
+            try json.beginObject();
+            try json.objectField("address");
+            try json.print("\"0x{x}\"", .{site.address});
+            try json.objectField("phase");
+            try json.write(@tagName(site.phase));
+            if (debug_info) |info| try writeSymbol(&json, info, site.address);
+            inline for (.{ "allocations", "total_bytes", "live_bytes", "peak_bytes" }) |field| {
+                try json.objectField(field);
+                try json.write(@field(site, field));
+            }
+            try json.endObject();
+        }
+        try json.endArray();
+        try json.endObject();
+    }
+};
+
+/// Writes the function and source line of a return address, if known
+fn writeSymbol(json: anytype, debug_info: *std.debug.SelfInfo, address: usize) !void {
+    // The return address is past the call, step back into it
+    const call_address = address -| 1;
+    const module = debug_info.getModuleForAddress(call_address) catch return;
+    const symbol = module.getSymbolAtAddress(debug_info.allocator, call_address) catch return;
+    defer if (symbol.source_location) |location| debug_info.allocator.free(location.file_name);
+
+    try json.objectField("function");
+    try json.write(symbol.name);
+    if (symbol.source_location) |location| {
+        try json.objectField("file");
+        try json.write(location.file_name);
+        try json.objectField("line");
+        try json.write(location.line);
+    }
+}
+
+test "CountingAllocator counts by phase and site" {
+    var counting = CountingAllocator.init(std.testing.allocator);
+    defer counting.deinit();
+    const allocator = counting.allocator();
+
+    const first = try allocator.alloc(u8, 100);
+    const second = try allocator.alloc(u8, 50);
+    try std.testing.expectEqual(@as(u64, 150), counting.live_bytes);
+
+    allocator.free(first);
+    setPhase(.close);
+    defer setPhase(.write);
+    const third = try allocator.alloc(u8, 30);
+    const fourth = try allocator.alloc(u8, 10);
+    allocator.free(fourth);
+
+    try std.testing.expectEqual(@as(u64, 80), counting.live_bytes);
+    try std.testing.expectEqual(@as(u64, 150), counting.peak_bytes);
+    try std.testing.expectEqual(@as(u64, 2), counting.phases.get(.write).allocations);
+    try std.testing.expectEqual(@as(u64, 150), counting.phases.get(.write).peak_bytes);
+    try std.testing.expectEqual(@as(u64, 40), counting.phases.get(.close).total_bytes);
+    try std.testing.expectEqual(@as(u64, 90), counting.phases.get(.close).peak_bytes);
+
+    var live: u64 = 0;
+    for (counting.sites.values()) |site| live += site.live_bytes;
+    try std.testing.expectEqual(counting.live_bytes, live);
+
+    allocator.free(second);
+    allocator.free(third);
+    try std.testing.expectEqual(@as(u64, 0), counting.live_bytes);
+
+    var json = std.ArrayList(u8).init(std.testing.allocator);
+    defer json.deinit();
+    try counting.writeJson(json.writer(), .{});
+    const parsed = try std.json.parseFromSlice(std.json.Value, std.testing.allocator, json.items, .{});
+    defer parsed.deinit();
+    try std.testing.expectEqual(@as(i64, 150), parsed.value.object.get("peak_bytes").?.integer);
+    try std.testing.expect(parsed.value.object.get("sites").?.array.items.len > 0);
+}
@@ -0,0 +1,574 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+const mktmp = @import("mktmp");
+const XlsxError = @import("errors.zig").XlsxError;
+const mem = std.mem;
+
+pub const Options = struct {
+    /// Bytes of staged cells kept in memory. Beyond that the cells are
+    /// sorted and spilled to a temporary file as one run.
+    memory_budget: usize = 64 * 1024 * 1024,
+    /// Budget for keeping spilled runs in anonymous in-memory files before
+    /// they move to disk, null writes them to disk right away
+    tmp_budget: ?*mktmp.MemoryBudget = null,
+};
+
+const Kind = std.meta.Tag(bulk.Cell);
+
+/// One staged cell, stored column by column in a MultiArrayList
+const Entry = struct {
+    /// row << 16 | col, so that ordering keys orders cells by row, then column
+    key: u64,
+    kind: Kind,
+    /// Index into formats plus one, 0 for no format
+    format: u16,
+    /// Bits of a number, 0 or 1 for a boolean, or the offset of a string,
+    /// formula or datetime in bytes
+    value: u64,
+};
+
+/// Memory of one staged cell besides its string bytes
+const cell_bytes = @sizeOf(u64) * 2 + @sizeOf(u16) + @sizeOf(Kind);
+
+/// A sorted run of cells spilled to a temporary file, read back through a
+/// read-only mapping while the runs are merged
+const Run = struct {
+    tmp_file: mktmp.TmpFile,
+    data: []const u8,
+    /// Offset of the next record
+    pos: usize = 0,
+
+    fn peekKey(self: *const Run) ?u64 {
+        if (self.pos == self.data.len) return null;
+        return mem.readInt(u64, self.data[self.pos..][0..8], .little);
+    }
+
+    fn next(self: *Run) Record {
+        const record = decodeRecord(self.data, self.pos);
+        self.pos = record.end;
+        return record;
+    }
+};
+
+const Record = struct {
+    key: u64,
+    format: u16,
+    cell: bulk.Cell,
+    end: usize,
+};
+
+/// Stages cell writes for one worksheet in any order and writes them in
+/// row order, as constant_memory mode requires.
+///
+/// Cells are kept in compact columns and strings are copied, so the
+/// caller's buffers can be reused right after write(). When the staged
+/// cells exceed the memory budget they are sorted and spilled to a
+/// temporary file. flush() merges the spilled runs and the cells in memory
+/// into the worksheet; flushUntil() writes only the rows before a given
+/// row, for exports that fill a block of rows column by column. Writing a
+/// cell twice keeps the last value.
+///
+/// Rows that were flushed are closed: writing to them again returns
+/// RowColumnOrderError. flush() must be called before workbook_close.
+pub const Staging = struct {
+    allocator: mem.Allocator,
+    worksheet: *c.lxw_worksheet,
+    options: Options,
+    cells: std.MultiArrayList(Entry) = .{},
+    /// NUL terminated strings and formulas and datetimes of the staged cells
+    bytes: std.ArrayListUnmanaged(u8) = .{},
+    formats: std.ArrayListUnmanaged(*c.lxw_format) = .{},
+    format_indices: std.AutoHashMapUnmanaged(*c.lxw_format, u16) = .{},
+    /// Spilled runs, oldest first
+    runs: std.ArrayListUnmanaged(Run) = .{},
+    /// Rows before this one have been written to the worksheet
+    next_row: c.lxw_row_t = 0,
+
+    pub fn init(allocator: mem.Allocator, worksheet: *c.lxw_worksheet, options: Options) Staging {
+        return .{
+            .allocator = allocator,
+            .worksheet = worksheet,
+            .options = options,
+        };
+    }
+
+    /// Frees the staged cells without writing them
+    pub fn deinit(self: *Staging) void {
+        for (self.runs.items) |*run| closeRun(self.allocator, run);
+        self.runs.deinit(self.allocator);
+        self.cells.deinit(self.allocator);
+        self.bytes.deinit(self.allocator);
+        self.formats.deinit(self.allocator);
+        self.format_indices.deinit(self.allocator);
+    }
+
+    /// Stages one value. Numbers of any int or float type, bools,
+    /// sentinel terminated strings, bulk.Cell values and optionals of those
+    /// are accepted; null optionals are skipped.
+    pub fn write(
+        self: *Staging,
+        row: c.lxw_row_t,
+        col: c.lxw_col_t,
+        value: anytype,
+        format: ?*c.lxw_format,
+    ) !void {
+        const cell = toCell(value) orelse return;
+        if (row >= c.LXW_ROW_MAX or col >= c.LXW_COL_MAX) return error.RowColumnLimitError;
+        if (row < self.next_row) return error.RowColumnOrderError;
+
+        const format_index = try self.formatIndex(format);
+        const payload: u64 = switch (cell) {
+            .number => |number| @bitCast(number),
+            .boolean => |boolean| @intFromBool(boolean),
+            .string, .formula => |string| blk: {
+                const offset = self.bytes.items.len;
+                try self.bytes.ensureUnusedCapacity(self.allocator, string.len + 1);
+                self.bytes.appendSliceAssumeCapacity(string);
+                self.bytes.appendAssumeCapacity(0);
+                break :blk offset;
+            },
+            .datetime => |datetime| blk: {
+                const offset = self.bytes.items.len;
+                try self.bytes.appendSlice(self.allocator, mem.asBytes(&datetime));
+                break :blk offset;
+            },
+            .blank => 0,
+        };
+        try self.cells.append(self.allocator, .{
+            .key = cellKey(row, col),
+            .kind = cell,
+            .format = format_index,
+            .value = payload,
+        });
+
+        if (self.stagedBytes() > self.options.memory_budget) try self.spill();
+    }
+
+    /// Writes a slice of values to consecutive rows of one column
+    pub fn writeColumn(
+        self: *Staging,
+        first_row: c.lxw_row_t,
+        col: c.lxw_col_t,
+        values: anytype,
+        format: ?*c.lxw_format,
+    ) !void {
+        if (values.len > 0 and first_row + values.len > c.LXW_ROW_MAX) return error.RowColumnLimitError;
+        for (values, first_row..) |value, row| {
+            try self.write(@intCast(row), col, value, format);
+        }
+    }
+
+    /// Bytes of staged cells in memory, compared against the budget
+    pub fn stagedBytes(self: *const Staging) usize {
+        return self.cells.len * cell_bytes + self.bytes.items.len;
+    }
+
+    /// Writes every staged cell to the worksheet in row order
+    pub fn flush(self: *Staging) !void {
+        try self.flushUntil(c.LXW_ROW_MAX);
+    }
+
+    /// Writes the staged cells of the rows before end_row to the worksheet
+    /// in row order. Those rows cannot be written again. After an error
+    /// the worksheet may hold part of the rows and the staged cells should
+    /// only be freed.
+    pub fn flushUntil(self: *Staging, end_row: c.lxw_row_t) !void {
+        var sink = WorksheetSink{ .worksheet = self.worksheet };
+        try self.drain(end_row, &sink);
+    }
+
+    /// Merges the runs and the cells in memory before end_row into sink,
+    /// which has a `put(row, col, cell, format) !void` method
+    fn drain(self: *Staging, end_row: c.lxw_row_t, sink: anytype) !void {
+        if (end_row <= self.next_row) return;
+        const end_key = cellKey(end_row, 0);
+        const indices = try self.allocator.alloc(u32, self.cells.len);
+        defer self.allocator.free(indices);
+        const order = self.sortedOrder(indices);
+
+        const Head = struct {
+            key: u64,
+            source: usize,
+
+            fn compare(_: void, a: @This(), b: @This()) std.math.Order {
+                return std.math.order(a.key, b.key).differ() orelse std.math.order(a.source, b.source);
+            }
+        };
+        // Sources are the runs oldest first and then the cells in memory,
+        // so of equal keys the newest comes out of the queue last
+        const memory_source = self.runs.items.len;
+        var queue = std.PriorityQueue(Head, void, Head.compare).init(self.allocator, {});
+        defer queue.deinit();
+        try queue.ensureTotalCapacity(memory_source + 1);
+        for (self.runs.items, 0..) |*run, source| {
+            const key = run.peekKey() orelse continue;
+            if (key < end_key) queue.add(.{ .key = key, .source = source }) catch unreachable;
+        }
+        const keys = self.cells.items(.key);
+        if (order.len > 0 and keys[order[0]] < end_key) queue.add(.{ .key = keys[order[0]], .source = memory_source }) catch unreachable;
+
+        var memory_pos: usize = 0;
+        var last_row: ?c.lxw_row_t = null;
+        while (queue.removeOrNull()) |head| {
+            // A newer write of the same cell is still in the queue
+            const stale = if (queue.peek()) |next| next.key == head.key else false;
+            const row = rowOf(head.key);
+            const next_key = if (head.source == memory_source) blk: {
+                const index = order[memory_pos];
+                if (!stale) try sink.put(row, colOf(head.key), self.cellAt(index), self.formatAt(self.cells.items(.format)[index]));
+                memory_pos += 1;
+                break :blk if (memory_pos < order.len) keys[order[memory_pos]] else null;
+            } else blk: {
+                const run = &self.runs.items[head.source];
+                const record = run.next();
+                if (!stale) try sink.put(row, colOf(head.key), record.cell, self.formatAt(record.format));
+                break :blk run.peekKey();
+            };
+            last_row = row;
+            if (next_key) |key| {
+                if (key < end_key) queue.add(.{ .key = key, .source = head.source }) catch unreachable;
+            }
+        }
+
+        self.keepCells(order[memory_pos..]);
+        var index: usize = 0;
+        while (index < self.runs.items.len) {
+            if (self.runs.items[index].peekKey() == null) {
+                var run = self.runs.orderedRemove(index);
+                closeRun(self.allocator, &run);
+            } else {
+                index += 1;
+            }
+        }
+        if (end_row < c.LXW_ROW_MAX) {
+            self.next_row = end_row;
+        } else if (last_row) |row| {
+            self.next_row = row + 1;
+        }
+    }
+
+    fn formatIndex(self: *Staging, format: ?*c.lxw_format) !u16 {
+        const pointer = format orelse return 0;
+        const entry = try self.format_indices.getOrPut(self.allocator, pointer);
+        if (!entry.found_existing) {
+            if (self.formats.items.len == std.math.maxInt(u16)) {
+                self.format_indices.removeByPtr(entry.key_ptr);
+                return error.ParameterValidationError;
+            }
+            self.formats.append(self.allocator, pointer) catch |err| {
+                self.format_indices.removeByPtr(entry.key_ptr);
+                return err;
+            };
+            entry.value_ptr.* = @intCast(self.formats.items.len);
+        }
+        return entry.value_ptr.*;
+    }
+
+    fn formatAt(self: *const Staging, index: u16) ?*c.lxw_format {
+        return if (index == 0) null else self.formats.items[index - 1];
+    }
+
+    fn cellAt(self: *const Staging, index: usize) bulk.Cell {
+        const value = self.cells.items(.value)[index];
+        return switch (self.cells.items(.kind)[index]) {
+            .number => .{ .number = @bitCast(value) },
+            .boolean => .{ .boolean = value != 0 },
+            .string => .{ .string = self.stringAt(value) },
+            .formula => .{ .formula = self.stringAt(value) },
+            .datetime => .{ .datetime = mem.bytesToValue(c.lxw_datetime, self.bytes.items[value..][0..@sizeOf(c.lxw_datetime)]) },
+            .blank => .blank,
+        };
+    }
+
+    fn stringAt(self: *const Staging, offset: u64) [:0]const u8 {
+        const rest = self.bytes.items[offset..];
+        return rest[0..mem.indexOfScalar(u8, rest, 0).? :0];
+    }
+
+    /// Indices of the cells in memory ordered by row and column, with only
+    /// the last write of each cell. The cells themselves stay in write
+    /// order, which breaks ties between writes of the same cell. order
+    /// holds one index per cell and its used part is returned.
+    fn sortedOrder(self: *Staging, order: []u32) []u32 {
+        for (order, 0..) |*index, position| index.* = @intCast(position);
+
+        const keys = self.cells.items(.key);
+        mem.sortUnstable(u32, order, keys, struct {
+            fn lessThan(sort_keys: []const u64, a: u32, b: u32) bool {
+                return sort_keys[a] < sort_keys[b] or (sort_keys[a] == sort_keys[b] and a < b);
+            }
+        }.lessThan);
+
+        var kept: usize = 0;
+        for (order, 0..) |index, position| {
+            if (position + 1 < order.len and keys[order[position + 1]] == keys[index]) continue;
+            order[kept] = index;
+            kept += 1;
+        }
+        return order[0..kept];
+    }
+
+    /// Keeps only the given cells, moving them and their bytes to the front
+    fn keepCells(self: *Staging, indices: []u32) void {
+        // In write order both the cells and their bytes only move forwards
+        mem.sortUnstable(u32, indices, {}, std.sort.asc(u32));
+        var bytes_len: usize = 0;
+        for (indices, 0..) |index, position| {
+            var entry = self.cells.get(index);
+            const len: usize = switch (entry.kind) {
+                .string, .formula => mem.indexOfScalarPos(u8, self.bytes.items, entry.value, 0).? - entry.value + 1,
+                .datetime => @sizeOf(c.lxw_datetime),
+                else => 0,
+            };
+            if (len > 0) {
+                mem.copyForwards(u8, self.bytes.items[bytes_len..][0..len], self.bytes.items[entry.value..][0..len]);
+                entry.value = bytes_len;
+                bytes_len += len;
+            }
+            self.cells.set(position, entry);
+        }
+        self.cells.shrinkRetainingCapacity(indices.len);
+        self.bytes.shrinkRetainingCapacity(bytes_len);
+    }
+
+    /// Sorts the cells in memory and moves them to a new run
+    fn spill(self: *Staging) !void {
+        const indices = try self.allocator.alloc(u32, self.cells.len);
+        defer self.allocator.free(indices);
+        const order = self.sortedOrder(indices);
+
+        var tmp_file = if (self.options.tmp_budget) |budget|
+            try mktmp.TmpFile.createAnonymous(self.allocator, "xlsx_staging_", budget)
+        else
+            try mktmp.TmpFile.create(self.allocator, "xlsx_staging_");
+        errdefer tmp_file.cleanUp();
+
+        var buffered = std.io.bufferedWriter(TmpFileWriter{ .context = &tmp_file });
+        const writer = buffered.writer();
+        const keys = self.cells.items(.key);
+        const formats = self.cells.items(.format);
+        for (order) |index| {
+            try encodeRecord(writer, keys[index], formats[index], self.cellAt(index));
+        }
+        try buffered.flush();
+
+        const data = try mapRun(self.allocator, tmp_file.file);
+        errdefer unmapRun(self.allocator, data);
+        try self.runs.append(self.allocator, .{ .tmp_file = tmp_file, .data = data });
+
+        self.cells.clearRetainingCapacity();
+        self.bytes.clearRetainingCapacity();
+    }
+};
+
+const WorksheetSink = struct {
+    worksheet: *c.lxw_worksheet,
+
+    fn put(self: *WorksheetSink, row: c.lxw_row_t, col: c.lxw_col_t, cell: bulk.Cell, format: ?*c.lxw_format) XlsxError!void {
+        return bulk.check(bulk.writeCell(self.worksheet, row, col, cell, format));
+    }
+};
+
+fn toCell(value: anytype) ?bulk.Cell {
+    const T = @TypeOf(value);
+    if (T == bulk.Cell) return value;
+    return switch (@typeInfo(T)) {
+        .float, .comptime_float => .{ .number = @floatCast(value) },
+        .int, .comptime_int => .{ .number = @floatFromInt(value) },
+        .bool => .{ .boolean = value },
+        .optional => if (value) |inner| toCell(inner) else null,
+        else => .{ .string = value },
+    };
+}
+
+fn cellKey(row: c.lxw_row_t, col: c.lxw_col_t) u64 {
+    return @as(u64, row) << 16 | col;
+}
+
+fn rowOf(key: u64) c.lxw_row_t {
+    return @intCast(key >> 16);
+}
+
+fn colOf(key: u64) c.lxw_col_t {
+    return @truncate(key);
+}
+
+// A run record is the key, the kind and the format index followed by the
+// value: 8 bytes for a number, 1 for a boolean, the length, bytes and a NUL
+// for a string or formula, and the lxw_datetime as laid out in memory.
+
+fn encodeRecord(writer: anytype, key: u64, format: u16, cell: bulk.Cell) !void {
+    try writer.writeInt(u64, key, .little);
+    try writer.writeByte(@intFromEnum(cell));
+    try writer.writeInt(u16, format, .little);
+    switch (cell) {
+        .number => |number| try writer.writeInt(u64, @bitCast(number), .little),
+        .boolean => |boolean| try writer.writeByte(@intFromBool(boolean)),
+        .string, .formula => |string| {
+            try writer.writeInt(u32, @intCast(string.len), .little);
+            try writer.writeAll(string);
+            try writer.writeByte(0);
+        },
+        .datetime => |datetime| try writer.writeAll(mem.asBytes(&datetime)),
+        .blank => {},
+    }
+}
+
+fn decodeRecord(data: []const u8, start: usize) Record {
+    var pos = start;
+    const key = mem.readInt(u64, data[pos..][0..8], .little);
+    const kind: Kind = @enumFromInt(data[pos + 8]);
+    const format = mem.readInt(u16, data[pos + 9 ..][0..2], .little);
+    pos += 11;
+    const cell: bulk.Cell = switch (kind) {
+        .number => blk: {
+            const bits = mem.readInt(u64, data[pos..][0..8], .little);
+            pos += 8;
+            break :blk .{ .number = @bitCast(bits) };
+        },
+        .boolean => blk: {
+            pos += 1;
+            break :blk .{ .boolean = data[pos - 1] != 0 };
+        },
+        .string, .formula => blk: {
+            const len = mem.readInt(u32, data[pos..][0..4], .little);
+            const string = data[pos + 4 .. pos + 4 + len :0];
+            pos += 4 + len + 1;
+            break :blk if (kind == .string) .{ .string = string } else .{ .formula = string };
+        },
+        .datetime => blk: {
+            const datetime = mem.bytesToValue(c.lxw_datetime, data[pos..][0..@sizeOf(c.lxw_datetime)]);
+            pos += @sizeOf(c.lxw_datetime);
+            break :blk .{ .datetime = datetime };
+        },
+        .blank => .blank,
+    };
+    return .{ .key = key, .format = format, .cell = cell, .end = pos };
+}
+
+const TmpFileWriter = std.io.GenericWriter(*mktmp.TmpFile, anyerror, writeTmpFile);
+
+fn writeTmpFile(tmp_file: *mktmp.TmpFile, bytes: []const u8) anyerror!usize {
+    try tmp_file.write(bytes);
+    return bytes.len;
+}
+
+/// Maps a spilled run read-only, or reads it where mapping is not available
+fn mapRun(allocator: mem.Allocator, file: std.fs.File) ![]const u8 {
+    const size = try file.getEndPos();
+    if (builtin.os.tag == .windows) {
+        try file.seekTo(0);
+        return file.readToEndAlloc(allocator, std.math.maxInt(usize));
+    }
+    const data = try std.posix.mmap(
+        null,
+        size,
+        std.posix.PROT.READ,
+        .{ .TYPE = .PRIVATE },
+        file.handle,
+        0,
+    );
+    // Runs are read front to back once
+    if (builtin.os.tag == .linux) std.posix.madvise(data.ptr, data.len, std.posix.MADV.SEQUENTIAL) catch {};
+    return data;
+}
+
+fn unmapRun(allocator: mem.Allocator, data: []const u8) void {
+    if (builtin.os.tag == .windows) {
+        allocator.free(data);
+    } else {
+        std.posix.munmap(@alignCast(data));
+    }
+}
+
+fn closeRun(allocator: mem.Allocator, run: *Run) void {
+    unmapRun(allocator, run.data);
+    run.tmp_file.cleanUp();
+}
+
+const TestSink = struct {
+    cells: std.ArrayList(struct { row: c.lxw_row_t, col: c.lxw_col_t, value: f64 }),
+
+    fn put(self: *TestSink, row: c.lxw_row_t, col: c.lxw_col_t, cell: bulk.Cell, _: ?*c.lxw_format) !void {
+        const value = switch (cell) {
+            .number => |number| number,
+            .string => |string| @as(f64, @floatFromInt(string.len)),
+            else => -1,
+        };
+        try self.cells.append(.{ .row = row, .col = col, .value = value });
+    }
+};
+
+test "Staging merges spilled runs in row order" {
+    const allocator = std.testing.allocator;
+    var staging = Staging.init(allocator, undefined, .{ .memory_budget = 8 * cell_bytes });
+    defer staging.deinit();
+
+    // Column by column, with the first row written again at the end
+    for (0..3) |col| {
+        for (0..10) |row| {
+            try staging.write(@intCast(row), @intCast(col), row * 10 + col, null);
+        }
+    }
+    try staging.write(0, 1, "longer", null);
+    try staging.write(0, 2, @as(?f64, null), null);
+    try std.testing.expect(staging.runs.items.len > 1);
+
+    var sink = TestSink{ .cells = .init(allocator) };
+    defer sink.cells.deinit();
+    try staging.drain(5, &sink);
+    try std.testing.expectEqual(@as(usize, 15), sink.cells.items.len);
+    try std.testing.expectEqual(@as(f64, 6), sink.cells.items[1].value);
+    for (sink.cells.items, 0..) |cell, index| {
+        try std.testing.expectEqual(index / 3, cell.row);
+        try std.testing.expectEqual(index % 3, cell.col);
+    }
+    try std.testing.expectError(error.RowColumnOrderError, staging.write(4, 0, 1, null));
+
+    try staging.write(7, 0, bulk.Cell{ .formula = "=A1" }, null);
+    sink.cells.clearRetainingCapacity();
+    try staging.drain(c.LXW_ROW_MAX, &sink);
+    try std.testing.expectEqual(@as(usize, 15), sink.cells.items.len);
+    try std.testing.expectEqual(@as(f64, -1), sink.cells.items[6].value);
+    try std.testing.expectEqual(@as(usize, 0), staging.runs.items.len);
+    try std.testing.expectEqual(@as(usize, 0), staging.stagedBytes());
+    try std.testing.expectEqual(@as(c.lxw_row_t, 10), staging.next_row);
+}
+
+test "Staging writes to a worksheet" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "staging.xlsx" });
+    defer allocator.free(path);
+
+    var workbook_options = c.lxw_workbook_options{
+        .constant_memory = c.LXW_TRUE,
+        .tmpdir = null,
+        .use_zip64 = c.LXW_FALSE,
+        .output_buffer = null,
+        .output_buffer_size = null,
+    };
+    const workbook = c.workbook_new_opt(path.ptr, &workbook_options);
+    const worksheet = c.workbook_add_worksheet(workbook, null);
+    const bold = c.workbook_add_format(workbook);
+    c.format_set_bold(bold);
+
+    var staging = Staging.init(allocator, worksheet, .{ .memory_budget = 4 * cell_bytes });
+    defer staging.deinit();
+    try staging.writeColumn(1, 1, &[_]f64{ 1, 2, 3 }, null);
+    try staging.writeColumn(1, 0, &[_][:0]const u8{ "a", "b", "c" }, bold);
+    try staging.write(0, 0, "Name", bold);
+    try staging.write(0, 1, "Count", bold);
+    try staging.write(4, 1, bulk.Cell{ .formula = "=SUM(B2:B4)" }, null);
+    try staging.write(4, 2, bulk.Cell{ .datetime = .{ .year = 2024, .month = 1, .day = 2, .hour = 0, .min = 0, .sec = 0 } }, null);
+    try staging.flush();
+
+    try std.testing.expectError(error.RowColumnLimitError, staging.write(c.LXW_ROW_MAX, 0, 1, null));
+    try bulk.check(c.workbook_close(workbook));
+}
@@ -0,0 +1,327 @@
+const std = @import("std");
+const c = @import("xlsxwriter.zig");
+const bulk = @import("bulk.zig");
+const compression = @import("compression.zig");
+const profile = @import("profile.zig");
+const XlsxError = @import("errors.zig").XlsxError;
+const mem = std.mem;
+
+/// Cell types counted, the tags of bulk.Cell
+pub const CellType = std.meta.Tag(bulk.Cell);
+
+/// Phases of writing a workbook, shared with the memory profiler
+pub const Phase = profile.Phase;
+
+/// Passed to the progress callback
+pub const Progress = struct {
+    rows: u64,
+    cells: u64,
+    elapsed_ns: u64,
+};
+
+pub const ProgressCallback = struct {
+    context: ?*anyopaque = null,
+    call: *const fn (context: ?*anyopaque, progress: Progress) void,
+    /// Rows written between calls
+    interval: u64,
+};
+
+/// Counts and times the writing of a workbook.
+///
+/// Cells written through the Recorder's writeRow and writeCell are counted
+/// by type; code writing with the C functions reports its cells with
+/// countCells and rowWritten. close() records the shared string table,
+/// the time of each close phase and the size of every part of the file.
+/// A Recorder is not thread safe: give each ParallelBuilder producer its
+/// own and merge them afterwards.
+pub const Recorder = struct {
+    allocator: mem.Allocator,
+    cells: std.EnumArray(CellType, u64),
+    rows: u64,
+    formats: u64,
+    strings: u64,
+    unique_strings: u64,
+    phases: std.EnumArray(Phase, u64),
+    parts: ?compression.Report,
+    progress: ?ProgressCallback,
+    next_progress: u64,
+    timer: std.time.Timer,
+
+    pub fn init(allocator: mem.Allocator, progress: ?ProgressCallback) !Recorder {
+        return .{
+            .allocator = allocator,
+            .cells = std.EnumArray(CellType, u64).initFill(0),
+            .rows = 0,
+            .formats = 0,
+            .strings = 0,
+            .unique_strings = 0,
+            .phases = std.EnumArray(Phase, u64).initFill(0),
+            .parts = null,
+            .progress = progress,
+            .next_progress = if (progress) |callback| callback.interval else std.math.maxInt(u64),
+            .timer = try std.time.Timer.start(),
+        };
+    }
+
+    pub fn deinit(self: *Recorder) void {
+        if (self.parts) |*parts| parts.deinit();
+    }
+
+    /// Writes a row with bulk.writeRow and counts it
+    pub fn writeRow(
+        self: *Recorder,
+        worksheet: *c.lxw_worksheet,
+        row: c.lxw_row_t,
+        first_col: c.lxw_col_t,
+        values: anytype,
+        format: ?*c.lxw_format,
+    ) XlsxError!void {
+        try bulk.writeRow(worksheet, row, first_col, values, format);
+        for (values) |value| self.countValue(value);
+        self.rowWritten();
+    }
+
+    /// Writes a single cell and counts it. Call rowWritten after the last
+    /// cell of each row for progress reports.
+    pub fn writeCell(
+        self: *Recorder,
+        worksheet: *c.lxw_worksheet,
+        row: c.lxw_row_t,
+        col: c.lxw_col_t,
+        value: anytype,
+        format: ?*c.lxw_format,
+    ) XlsxError!void {
+        try bulk.writeRow(worksheet, row, col, &[_]@TypeOf(value){value}, format);
+        self.countValue(value);
+    }
+
+    /// Adds a format to the workbook and counts it
+    pub fn addFormat(self: *Recorder, workbook: *c.lxw_workbook) XlsxError!*c.lxw_format {
+        const format: *c.lxw_format = c.workbook_add_format(workbook) orelse return XlsxError.MemoryMallocFailed;
+        self.formats += 1;
+        return format;
+    }
+
+    /// Counts cells written without the Recorder
+    pub fn countCells(self: *Recorder, cell_type: CellType, count: u64) void {
+        self.cells.getPtr(cell_type).* += count;
+    }
+
+    /// Counts a finished row and calls the progress callback when due
+    pub fn rowWritten(self: *Recorder) void {
+        self.rows += 1;
+        if (self.rows < self.next_progress) return;
+        const callback = self.progress.?;
+        self.next_progress += callback.interval;
+        callback.call(callback.context, .{
+            .rows = self.rows,
+            .cells = self.totalCells(),
+            .elapsed_ns = self.timer.read(),
+        });
+    }
+
+    pub fn totalCells(self: *const Recorder) u64 {
+        var total: u64 = 0;
+        for (self.cells.values) |count| total += count;
+        return total;
+    }
+
+    /// Adds the counters and phase times of another Recorder, such as one
+    /// per worker thread. Phase times add up to the time spent by all
+    /// recorders, not the elapsed time. String counts of recorders that
+    /// closed different workbooks add up too, so unique_strings counts
+    /// strings unique within each workbook. parts describes the file this
+    /// Recorder closed and is not merged.
+    pub fn merge(self: *Recorder, other: *const Recorder) void {
+        for (&self.cells.values, other.cells.values) |*count, other_count| count.* += other_count;
+        for (&self.phases.values, other.phases.values) |*time, other_time| time.* += other_time;
+        self.rows += other.rows;
+        self.formats += other.formats;
+        self.strings += other.strings;
+        self.unique_strings += other.unique_strings;
+    }
+
+    /// Closes the workbook, timing each phase, and records the size of every
+    /// part of the file at path. Each phase is also passed to
+    /// profile.setPhase so memory profiles split the same way.
+    pub fn close(self: *Recorder, workbook: *c.lxw_workbook, path: []const u8) !void {
+        self.phases.set(.write, self.timer.lap());
+
+        const counts = sharedStringCounts(workbook);
+        self.strings = counts.strings;
+        self.unique_strings = counts.unique;
+
+        profile.setPhase(.close);
+        defer profile.setPhase(.write);
+        try bulk.check(c.workbook_close(workbook));
+        self.phases.set(.close, self.timer.lap());
+
+        if (self.parts) |*parts| parts.deinit();
+        self.parts = null;
+        self.parts = try compression.partSizes(self.allocator, path);
+    }
+
+    /// Writes the counters, phase times in seconds and part sizes as JSON
+    pub fn writeJson(self: *const Recorder, writer: anytype, options: std.json.StringifyOptions) !void {
+        var json = std.json.writeStream(writer, options);
+        defer json.deinit();
+
+        try json.beginObject();
+        try json.objectField("cells");
+        try json.beginObject();
+        for (std.enums.values(CellType)) |cell_type| {
+            try json.objectField(@tagName(cell_type));
+            try json.write(self.cells.get(cell_type));
+        }
+        try json.objectField("total");
+        try json.write(self.totalCells());
+        try json.endObject();
+
+        try json.objectField("rows");
+        try json.write(self.rows);
+        try json.objectField("formats");
+        try json.write(self.formats);
+        try json.objectField("strings");
+        try json.write(self.strings);
+        try json.objectField("unique_strings");
+        try json.write(self.unique_strings);
+
+        try json.objectField("phases");
+        try json.beginObject();
+        for (std.enums.values(Phase)) |phase| {
+            try json.objectField(@tagName(phase));
+            try json.write(seconds(self.phases.get(phase)));
+        }
+        try json.endObject();
+
+        try json.objectField("parts");
+        try json.beginArray();
+        if (self.parts) |parts| {
+            for (parts.parts) |part| {
+                try json.beginObject();
+                try json.objectField("name");
+                try json.write(part.name);
+                try json.objectField("uncompressed_size");
+                try json.write(part.uncompressed_size);
+                try json.objectField("compressed_size");
+                try json.write(part.compressed_size);
+                try json.endObject();
+            }
+        }
+        try json.endArray();
+        try json.endObject();
+    }
+
+    fn countValue(self: *Recorder, value: anytype) void {
+        const T = @TypeOf(value);
+        if (T == bulk.Cell) return self.countCells(value, 1);
+        switch (@typeInfo(T)) {
+            .float, .comptime_float, .int, .comptime_int => self.countCells(.number, 1),
+            .bool => self.countCells(.boolean, 1),
+            .optional => if (value) |inner| self.countValue(inner),
+            else => self.countCells(.string, 1),
+        }
+    }
+};
+
+/// Reads the counts of the workbook's shared string table. libxlsxwriter
+/// has no function for them, so this is the only access to the private
+/// workbook.sst. The table is freed by workbook_close and stays empty in
+/// constant_memory mode, which writes strings inline.
+fn sharedStringCounts(workbook: *c.lxw_workbook) struct { strings: u64, unique: u64 } {
+    if (workbook.sst == null) return .{ .strings = 0, .unique = 0 };
+    return .{ .strings = workbook.sst.*.string_count, .unique = workbook.sst.*.unique_count };
+}
+
+fn seconds(nanoseconds: u64) f64 {
+    return @as(f64, @floatFromInt(nanoseconds)) / std.time.ns_per_s;
+}
+
+const TestProgress = struct {
+    calls: u32 = 0,
+    last_rows: u64 = 0,
+
+    fn call(context: ?*anyopaque, progress: Progress) void {
+        const self: *TestProgress = @ptrCast(@alignCast(context.?));
+        self.calls += 1;
+        self.last_rows = progress.rows;
+    }
+};
+
+test "Recorder counts cells and reports progress" {
+    const allocator = std.testing.allocator;
+    var tmp_dir = std.testing.tmpDir(.{});
+    defer tmp_dir.cleanup();
+
+    const dir_path = try tmp_dir.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir_path);
+    const path = try std.fs.path.joinZ(allocator, &.{ dir_path, "stats.xlsx" });
+    defer allocator.free(path);
+
+    var progress = TestProgress{};
+    var recorder = try Recorder.init(allocator, .{
+        .context = &progress,
+        .call = TestProgress.call,
+        .interval = 4,
+    });
+    defer recorder.deinit();
+
+    const workbook = c.workbook_new(path.ptr);
+    const worksheet = c.workbook_add_worksheet(workbook, null);
+    _ = try recorder.addFormat(workbook);
+
+    var row: u32 = 0;
+    while (row < 10) : (row += 1) {
+        try recorder.writeRow(worksheet, row, 0, &[_]?f64{ 1, null, 3 }, null);
+        try recorder.writeCell(worksheet, row, 3, bulk.Cell{ .formula = "=A1" }, null);
+    }
+    try recorder.writeCell(worksheet, row, 0, "total", null);
+
+    try std.testing.expectEqual(@as(u64, 20), recorder.cells.get(.number));
+    try std.testing.expectEqual(@as(u64, 10), recorder.cells.get(.formula));
+    try std.testing.expectEqual(@as(u64, 1), recorder.cells.get(.string));
+    try std.testing.expectEqual(@as(u64, 10), recorder.rows);
+    try std.testing.expectEqual(@as(u32, 2), progress.calls);
+    try std.testing.expectEqual(@as(u64, 8), progress.last_rows);
+
+    var json = std.ArrayList(u8).init(allocator);
+    defer json.deinit();
+    try recorder.writeJson(json.writer(), .{});
+    const parsed = try std.json.parseFromSlice(std.json.Value, allocator, json.items, .{});
+    defer parsed.deinit();
+    const cells = parsed.value.object.get("cells").?.object;
+    try std.testing.expectEqual(@as(i64, 31), cells.get("total").?.integer);
+    try std.testing.expectEqual(@as(i64, 1), parsed.value.object.get("formats").?.integer);
+
+    _ = c.workbook_close(workbook);
+}
+
+test "Recorder merges every counter" {
+    const allocator = std.testing.allocator;
+    var total = try Recorder.init(allocator, null);
+    defer total.deinit();
+    var worker = try Recorder.init(allocator, null);
+    defer worker.deinit();
+
+    total.countCells(.number, 3);
+    total.rowWritten();
+    total.strings = 4;
+    total.unique_strings = 2;
+    total.phases.set(.close, 10);
+    worker.countCells(.string, 5);
+    worker.rowWritten();
+    worker.formats = 1;
+    worker.strings = 5;
+    worker.unique_strings = 3;
+    worker.phases.set(.write, 7);
+    worker.phases.set(.close, 5);
+
+    total.merge(&worker);
+    try std.testing.expectEqual(@as(u64, 8), total.totalCells());
+    try std.testing.expectEqual(@as(u64, 2), total.rows);
+    try std.testing.expectEqual(@as(u64, 1), total.formats);
+    try std.testing.expectEqual(@as(u64, 9), total.strings);
+    try std.testing.expectEqual(@as(u64, 5), total.unique_strings);
+    try std.testing.expectEqual(@as(u64, 7), total.phases.get(.write));
+    try std.testing.expectEqual(@as(u64, 15), total.phases.get(.close));
+}
@@ -1,4 +1,14 @@
 pub const xlsxError = @import("errors.zig");
+pub const bulk = @import("bulk.zig");
+pub const formatCache = @import("format_cache.zig");
+pub const parallel = @import("parallel.zig");
+pub const assets = @import("assets.zig");
+pub const compression = @import("compression.zig");
+pub const stats = @import("stats.zig");
+pub const deterministic = @import("deterministic.zig");
+pub const profile = @import("profile.zig");
+pub const staging = @import("staging.zig");
+pub const datetime = @import("datetime.zig");
 pub usingnamespace @cImport({
     @cDefine("struct_headname", "");
     @cInclude("xlsxwriter.h");
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Build and run many Zig examples at once.
+All requested examples are built with a single zig build invocation, then
+the binaries run concurrently, each in its own temporary working directory
+so their zig-<name>.xlsx outputs cannot collide. The outputs are collected
+into testing/zig-output-xls.
+
+With --profile the examples run with the malloc hook of memory_profile.py
+preloaded, and the peak memory of each example is added to the results.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from create_screenshots import cleanup_excel_file
+import memory_profile
+import xlsx_validate
+
+
+def get_all_zig_examples():
+    """Get the names of all Zig examples in the examples directory."""
+    root_dir = Path(__file__).parent.parent
+    examples_dir = root_dir / "examples"
+    return sorted(
+        entry.name[:-4] for entry in os.scandir(examples_dir)
+        if entry.is_file() and entry.name.endswith(".zig")
+    )
+
+
+def get_example_binary(example_name):
+    """Get the path of the installed example executable."""
+    root_dir = Path(__file__).parent.parent
+    suffix = ".exe" if os.name == "nt" else ""
+    return root_dir / "zig-out" / "bin" / f"{example_name}{suffix}"
+
+
+def build_examples(examples, optimize=None):
+    """
+    Build all examples with a single zig build invocation.
+
+    Every example has its own build step, so passing all of their names
+    lets the build runner share the libxlsxwriter build and compile the
+    examples in parallel.
+
+    Returns:
+        tuple: (success, seconds)
+    """
+    root_dir = Path(__file__).parent.parent
+    cmd = ["zig", "build", *examples]
+    if optimize:
+        cmd.append(f"-Doptimize={optimize}")
+
+    start = time.perf_counter()
+    try:
+        subprocess.run(cmd, cwd=root_dir, check=True)
+        success = True
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Error building examples: {e}")
+        success = False
+    return success, time.perf_counter() - start
+
+
+def run_example(example_name, work_root, timeout=300, profile_dir=None, validate=False):
+    """
+    Run an example binary in its own working directory and collect its output.
+
+    Args:
+        profile_dir: If set, profile the memory of the example and keep its
+                     report there as <name>.json
+        validate: Validate the output with xlsx_validate.py before collecting
+                  it; an invalid package fails the example
+
+    Returns:
+        dict: name, success, run and collect times in seconds, an error
+              message if the example failed and, when profiling, the
+              memory_profile.summarize() of its report under "memory"
+    """
+    result = {'name': example_name, 'success': False, 'run': 0.0, 'collect': 0.0, 'error': None}
+    binary = get_example_binary(example_name)
+    if not binary.exists():
+        result['error'] = f"binary not found: {binary}"
+        return result
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f"{example_name}-", dir=work_root))
+    report_path = work_dir / "memory-profile.json"
+    env = memory_profile.profile_env(report_path) if profile_dir else None
+    try:
+        start = time.perf_counter()
+        try:
+            completed = subprocess.run(
+                [str(binary)], cwd=work_dir, capture_output=True, text=True, timeout=timeout, env=env,
+            )
+        except subprocess.TimeoutExpired:
+            result['error'] = f"timed out after {timeout}s"
+            return result
+        result['run'] = time.perf_counter() - start
+
+        if profile_dir:
+            report = memory_profile.load_report(report_path)
+            if report is not None:
+                shutil.copyfile(report_path, Path(profile_dir) / f"{example_name}.json")
+                result['memory'] = memory_profile.summarize(memory_profile.symbolize(report), top=5)
+
+        if completed.returncode != 0:
+            result['error'] = f"exit code {completed.returncode}: {completed.stderr.strip()[:200]}"
+            return result
+
+        extension = ".xlsm" if example_name == "macro" else ".xlsx"
+        output_file = work_dir / f"zig-{example_name}{extension}"
+        if not output_file.exists():
+            result['error'] = f"no output file {output_file.name}"
+            return result
+
+        if validate:
+            validation = xlsx_validate.validate_package(output_file, max_workers=1)
+            if not validation['valid']:
+                result['error'] = f"invalid package: {validation['errors'][0]}"
+                return result
+
+        start = time.perf_counter()
+        result['success'] = cleanup_excel_file(example_name, output_file)
+        result['collect'] = time.perf_counter() - start
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_examples(examples, max_workers=None, timeout=300, profile_dir=None, validate=False):
+    """
+    Run example binaries concurrently, each in a separate working directory.
+
+    Returns:
+        tuple: (results, seconds) where results is a list of run_example() dicts
+    """
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="zig-xlsxwriter-batch-") as work_root:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            results = list(pool.map(
+                lambda name: run_example(name, work_root, timeout, profile_dir, validate), examples))
+    return results, time.perf_counter() - start
+
+
+def main():
+    """Main function to build and run examples in batch."""
+    parser = argparse.ArgumentParser(description="Build and run Zig examples in batch")
+    parser.add_argument("examples", nargs="*", help="Example names (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of examples to run concurrently (default: CPU count)")
+    parser.add_argument("--no-build", action="store_true", help="Run existing binaries without building")
+    parser.add_argument("--optimize", choices=["Debug", "ReleaseSafe", "ReleaseFast", "ReleaseSmall"],
+                        help="Optimization mode passed to zig build")
+    parser.add_argument("--timeout", type=int, default=300, help="Per-example timeout in seconds")
+    parser.add_argument("--timings", help="Write per-stage timings as JSON to this file")
+    parser.add_argument("--validate", action="store_true",
+                        help="Validate every output as an OOXML package before collecting it")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the memory of each example (Linux with glibc only)")
+    parser.add_argument("--profile-dir", default="testing/memory-profiles",
+                        help="Directory for the memory profile reports (default: testing/memory-profiles)")
+
+    args = parser.parse_args()
+    examples = args.examples or get_all_zig_examples()
+
+    timings = {'build': 0.0, 'run_total': 0.0, 'examples': []}
+
+    if not args.no_build:
+        print(f"Building {len(examples)} examples...")
+        success, timings['build'] = build_examples(examples, args.optimize)
+        print(f"Build finished in {timings['build']:.2f}s")
+        if not success:
+            return 1
+
+    profile_dir = None
+    if args.profile:
+        if not args.no_build and not memory_profile.build_hook_library():
+            return 1
+        if not memory_profile.get_hook_library().exists():
+            print(f"❌ Malloc hook library not found: {memory_profile.get_hook_library()}")
+            return 1
+        profile_dir = args.profile_dir
+        Path(profile_dir).mkdir(parents=True, exist_ok=True)
+
+    print(f"Running {len(examples)} examples...")
+    results, timings['run_total'] = run_examples(examples, args.jobs, args.timeout, profile_dir, args.validate)
+    timings['examples'] = results
+
+    peak_header = f" {'PEAK':>11}" if args.profile else ""
+    print(f"\n{'EXAMPLE':<30} {'RUN (s)':>8} {'COLLECT (s)':>12}{peak_header}  STATUS")
+    print("-" * (82 if args.profile else 70))
+    failed = 0
+    for result in results:
+        if result['success']:
+            status = "✅"
+        else:
+            failed += 1
+            status = f"❌ {result['error']}"
+        peak = ""
+        if args.profile:
+            memory = result.get('memory')
+            peak = f" {memory_profile.format_bytes(memory['peak_bytes']) if memory else '-':>11}"
+        print(f"{result['name']:<30} {result['run']:>8.3f} {result['collect']:>12.3f}{peak}  {status}")
+
+    print("-" * (82 if args.profile else 70))
+    run_sum = sum(result['run'] for result in results)
+    print(f"Build: {timings['build']:.2f}s, run: {timings['run_total']:.2f}s wall "
+          f"({run_sum:.2f}s summed over examples)")
+    print(f"Total: {len(results)} examples ({len(results) - failed} succeeded, {failed} failed)")
+    if args.profile:
+        profiled = sorted((r for r in results if r.get('memory')),
+                          key=lambda r: r['memory']['peak_bytes'], reverse=True)
+        if profiled:
+            top = profiled[0]
+            categories = ", ".join(
+                f"{category} {memory_profile.format_bytes(counts['peak_bytes'])}"
+                for category, counts in list(top['memory']['categories'].items())[:3])
+            print(f"Largest peak: {top['name']} {memory_profile.format_bytes(top['memory']['peak_bytes'])} "
+                  f"({categories}); reports in {profile_dir}")
+
+    if args.timings:
+        with open(args.timings, 'w') as f:
+            json.dump(timings, f, indent=2)
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
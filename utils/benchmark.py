@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Benchmark Zig examples against their C counterparts.
+Each example binary and the matching C binary from examples/c are run
+several times. Wall time, CPU time, peak RSS (from the rusage of each child
+process) and output size are recorded in testing/benchmarks/history.jsonl.
+Use `evaluate.py --bench` to compare the latest run with earlier ones.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import datetime
+import statistics
+import tempfile
+import subprocess
+from pathlib import Path
+
+from batch_run import get_all_zig_examples, get_example_binary
+
+# Metrics recorded for each run, with their display units
+METRICS = {
+    'wall': "s",
+    'cpu': "s",
+    'rss': "KiB",
+}
+
+
+def get_history_path():
+    """Get the path of the benchmark history file."""
+    root_dir = Path(__file__).parent.parent
+    return root_dir / "testing" / "benchmarks" / "history.jsonl"
+
+
+def get_c_binary(example_name):
+    """Get the path of the C example executable built by examples/c/Makefile."""
+    root_dir = Path(__file__).parent.parent
+    suffix = ".exe" if os.name == "nt" else ""
+    return root_dir / "examples" / "c" / f"{example_name}{suffix}"
+
+
+def measure(cmd, cwd, capture_output=False):
+    """
+    Run a command once and measure it.
+
+    The rusage of exactly this child is collected with os.wait4, so peak RSS
+    is per run rather than the maximum over all children.
+
+    Args:
+        cmd: Command line to run
+        cwd: Working directory
+        capture_output: Keep the standard output of the command
+
+    Returns:
+        dict: wall and cpu seconds, peak rss in KiB, the exit status and the
+              decoded standard output if capture_output is set
+    """
+    start = time.perf_counter()
+    stdout = subprocess.PIPE if capture_output else subprocess.DEVNULL
+    process = subprocess.Popen(cmd, cwd=cwd, stdout=stdout, stderr=subprocess.DEVNULL)
+    output = None
+    if capture_output:
+        with process.stdout:
+            output = process.stdout.read().decode()
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = rusage.ru_maxrss / 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {
+        'wall': wall,
+        'cpu': rusage.ru_utime + rusage.ru_stime,
+        'rss': rss,
+        'status': process.returncode,
+        'stdout': output,
+    }
+
+
+def measure_rss_floor():
+    """
+    Measure the peak RSS reported for a process that does nothing.
+
+    On Linux the rusage of a child also counts the memory it shared with
+    this Python process before exec, so small binaries never report less
+    than this floor. It is stored with every run so RSS values can be read
+    against it.
+    """
+    true_binary = shutil.which("true")
+    if true_binary is None:
+        return None
+    return measure([true_binary], None)['rss']
+
+
+def benchmark_binary(binary, repeats, warmup=1):
+    """
+    Run a binary repeatedly in a fresh working directory.
+
+    Returns:
+        dict: Lists of samples per metric and the total size of the output
+              files, or None if the binary is missing or fails
+    """
+    if not binary.exists():
+        return None
+
+    samples = {metric: [] for metric in METRICS}
+    size = 0
+    for iteration in range(warmup + repeats):
+        work_dir = tempfile.mkdtemp(prefix="zig-xlsxwriter-bench-")
+        try:
+            result = measure([str(binary)], work_dir)
+            if result['status'] != 0:
+                return None
+            if iteration < warmup:
+                continue
+            for metric in METRICS:
+                samples[metric].append(result[metric])
+            size = sum(entry.stat().st_size for entry in os.scandir(work_dir) if entry.is_file())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    samples['size'] = size
+    return samples
+
+
+def get_git_revision():
+    """Get the short git revision of the working tree, or None."""
+    root_dir = Path(__file__).parent.parent
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root_dir, capture_output=True, text=True, check=True,
+        )
+        return completed.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def append_history(record):
+    """Append a benchmark run to the history file."""
+    path = get_history_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_history():
+    """Load all recorded benchmark runs, oldest first."""
+    path = get_history_path()
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(samples):
+    """Return the median and median absolute deviation of a list of samples."""
+    median = statistics.median(samples)
+    mad = statistics.median(abs(sample - median) for sample in samples)
+    return median, mad
+
+
+def compare_samples(baseline, current, threshold):
+    """
+    Compare two sample lists of one metric.
+
+    A change counts as significant only if the medians differ by more than
+    the threshold and by more than three times the combined noise (MAD) of
+    both runs, so noisy short runs do not trip the gate.
+
+    Returns:
+        tuple: (delta_percent, is_regression)
+    """
+    base_median, base_mad = summarize(baseline)
+    current_median, current_mad = summarize(current)
+    if base_median == 0:
+        return 0.0, False
+
+    delta = (current_median - base_median) / base_median * 100
+    noise = 3 * (base_mad + current_mad)
+    significant = abs(current_median - base_median) > noise
+    return delta, significant and delta > threshold
+
+
+def main():
+    """Main function to benchmark examples."""
+    parser = argparse.ArgumentParser(description="Benchmark Zig examples against their C counterparts")
+    parser.add_argument("examples", nargs="*", help="Example names (default: all)")
+    parser.add_argument("-n", "--repeats", type=int, default=5, help="Measured runs per binary (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured warm-up runs (default: 1)")
+    parser.add_argument("--no-c", action="store_true", help="Skip the C binaries")
+    parser.add_argument("--label", help="Free-form label stored with this run")
+
+    args = parser.parse_args()
+    examples = args.examples or get_all_zig_examples()
+
+    results = {}
+    print(f"{'EXAMPLE':<30} {'ZIG (ms)':>10} {'C (ms)':>10} {'ZIG RSS':>10} {'C RSS':>10}")
+    print("-" * 74)
+    for example in examples:
+        entry = {'zig': benchmark_binary(get_example_binary(example), args.repeats, args.warmup)}
+        if not args.no_c:
+            entry['c'] = benchmark_binary(get_c_binary(example), args.repeats, args.warmup)
+        results[example] = entry
+
+        columns = []
+        for metric in ('wall', 'rss'):
+            for side in ('zig', 'c'):
+                samples = entry.get(side)
+                if not samples:
+                    columns.append("-")
+                elif metric == 'wall':
+                    columns.append(f"{summarize(samples[metric])[0] * 1000:.1f}")
+                else:
+                    columns.append(f"{summarize(samples[metric])[0]:.0f}")
+        print(f"{example:<30} {columns[0]:>10} {columns[1]:>10} {columns[2]:>10} {columns[3]:>10}")
+
+    append_history({
+        'timestamp': datetime.datetime.now().isoformat(timespec="seconds"),
+        'revision': get_git_revision(),
+        'host': socket.gethostname(),
+        'label': args.label,
+        'repeats': args.repeats,
+        'rss_floor': measure_rss_floor(),
+        'results': results,
+    })
+    print(f"\nResults appended to {os.path.relpath(get_history_path())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
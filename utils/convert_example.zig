@@ -2,6 +2,14 @@ const std = @import("std");
 const fs = std.fs;
 const mem = std.mem;
 const Allocator = mem.Allocator;
+const Sha256 = std.crypto.hash.sha2.Sha256;
+
+/// Bump when the generated code changes, so batch mode converts every
+/// input again instead of trusting its cache
+const converter_version = 1;
+
+/// Name of the batch mode cache file in the output directory
+const default_cache_name = ".convert_cache";
 
 pub fn main() !void {
     var gpa = std.heap.GeneralPurposeAllocator(.{}){};
@@ -15,14 +23,23 @@ pub fn main() !void {
     if (args.len < 2) {
         const prog_name = extractBaseName(args[0]);
         std.debug.print("Usage: {s} <input_file>\n", .{prog_name});
+        std.debug.print("       {s} --batch <dir|glob>... [--out-dir DIR] [--jobs N] [--force] [--cache FILE]\n", .{prog_name});
         std.debug.print("\nRead a .c libxlswriter example, write zig version to stdout\n", .{});
+        std.debug.print("With --batch, convert every .c file of the directories or globs on a\n", .{});
+        std.debug.print("thread pool and write <name>.zig to the output directory (default: examples).\n", .{});
+        std.debug.print("Inputs unchanged since the last conversion are skipped, and so are outputs\n", .{});
+        std.debug.print("edited since they were generated, unless --force is given.\n", .{});
         return;
     }
 
+    if (mem.eql(u8, args[1], "--batch")) {
+        return runBatch(allocator, args[2..]);
+    }
+
     const input_file_path = args[1];
 
     // Read the input file
-    const c_content = fs.cwd().readFileAlloc(allocator, input_file_path, 1024 * 1024) catch {
+    const c_content = fs.cwd().readFileAlloc(allocator, input_file_path, std.math.maxInt(usize)) catch {
         std.debug.print("Error: Input file '{s}' not found or could not be read\n", .{input_file_path});
         return;
     };
@@ -40,6 +57,275 @@ pub fn main() !void {
     try stdout.writeAll(zig_content);
 }
 
+const BatchOptions = struct {
+    out_dir: []const u8 = "examples",
+    cache_path: ?[]const u8 = null,
+    jobs: ?usize = null,
+    force: bool = false,
+};
+
+const Outcome = enum { converted, unchanged, edited, failed };
+
+/// One input file of a batch and, once converted, its result
+const Job = struct {
+    path: []const u8,
+    base_name: []const u8,
+    /// Hashes recorded by the previous conversion, if any
+    cached: ?CacheEntry,
+    entry: CacheEntry = undefined,
+    outcome: Outcome = .failed,
+    err: ?anyerror = null,
+};
+
+const CacheEntry = struct {
+    input: [Sha256.digest_length]u8,
+    output: [Sha256.digest_length]u8,
+};
+
+fn runBatch(allocator: Allocator, args: []const [:0]u8) !void {
+    var options = BatchOptions{};
+    var patterns = std.ArrayList([]const u8).init(allocator);
+    defer patterns.deinit();
+
+    var i: usize = 0;
+    while (i < args.len) : (i += 1) {
+        const arg = args[i];
+        if (mem.eql(u8, arg, "--force")) {
+            options.force = true;
+        } else if (mem.eql(u8, arg, "--out-dir") or mem.eql(u8, arg, "--jobs") or mem.eql(u8, arg, "--cache")) {
+            if (i + 1 >= args.len) {
+                std.debug.print("Error: {s} needs a value\n", .{arg});
+                std.process.exit(2);
+            }
+            i += 1;
+            if (mem.eql(u8, arg, "--out-dir")) {
+                options.out_dir = args[i];
+            } else if (mem.eql(u8, arg, "--cache")) {
+                options.cache_path = args[i];
+            } else {
+                options.jobs = std.fmt.parseInt(usize, args[i], 10) catch {
+                    std.debug.print("Error: invalid --jobs value '{s}'\n", .{args[i]});
+                    std.process.exit(2);
+                };
+            }
+        } else {
+            try patterns.append(arg);
+        }
+    }
+    if (patterns.items.len == 0) try patterns.append("examples/c");
+
+    var arena_state = std.heap.ArenaAllocator.init(allocator);
+    defer arena_state.deinit();
+    const arena = arena_state.allocator();
+
+    var timer = try std.time.Timer.start();
+
+    const cache_path = options.cache_path orelse try fs.path.join(arena, &.{ options.out_dir, default_cache_name });
+    var cache = try loadCache(arena, cache_path);
+
+    var paths = std.ArrayList([]const u8).init(arena);
+    for (patterns.items) |pattern| try expandPattern(arena, pattern, &paths);
+    mem.sort([]const u8, paths.items, {}, lessThan);
+
+    const jobs = try arena.alloc(Job, paths.items.len);
+    for (jobs, paths.items) |*job, path| {
+        const base_name = extractBaseName(path);
+        job.* = .{ .path = path, .base_name = base_name, .cached = cache.get(base_name) };
+    }
+
+    var out_dir = try fs.cwd().makeOpenPath(options.out_dir, .{});
+    defer out_dir.close();
+
+    var pool: std.Thread.Pool = undefined;
+    try pool.init(.{ .allocator = allocator, .n_jobs = options.jobs });
+    defer pool.deinit();
+    var wait_group = std.Thread.WaitGroup{};
+    for (jobs) |*job| pool.spawnWg(&wait_group, convertJob, .{ allocator, out_dir, job, options.force });
+    pool.waitAndWork(&wait_group);
+
+    var counts = std.EnumArray(Outcome, usize).initFill(0);
+    for (jobs) |job| {
+        counts.getPtr(job.outcome).* += 1;
+        switch (job.outcome) {
+            .converted => {
+                std.debug.print("converted  {s}\n", .{job.path});
+                try cache.put(job.base_name, job.entry);
+            },
+            .unchanged => {},
+            .edited => std.debug.print("edited     {s}.zig was changed by hand, use --force to overwrite\n", .{job.base_name}),
+            .failed => std.debug.print("failed     {s}: {s}\n", .{ job.path, @errorName(job.err.?) }),
+        }
+    }
+    try saveCache(cache_path, &cache);
+
+    std.debug.print("\nTotal: {d} files ({d} converted, {d} unchanged, {d} edited, {d} failed) in {d:.3}s\n", .{
+        jobs.len,
+        counts.get(.converted),
+        counts.get(.unchanged),
+        counts.get(.edited),
+        counts.get(.failed),
+        @as(f64, @floatFromInt(timer.read())) / std.time.ns_per_s,
+    });
+    if (counts.get(.failed) > 0) std.process.exit(1);
+}
+
+fn lessThan(_: void, a: []const u8, b: []const u8) bool {
+    return mem.lessThan(u8, a, b);
+}
+
+fn convertJob(allocator: Allocator, out_dir: fs.Dir, job: *Job, force: bool) void {
+    job.outcome = convertFile(allocator, out_dir, job, force) catch |err| blk: {
+        job.err = err;
+        break :blk .failed;
+    };
+}
+
+fn convertFile(allocator: Allocator, out_dir: fs.Dir, job: *Job, force: bool) !Outcome {
+    const c_content = try fs.cwd().readFileAlloc(allocator, job.path, std.math.maxInt(usize));
+    defer allocator.free(c_content);
+
+    var hasher = Sha256.init(.{});
+    hasher.update(mem.asBytes(&@as(u32, converter_version)));
+    hasher.update(c_content);
+    job.entry.input = hasher.finalResult();
+
+    const output_name = try std.fmt.allocPrint(allocator, "{s}.zig", .{job.base_name});
+    defer allocator.free(output_name);
+
+    // Compare the current output with the one recorded: it is either still
+    // the generated file or was edited by hand since
+    const existing = out_dir.readFileAlloc(allocator, output_name, std.math.maxInt(usize)) catch |err| switch (err) {
+        error.FileNotFound => null,
+        else => return err,
+    };
+    defer if (existing) |content| allocator.free(content);
+
+    if (!force) {
+        if (existing) |content| {
+            var existing_hash: [Sha256.digest_length]u8 = undefined;
+            Sha256.hash(content, &existing_hash, .{});
+            const cached = job.cached orelse return .edited;
+            if (!mem.eql(u8, &cached.output, &existing_hash)) return .edited;
+            if (mem.eql(u8, &cached.input, &job.entry.input)) return .unchanged;
+        }
+    }
+
+    const zig_content = try convertCToZig(allocator, c_content, job.base_name);
+    defer allocator.free(zig_content);
+    Sha256.hash(zig_content, &job.entry.output, .{});
+
+    var file = try out_dir.atomicFile(output_name, .{});
+    defer file.deinit();
+    try file.file.writeAll(zig_content);
+    try file.finish();
+    return .converted;
+}
+
+/// Adds the .c files matching a directory, a file or a glob with * and ?
+/// in its last path component
+fn expandPattern(arena: Allocator, pattern: []const u8, paths: *std.ArrayList([]const u8)) !void {
+    const base = fs.path.basename(pattern);
+    const has_wildcard = mem.indexOfAny(u8, base, "*?") != null;
+    if (!has_wildcard) {
+        var dir = fs.cwd().openDir(pattern, .{ .iterate = true }) catch |err| switch (err) {
+            error.NotDir => return paths.append(pattern),
+            else => return err,
+        };
+        defer dir.close();
+        return addMatches(arena, dir, pattern, "*.c", paths);
+    }
+
+    const dir_path = fs.path.dirname(pattern) orelse ".";
+    var dir = try fs.cwd().openDir(dir_path, .{ .iterate = true });
+    defer dir.close();
+    try addMatches(arena, dir, dir_path, base, paths);
+}
+
+fn addMatches(
+    arena: Allocator,
+    dir: fs.Dir,
+    dir_path: []const u8,
+    glob: []const u8,
+    paths: *std.ArrayList([]const u8),
+) !void {
+    var iter = dir.iterate();
+    while (try iter.next()) |entry| {
+        if (entry.kind != .file) continue;
+        if (!globMatch(glob, entry.name)) continue;
+        try paths.append(try fs.path.join(arena, &.{ dir_path, entry.name }));
+    }
+}
+
+/// Matches a name against a glob where * is any run of characters and ?
+/// is any one character
+fn globMatch(glob: []const u8, name: []const u8) bool {
+    var g: usize = 0;
+    var n: usize = 0;
+    var star: ?usize = null;
+    var star_name: usize = 0;
+    while (n < name.len) {
+        if (g < glob.len and (glob[g] == '?' or glob[g] == name[n])) {
+            g += 1;
+            n += 1;
+        } else if (g < glob.len and glob[g] == '*') {
+            star = g;
+            star_name = n;
+            g += 1;
+        } else if (star) |star_index| {
+            g = star_index + 1;
+            star_name += 1;
+            n = star_name;
+        } else {
+            return false;
+        }
+    }
+    while (g < glob.len and glob[g] == '*') g += 1;
+    return g == glob.len;
+}
+
+/// Reads the cache, one "<name> <input sha256> <output sha256>" line per
+/// converted file. A missing or unreadable cache is empty.
+fn loadCache(arena: Allocator, path: []const u8) !std.StringHashMap(CacheEntry) {
+    var cache = std.StringHashMap(CacheEntry).init(arena);
+    const content = fs.cwd().readFileAlloc(arena, path, std.math.maxInt(usize)) catch return cache;
+
+    var lines = mem.tokenizeScalar(u8, content, '\n');
+    while (lines.next()) |line| {
+        var fields = mem.tokenizeScalar(u8, line, ' ');
+        const name = fields.next() orelse continue;
+        var entry: CacheEntry = undefined;
+        const input = fields.next() orelse continue;
+        const output = fields.next() orelse continue;
+        _ = std.fmt.hexToBytes(&entry.input, input) catch continue;
+        _ = std.fmt.hexToBytes(&entry.output, output) catch continue;
+        try cache.put(name, entry);
+    }
+    return cache;
+}
+
+fn saveCache(path: []const u8, cache: *std.StringHashMap(CacheEntry)) !void {
+    const allocator = cache.allocator;
+    const names = try allocator.alloc([]const u8, cache.count());
+    var iter = cache.keyIterator();
+    var i: usize = 0;
+    while (iter.next()) |name| : (i += 1) names[i] = name.*;
+    mem.sort([]const u8, names, {}, lessThan);
+
+    var file = try fs.cwd().atomicFile(path, .{});
+    defer file.deinit();
+    var buffered = std.io.bufferedWriter(file.file.writer());
+    for (names) |name| {
+        const entry = cache.get(name).?;
+        try buffered.writer().print("{s} {s} {s}\n", .{
+            name,
+            std.fmt.fmtSliceHexLower(&entry.input),
+            std.fmt.fmtSliceHexLower(&entry.output),
+        });
+    }
+    try buffered.flush();
+    try file.finish();
+}
+
 fn extractBaseName(file_path: []const u8) []const u8 {
     // Find the last path separator
     const last_slash = mem.lastIndexOfScalar(u8, file_path, '/') orelse return file_path;
@@ -121,3 +407,11 @@ fn convertCToZig(allocator: Allocator, c_content: []const u8, base_name: []const
 
     return result.toOwnedSlice();
 }
+
+test "globMatch" {
+    try std.testing.expect(globMatch("*.c", "chart.c"));
+    try std.testing.expect(globMatch("chart_*.c", "chart_line.c"));
+    try std.testing.expect(globMatch("tutorial?.c", "tutorial2.c"));
+    try std.testing.expect(!globMatch("*.c", "chart.h"));
+    try std.testing.expect(!globMatch("chart_*.c", "chart.c"));
+}
@@ -15,6 +15,10 @@ from pathlib import Path
 import argparse
 from PIL import Image
 
+import manifest
+import render
+import image_compare
+
 
 def check_screenshot_exists(example_name):
     """Check if a screenshot exists for the Zig implementation."""
@@ -130,56 +134,40 @@ def process_screenshot(screenshot_file, top_crop=25, bottom_crop=155, left_crop=
         return False
 
 
-def take_screenshot(example_name, top_crop=25, bottom_crop=155, left_crop=0, right_crop=0):
+def get_zig_excel_file(example_name):
     """
-    Take a screenshot of both C and Zig Excel files side by side.
+    Get the path to the Zig Excel file.
     
-    This function:
-    1. Builds the Zig example
-    2. Positions both C and Zig Excel files side by side using excel-position.sh
-    3. Takes a screenshot using the macOS screencapture utility
-    4. Opens the screenshot for the user to view
-    5. Asks the user if the outputs match
-    6. If they match, moves the Zig Excel file to the zig-output-xls directory
+    Prefers a freshly generated file in the project root and falls back to
+    the already verified file in testing/zig-output-xls.
+    """
+    root_dir = Path(__file__).parent.parent
+    extension = ".xlsm" if example_name == "macro" else ".xlsx"
+    candidates = [
+        root_dir / f"zig-{example_name}{extension}",
+        root_dir / "testing" / "zig-output-xls" / f"zig-{example_name}{extension}",
+    ]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    
+    print(f"Zig Excel file not found: {candidates[0]}")
+    return None
+
+
+def capture_excel_screenshot(c_excel_file, zig_excel_file, screenshot_file,
+                             top_crop=25, bottom_crop=155, left_crop=0, right_crop=0):
+    """
+    Capture the C and Zig Excel files side by side in Microsoft Excel (macOS only).
     
-    Args:
-        example_name: Name of the example to screenshot
-        top_crop: Pixels to crop from top (default: 25 for Excel title bar)
-        bottom_crop: Pixels to crop from bottom (default: 155 for Excel status bar)
-        left_crop: Pixels to crop from left (default: 0)
-        right_crop: Pixels to crop from right (default: 0)
+    Positions both files with excel-position.sh, takes a screenshot with the
+    macOS screencapture utility and crops the Excel window chrome.
     """
     if sys.platform != "darwin":
-        print("This script currently only supports macOS for automatic screenshots.")
+        print("The excel renderer only supports macOS. Use --renderer grid on other platforms.")
         return False
     
     root_dir = Path(__file__).parent.parent
-    screenshots_dir = root_dir / "testing" / "screenshots"
-    comparison_dir = root_dir / "testing" / "comparison_results"
-    
-    # Create directories if they don't exist
-    screenshots_dir.mkdir(parents=True, exist_ok=True)
-    comparison_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Determine the screenshot filename
-    screenshot_file = screenshots_dir / f"comparison_{example_name}.png"
-    
-    # Build the example
-    if not build_example(example_name):
-        return False
-    
-    # Get the C Excel file
-    c_excel_file = get_c_excel_file(example_name)
-    if not c_excel_file:
-        return False
-    
-    # Determine the Zig Excel file path
-    extension = ".xlsm" if example_name == "macro" else ".xlsx"
-    zig_excel_file = root_dir / f"zig-{example_name}{extension}"
-    
-    if not zig_excel_file.exists():
-        print(f"Zig Excel file not found: {zig_excel_file}")
-        return False
     
     # Position Excel files side by side
     excel_position_script = root_dir / "utils" / "excel-position.sh"
@@ -200,7 +188,7 @@ def take_screenshot(example_name, top_crop=25, bottom_crop=155, left_crop=0, rig
     time.sleep(3)
     
     # Take screenshot using screencapture
-    relative_screenshot_path = f"testing/screenshots/comparison_{example_name}.png"
+    relative_screenshot_path = os.path.relpath(screenshot_file, root_dir)
     print(f"Taking screenshot and saving to: {relative_screenshot_path}")
     try:
         subprocess.run([
@@ -220,11 +208,17 @@ def take_screenshot(example_name, top_crop=25, bottom_crop=155, left_crop=0, rig
         print(f"Error taking screenshot: {e}")
         return False
     
-    # Check if the screenshot was saved
-    if screenshot_file.exists():
-        print(f"Screenshot saved: {relative_screenshot_path}")
-        
-        # Open the screenshot for the user to view
+    return True
+
+
+def review_screenshot(screenshot_file):
+    """
+    Show a screenshot to the user and ask whether the outputs match.
+    
+    Returns:
+        bool: True if the user confirmed a visual match
+    """
+    if sys.platform == "darwin":
         print("\nOpening screenshot for review...")
         try:
             # Open the screenshot with Preview
@@ -249,40 +243,209 @@ def take_screenshot(example_name, top_crop=25, bottom_crop=155, left_crop=0, rig
         except subprocess.CalledProcessError as e:
             print(f"Error opening screenshot: {e}")
             # Continue anyway, as this is not critical
+    else:
+        print(f"\nReview the screenshot at: {screenshot_file}")
+    
+    # Ask user if outputs match
+    print("\n=== VISUAL COMPARISON ===")
+    print("Do the C and Zig outputs match? (y/n)")
+    user_input = input("Enter y or n: ").lower()
+    return user_input == 'y'
+
+
+def compare_rendered_halves(screenshot_file):
+    """
+    Compare the C and Zig halves of a rendered comparison image.
+    
+    Headless renderers are deterministic, so the halves only match when every
+    pixel is identical. The SSIM threshold of image_compare is tuned for noisy
+    Excel window captures and would accept changed cell values here.
+    
+    Returns:
+        tuple: (match, message)
+    """
+    c_half, zig_half = image_compare.split_comparison(screenshot_file)
+    c_array = image_compare.np.asarray(c_half)
+    zig_array = image_compare.np.asarray(zig_half)
+    if c_array.shape != zig_array.shape:
+        return False, "rendered halves differ in size"
+    differing = int(image_compare.np.count_nonzero(c_array != zig_array))
+    if differing == 0:
+        return True, "identical pixels"
+    return False, f"{differing} pixels differ"
+
+
+def save_comparison_result(example_name, c_excel_file, matched, reason):
+    """Write the comparison result file read by evaluate.py."""
+    root_dir = Path(__file__).parent.parent
+    comparison_dir = root_dir / "testing" / "comparison_results"
+    comparison_dir.mkdir(parents=True, exist_ok=True)
+    extension = ".xlsm" if example_name == "macro" else ".xlsx"
+    
+    result_file = comparison_dir / f"{example_name}_output.txt"
+    with open(result_file, 'w') as f:
+        f.write(f"Comparison of {example_name} screenshots:\n")
+        # Use relative paths instead of full paths
+        c_relative_path = f"testing/c-output-xls/{os.path.basename(c_excel_file)}"
+        zig_relative_path = f"testing/zig-output-xls/zig-{example_name}{extension}"
+        screenshot_relative_path = f"testing/screenshots/comparison_{example_name}.png"
         
-        # Ask user if outputs match
-        print("\n=== VISUAL COMPARISON ===")
-        print("Do the C and Zig outputs match? (y/n)")
-        user_input = input("Enter y or n: ").lower()
+        f.write(f"C Excel file: {c_relative_path}\n")
+        f.write(f"Zig Excel file: {zig_relative_path}\n")
+        f.write(f"Screenshot: {screenshot_relative_path}\n\n")
         
-        # Save comparison result
-        result_file = comparison_dir / f"{example_name}_output.txt"
-        with open(result_file, 'w') as f:
-            f.write(f"Comparison of {example_name} screenshots:\n")
-            # Use relative paths instead of full paths
-            c_relative_path = f"testing/c-output-xls/{os.path.basename(c_excel_file)}"
-            zig_relative_path = f"testing/zig-output-xls/zig-{example_name}{extension}"
-            screenshot_relative_path = f"testing/screenshots/comparison_{example_name}.png"
-            
-            f.write(f"C Excel file: {c_relative_path}\n")
-            f.write(f"Zig Excel file: {zig_relative_path}\n")
-            f.write(f"Screenshot: {screenshot_relative_path}\n\n")
-            
-            if user_input == 'y':
-                f.write("RESULT: MATCH - User confirmed visual match\n")
-                print("✅ Visual match confirmed.")
-                
-                # Move the Zig Excel file to the output directory
-                cleanup_excel_file(example_name, zig_excel_file)
-                
-                return True
-            else:
-                f.write("RESULT: DIFFERENT - User reported visual differences\n")
-                print("❌ Visual differences reported.")
-                return False
+        if matched:
+            f.write(f"RESULT: MATCH - {reason}\n")
+        else:
+            f.write(f"RESULT: DIFFERENT - {reason}\n")
+
+
+def take_screenshot(example_name, top_crop=25, bottom_crop=155, left_crop=0, right_crop=0,
+                    force=False, renderer="excel", review=None, build=True):
+    """
+    Take a screenshot of both C and Zig Excel files side by side.
+    
+    This function:
+    1. Builds the Zig example
+    2. Captures both C and Zig Excel files side by side, either in Excel
+       (macOS) or with a headless renderer from render.py
+    3. Asks the user if the outputs match and records the verdict. Without a
+       review, headless renders are only checked for identical pixels and no
+       verdict is recorded.
+    4. If they match, moves the Zig Excel file to the zig-output-xls directory
+    
+    Args:
+        example_name: Name of the example to screenshot
+        top_crop: Pixels to crop from top (default: 25 for Excel title bar)
+        bottom_crop: Pixels to crop from bottom (default: 155 for Excel status bar)
+        left_crop: Pixels to crop from left (default: 0)
+        right_crop: Pixels to crop from right (default: 0)
+        force: Take the screenshot even if the verification manifest holds a
+               visual match for the current inputs
+        renderer: "excel" for Microsoft Excel on macOS, or the name of a
+                  headless renderer registered in render.py
+        review: Ask the user to confirm the match. Defaults to True for the
+                excel renderer and False for headless renderers.
+        build: Build the Zig example before capturing
+    """
+    if review is None:
+        review = renderer == "excel"
+    
+    # Skip the whole build and review cycle if nothing changed since the last match
+    verification_manifest = manifest.load_manifest()
+    if not force:
+        inputs = manifest.compute_inputs(verification_manifest, example_name)
+        manifest.save_manifest(verification_manifest)
+        if manifest.get_verdict(verification_manifest, example_name, inputs, "visual") == "MATCH":
+            print(f"✅ Inputs of '{example_name}' unchanged since the last visual match, skipping.")
+            print("Use --force to take a new screenshot anyway.")
+            return True
+    
+    if renderer == "excel" and sys.platform != "darwin":
+        print("This script currently only supports macOS for automatic screenshots.")
+        print("Use --renderer grid for headless rendering.")
+        return False
+    
+    root_dir = Path(__file__).parent.parent
+    screenshots_dir = root_dir / "testing" / "screenshots"
+    
+    # Create directories if they don't exist
+    screenshots_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Determine the screenshot filename
+    screenshot_file = screenshots_dir / f"comparison_{example_name}.png"
+    relative_screenshot_path = f"testing/screenshots/comparison_{example_name}.png"
+    
+    # Build the example
+    if build and not build_example(example_name):
+        return False
+    
+    # Get the C Excel file
+    c_excel_file = get_c_excel_file(example_name)
+    if not c_excel_file:
+        return False
+    
+    # Determine the Zig Excel file path
+    zig_excel_file = get_zig_excel_file(example_name)
+    if not zig_excel_file:
+        return False
+    
+    if renderer == "excel":
+        captured = capture_excel_screenshot(
+            c_excel_file, zig_excel_file, screenshot_file,
+            top_crop, bottom_crop, left_crop, right_crop,
+        )
     else:
+        print(f"Rendering with the {renderer} renderer to: {relative_screenshot_path}")
+        captured = render.render_comparison(c_excel_file, zig_excel_file, screenshot_file, renderer)
+    
+    # Check if the screenshot was saved
+    if not captured or not screenshot_file.exists():
         print(f"Screenshot not found at: {screenshot_file}")
         return False
+    print(f"Screenshot saved: {relative_screenshot_path}")
+    
+    if not review:
+        # A headless render leaves out charts, images and most formatting, so
+        # it never records a verdict; the structural diff of evaluate.py does
+        matched, difference = compare_rendered_halves(screenshot_file)
+        status = "✅" if matched else "❌"
+        print(f"{status} {renderer} renderer: {difference}.")
+        print("No verdict recorded. Use --review to record a visual verdict.")
+        return matched
+    
+    matched = review_screenshot(screenshot_file)
+    reason = ("User confirmed visual match" if matched
+              else "User reported visual differences")
+    
+    save_comparison_result(example_name, c_excel_file, matched, reason)
+    if matched:
+        print("✅ Visual match confirmed.")
+        
+        # Move the Zig Excel file to the output directory
+        if zig_excel_file.parent == root_dir:
+            cleanup_excel_file(example_name, zig_excel_file)
+    else:
+        print("❌ Visual differences reported.")
+    
+    # Record the verdict against the inputs it was based on
+    inputs = manifest.compute_inputs(verification_manifest, example_name)
+    manifest.record_verdict(
+        verification_manifest, example_name, inputs,
+        "MATCH" if matched else "DIFFERENT", "visual",
+    )
+    manifest.save_manifest(verification_manifest)
+    return matched
+
+
+def render_missing_screenshots(examples, renderer="grid", max_workers=None):
+    """
+    Render comparison images for examples without screenshots on a process pool.
+    
+    Only examples with both C and Zig Excel output are rendered. Nothing is
+    built and no verdicts are recorded; run take_screenshot() with a review
+    per example for that.
+    
+    Returns:
+        int: Number of examples rendered
+    """
+    root_dir = Path(__file__).parent.parent
+    screenshots_dir = root_dir / "testing" / "screenshots"
+    screenshots_dir.mkdir(parents=True, exist_ok=True)
+    
+    jobs = []
+    for example in examples:
+        c_excel_file = get_c_excel_file(example)
+        zig_excel_file = get_zig_excel_file(example)
+        if c_excel_file and zig_excel_file:
+            screenshot_file = screenshots_dir / f"comparison_{example}.png"
+            jobs.append((c_excel_file, zig_excel_file, screenshot_file, renderer))
+    
+    results = render.render_many(jobs, max_workers)
+    for (_, _, screenshot_file, _), success in zip(jobs, results):
+        status = "✅" if success else "❌"
+        print(f"{status} {os.path.relpath(screenshot_file, root_dir)}")
+    return sum(results)
 
 
 def take_simple_screenshot(screenshot_file, top_crop=25, bottom_crop=30, left_crop=0, right_crop=0):
@@ -342,6 +505,18 @@ def main():
     parser.add_argument("--top", type=int, default=0, help="Pixels to crop from top")
     parser.add_argument("--bottom", type=int, default=0, help="Pixels to crop from bottom")
     parser.add_argument("--crop", help="Just crop an existing PNG file")
+    parser.add_argument("--renderer", default="excel" if sys.platform == "darwin" else "grid",
+                        choices=["excel"] + sorted(render.RENDERERS),
+                        help="Screenshot backend: excel (macOS) or a headless renderer "
+                             "(default: excel on macOS, grid elsewhere)")
+    parser.add_argument("--review", action=argparse.BooleanOptionalAction, default=None,
+                        help="Ask for a y/n visual review (default: only with the excel renderer)")
+    parser.add_argument("--render", action="store_true",
+                        help="With --list, render all examples without screenshots in parallel")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes for --render (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Take a new screenshot even if the inputs are unchanged since the last match")
     
     args = parser.parse_args()
     
@@ -376,6 +551,14 @@ def main():
             for example in missing:
                 print(f"{example:<25}")
             print(f"\nTotal: {len(missing)} examples missing screenshots")
+            
+            if args.render:
+                if args.renderer == "excel":
+                    print("--render needs a headless renderer, e.g. --renderer grid")
+                    return 1
+                print(f"\nRendering with the {args.renderer} renderer...")
+                rendered = render_missing_screenshots(missing, args.renderer, args.jobs)
+                print(f"Rendered {rendered} of {len(missing)} examples.")
         else:
             print("All examples have screenshots!")
         return 0
@@ -401,6 +584,9 @@ def main():
         bottom_crop=155 if args.bottom == 0 else args.bottom,
         left_crop=args.left,
         right_crop=args.right,
+        force=args.force,
+        renderer=args.renderer,
+        review=args.review,
     )
     
     return 0 if success else 1
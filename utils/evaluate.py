@@ -9,19 +9,30 @@ C and Zig implementations.
 import os
 import sys
 import datetime
-import re
 import argparse
-import time
 import signal
+import zipfile
 from pathlib import Path
 import shutil
-import shutil as sh  # for terminal size
+from concurrent.futures import ProcessPoolExecutor
+
+import xlsx_diff
+import xlsx_validate
+import monitor
+import manifest
 
 # Global state for monitoring
 monitoring_state = {
     'current_time': None,
+    'snapshot': None,     # Last snapshot from take_snapshot()
+    'statuses': {},       # Example name to status for the current snapshot
+    'rows': {},           # Example name to screen line of its row
+    'watcher': None,      # monitor.InotifyWatcher or monitor.PollingWatcher
 }
 
+# Lines printed by redraw_screen() before the example table
+MONITOR_PREAMBLE_LINES = 2
+
 # Add function to clear terminal screen
 def clear_screen():
     """Clear the terminal screen."""
@@ -32,37 +43,28 @@ def clear_screen():
         os.system('clear')
 
 
-def get_example_status(example_name):
+def get_example_status(example_name, state=None):
     """
     Determine the status of an example based on implementation and verification.
     
+    Args:
+        example_name: The name of the example
+        state: Optional state entry from take_snapshot(). If omitted, the
+               state of this example alone is collected from disk.
+    
     Returns:
         tuple: (status, message)
-            status: "DONE" if fully implemented and verified, "IN PROGRESS" if implemented but not verified, "NOT_STARTED" if not implemented
+            status: "DONE" if fully implemented and verified, "IN_PROGRESS" if implemented but not verified, "NOT_STARTED" if not implemented
             message: Detailed message about the status
     """
-    # Check if the example file exists
-    file_exists, _ = check_example_file_exists(example_name)
-    
-    # Check if screenshots exist
-    screenshots_exist = check_screenshots_exist(example_name)
-    
-    # Check comparison results
-    comparison_match = False
-    if screenshots_exist:
-        comparison_match, _ = check_comparison_results(example_name)
-    
-    # Check if Excel output exists with correct name
-    root_dir = Path(__file__).parent.parent
-    extension = ".xlsm" if example_name == "macro" else ".xlsx"
-    excel_file = root_dir / "testing" / "zig-output-xls" / f"zig-{example_name}{extension}"
-    excel_exists = excel_file.exists()
+    if state is None:
+        state = take_snapshot([example_name])[example_name]
     
     # Determine status
-    if file_exists and screenshots_exist and comparison_match and excel_exists:
+    if state['zig_exists'] and state['excel_exists'] and state['verified']:
         status = "DONE"
         message = f"✅ Example '{example_name}' is fully implemented and verified."
-    elif file_exists:
+    elif state['zig_exists']:
         status = "IN_PROGRESS"
         message = f"⚠️ Example '{example_name}' is implemented but not fully verified."
     else:
@@ -72,6 +74,230 @@ def get_example_status(example_name):
     return status, message
 
 
+# Verification results keyed by example and the stat signatures of its inputs,
+# so repeated snapshots only re-read files that changed on disk.
+_verification_cache = {}
+
+# Persistent verification manifest, loaded on first use
+_verification_manifest = None
+
+
+def get_verification_manifest():
+    """Load the verification manifest once per process."""
+    global _verification_manifest
+    if _verification_manifest is None:
+        _verification_manifest = manifest.load_manifest()
+    return _verification_manifest
+
+
+def scan_directory(path):
+    """Scan a directory once and return a dict of file name to os.DirEntry."""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name: entry for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return {}
+
+
+def probe_directory(path, names):
+    """Stat only the given names in a directory and return a dict of name to os.stat_result."""
+    found = {}
+    for name in names:
+        try:
+            found[name] = os.stat(Path(path) / name)
+        except FileNotFoundError:
+            pass
+    return found
+
+
+def _stat_signature(entry):
+    """Return a cheap change signature for a directory entry or stat result, or None."""
+    if entry is None:
+        return None
+    stat = entry.stat() if isinstance(entry, os.DirEntry) else entry
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cached_verification(example_name, result_entry, excel_entry, reference_entry=None,
+                         wrapper_hash=None):
+    """
+    Return the verification of an example if it needs no Excel comparison.
+    
+    Verifications are cached by the stat signatures of the comparison result
+    file and both Excel files, and by the hash of the wrapper. Otherwise
+    the comparison result file is read and, whenever a Zig Excel file exists,
+    the verification manifest is consulted for a structural verdict on
+    identical inputs.
+    
+    Returns:
+        tuple: (key, comparison_match, structural_match, inputs), where
+               structural_match is None when there is no structural verdict
+               and inputs holds the input hashes when the Excel outputs still
+               have to be compared
+    """
+    key = (example_name, _stat_signature(result_entry), _stat_signature(excel_entry),
+           _stat_signature(reference_entry), wrapper_hash)
+    if key in _verification_cache:
+        return (key, *_verification_cache[key], None)
+    
+    comparison_match = False
+    if result_entry is not None:
+        comparison_match, _ = check_comparison_results(example_name)
+    
+    if excel_entry is None:
+        _verification_cache[key] = (comparison_match, None)
+        return key, comparison_match, None, None
+    
+    verification_manifest = get_verification_manifest()
+    inputs = manifest.compute_inputs(verification_manifest, example_name, wrapper_hash)
+    verdict = manifest.get_verdict(verification_manifest, example_name, inputs, "structural")
+    if verdict is None:
+        return key, comparison_match, None, inputs
+    
+    _verification_cache[key] = (comparison_match, verdict == "MATCH")
+    return key, comparison_match, verdict == "MATCH", None
+
+
+def is_verified(comparison_match, structural_match):
+    """
+    Combine the comparison result file and the structural verdict.
+    
+    The structural verdict decides whenever there is one, so a DIFFERENT
+    verdict overrides a MATCH in a hand-written comparison result file. The
+    file only counts when the Excel outputs could not be compared.
+    """
+    if structural_match is None:
+        return comparison_match
+    return structural_match
+
+
+def verify_structural(example_name, wrapper_hash=None):
+    """
+    Structurally verify an example, skipping the comparison if the manifest
+    holds a verdict for identical inputs.
+    
+    Returns:
+        bool: True if the C and Zig Excel files match
+    """
+    verification_manifest = get_verification_manifest()
+    inputs = manifest.compute_inputs(verification_manifest, example_name, wrapper_hash)
+    verdict = manifest.get_verdict(verification_manifest, example_name, inputs, "structural")
+    if verdict is not None:
+        return verdict == "MATCH"
+    
+    match, _ = xlsx_diff.compare_example(example_name)
+    if match is None:
+        return False
+    
+    verdict = "MATCH" if match else "DIFFERENT"
+    manifest.record_verdict(verification_manifest, example_name, inputs, verdict, "structural")
+    return match
+
+
+def take_snapshot(examples=None, max_workers=None):
+    """
+    Build an in-memory index of the state of every example.
+    
+    Each input directory is scanned exactly once with os.scandir. When a list
+    of examples is given, only their files are probed instead. Examples with
+    a fresh verdict in the verification manifest are answered from it; only
+    the remaining Excel comparisons, which are CPU bound, run in a process
+    pool that is started when the first one is needed.
+    
+    Args:
+        examples: Example names to include (default: all examples in examples/c)
+        max_workers: Size of the process pool (default: CPU count)
+    
+    Returns:
+        dict: Example name to a dict with the keys zig_exists, screenshot_exists,
+              excel_exists, comparison_match, structural_match and verified
+    """
+    root_dir = Path(__file__).parent.parent
+    testing_dir = root_dir / "testing"
+    
+    if examples is None:
+        zig_files = scan_directory(root_dir / "examples")
+        screenshots = scan_directory(testing_dir / "screenshots")
+        results = scan_directory(testing_dir / "comparison_results")
+        outputs = scan_directory(testing_dir / "zig-output-xls")
+        references = scan_directory(testing_dir / "c-output-xls")
+        c_files = scan_directory(root_dir / "examples" / "c")
+        examples = [name[:-2] for name in c_files if name.endswith(".c")]
+    else:
+        extensions = {ex: ".xlsm" if ex == "macro" else ".xlsx" for ex in examples}
+        zig_files = probe_directory(root_dir / "examples", [f"{ex}.zig" for ex in examples])
+        screenshots = probe_directory(testing_dir / "screenshots",
+                                      [f"comparison_{ex}.png" for ex in examples])
+        results = probe_directory(testing_dir / "comparison_results",
+                                  [f"{ex}_output.txt" for ex in examples])
+        outputs = probe_directory(testing_dir / "zig-output-xls",
+                                  [f"zig-{ex}{extensions[ex]}" for ex in examples])
+        references = probe_directory(testing_dir / "c-output-xls",
+                                     [f"{ex}{extensions[ex]}" for ex in examples])
+    
+    snapshot = {}
+    pending = {}
+    wrapper_hash = None
+    if outputs:
+        wrapper_hash = manifest.hash_wrapper(get_verification_manifest())
+    
+    pool = None
+    try:
+        for example in examples:
+            extension = ".xlsm" if example == "macro" else ".xlsx"
+            screenshot_exists = f"comparison_{example}.png" in screenshots
+            excel_entry = outputs.get(f"zig-{example}{extension}")
+            
+            # Comparison results only count when the screenshot is present
+            result_entry = None
+            if screenshot_exists:
+                result_entry = results.get(f"{example}_output.txt")
+            
+            state = snapshot[example] = {
+                'zig_exists': f"{example}.zig" in zig_files,
+                'screenshot_exists': screenshot_exists,
+                'excel_exists': excel_entry is not None,
+                'comparison_match': False,
+                'structural_match': False,
+                'verified': False,
+            }
+            if result_entry is None and excel_entry is None:
+                continue
+            
+            key, comparison_match, structural_match, inputs = _cached_verification(
+                example, result_entry, excel_entry, references.get(f"{example}{extension}"),
+                wrapper_hash)
+            state['comparison_match'] = comparison_match
+            if inputs is not None:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=max_workers)
+                future = pool.submit(xlsx_diff.compare_example, example)
+                pending[future] = (example, key, inputs)
+                continue
+            
+            state['structural_match'] = bool(structural_match)
+            state['verified'] = is_verified(comparison_match, structural_match)
+        
+        for future, (example, key, inputs) in pending.items():
+            match, _ = future.result()
+            if match is not None:
+                verdict = "MATCH" if match else "DIFFERENT"
+                manifest.record_verdict(get_verification_manifest(), example, inputs,
+                                        verdict, "structural")
+            state = snapshot[example]
+            _verification_cache[key] = (state['comparison_match'], match)
+            state['structural_match'] = bool(match)
+            state['verified'] = is_verified(state['comparison_match'], match)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    if outputs:
+        manifest.save_manifest(get_verification_manifest())
+    
+    return snapshot
+
+
 def check_example_file_exists(example_name):
     """Check if the example file exists in the examples directory."""
     root_dir = Path(__file__).parent.parent
@@ -114,6 +340,23 @@ def check_implementation_freshness(example_name):
         return False, f"⚠️ C implementation is newer ({abs(time_diff.days)} days, {abs(time_diff.seconds//3600)} hours)"
 
 
+def check_manifest_freshness(example_name):
+    """Check if the verification manifest holds a verdict for the current inputs."""
+    verification_manifest = get_verification_manifest()
+    inputs = manifest.compute_inputs(verification_manifest, example_name)
+    manifest.save_manifest(verification_manifest)
+    
+    recorded = verification_manifest["examples"].get(example_name)
+    if not recorded:
+        return None, "❓ No verdict recorded in the verification manifest."
+    
+    for method in sorted(recorded):
+        verdict = manifest.get_verdict(verification_manifest, example_name, inputs, method)
+        if verdict is not None:
+            return True, f"✅ Manifest {method} verdict is current: {verdict}"
+    return False, "⚠️ Inputs changed since the last recorded verdict - re-verification needed."
+
+
 def check_screenshots_exist(example_name):
     """Check if a screenshot exists for the example."""
     root_dir = Path(__file__).parent.parent
@@ -142,54 +385,61 @@ def check_comparison_results(example_name):
         return False, f"❌ Visual comparison indicates differences."
 
 
+def check_structural_match(example_name):
+    """Structurally compare the C and Zig Excel files part by part."""
+    c_file, zig_file = xlsx_diff.get_excel_paths(example_name)
+    if c_file.exists() and zig_file.exists():
+        try:
+            result = xlsx_diff.hash_compare(c_file, zig_file)
+        except zipfile.BadZipFile:
+            result = None
+        if result == "identical":
+            return True, f"✅ Excel files are byte-identical (SHA-256)."
+        if result == "equivalent":
+            return True, f"✅ Excel parts match by CRC and size (content digest)."
+
+    match, diffs = xlsx_diff.compare_example(example_name, use_hash=False)
+    
+    if match is None:
+        return False, f"❓ Structural comparison skipped: {diffs[0]}"
+    elif match:
+        return True, f"✅ Structural comparison indicates a match."
+    else:
+        details = "\n".join(f"    {diff}" for diff in diffs)
+        return False, f"❌ Structural comparison found {len(diffs)} differences:\n{details}"
+
+
+def check_package_valid(example_name):
+    """Validate the Zig Excel file as an OOXML package."""
+    result = xlsx_validate.validate_example(example_name)
+    if result is None:
+        return None, "❓ Package validation skipped: no Zig Excel file."
+    if result['valid']:
+        return True, f"✅ Zig Excel file is a valid package ({result['parts']} parts)."
+    details = "\n".join(f"    {error}" for error in result['errors'])
+    return False, f"❌ Zig Excel file is not a valid package, {len(result['errors'])} errors:\n{details}"
+
+
 def compare_screenshots(example_name):
     """Compare screenshots of C and Zig implementations using image similarity."""
-    try:
-        from PIL import Image
-        import numpy as np
-    except ImportError:
-        return None, "⚠️ PIL or numpy not installed. Cannot perform image comparison."
-    
-    root_dir = Path(__file__).parent.parent
-    screenshots_dir = root_dir / "testing" / "screenshots"
-    
-    # Handle special case for conditional_format1
+    # Older separate screenshots of conditional_format1 use another name
     screenshot_name = example_name
-    if example_name == "conditional_format1":
+    if example_name == "conditional_format1" and not check_screenshots_exist(example_name):
         screenshot_name = "conditional_format_simple"
     
-    c_screenshot = screenshots_dir / f"c_{screenshot_name}.png"
-    zig_screenshot = screenshots_dir / f"zig_{screenshot_name}.png"
-    
-    if not c_screenshot.exists() or not zig_screenshot.exists():
-        return None, "⚠️ Cannot compare - one or both screenshots missing."
-    
-    try:
-        # Load images
-        c_img = Image.open(c_screenshot)
-        zig_img = Image.open(zig_screenshot)
-        
-        # Resize to same dimensions for comparison
-        if c_img.size != zig_img.size:
-            zig_img = zig_img.resize(c_img.size)
-        
-        # Convert to numpy arrays
-        c_array = np.array(c_img)
-        zig_array = np.array(zig_img)
-        
-        # Calculate mean squared error
-        mse = np.mean((c_array - zig_array) ** 2)
-        
-        # Calculate structural similarity (simplified)
-        similarity = 1 - (mse / 255**2)
-        
-        if similarity > 0.95:
-            return True, f"✅ Screenshots are visually similar ({similarity:.2%} match)."
-        else:
-            return False, f"❌ Screenshots differ significantly ({similarity:.2%} match)."
-    
-    except Exception as e:
-        return None, f"⚠️ Error comparing images: {str(e)}"
+    # Both need PIL and numpy, so they are imported only here and a
+    # missing dependency raises ImportError to the caller
+    import image_compare
+    import phash_index
+
+    # The screenshot index answers without decoding the PNGs when the
+    # hashes agree; anything else gets the full SSIM comparison. Both use
+    # the halves of comparison_<name>.png when there are no separate files.
+    unchanged, details = phash_index.check_unchanged(
+        phash_index.get_cached_index(), screenshot_name)
+    if unchanged:
+        return True, f"✅ Screenshots match by perceptual hash ({details})."
+    return image_compare.compare_example(screenshot_name)
 
 
 def is_example_fully_implemented(example_name):
@@ -252,10 +502,36 @@ def get_terminal_size():
         return 70, 24  # Fallback size
 
 
-def list_all_examples(is_monitor_mode=False):
-    """List all examples and their status."""
-    root_dir = Path(__file__).parent.parent
-    all_examples = get_all_examples()
+def format_example_row(example, state, status):
+    """Format the table row for an example."""
+    zig_exists = "✅" if state['zig_exists'] else "❌"
+    screenshots_status = "✅" if state['screenshot_exists'] else "❌"
+    
+    if state['screenshot_exists'] or state['excel_exists']:
+        visual_status = "✅" if state['verified'] else "❌"
+    else:
+        visual_status = "❓"
+    
+    if status == "DONE":
+        formatted_status = "DONE"
+    elif status == "IN_PROGRESS":
+        formatted_status = "IN PROGRESS"
+    else:
+        formatted_status = "NOT_STARTED"
+    
+    return f"{example:<30} {formatted_status:<20} {zig_exists:<5} {screenshots_status:<5} {visual_status:<5}"
+
+
+def list_all_examples(is_monitor_mode=False, snapshot=None):
+    """
+    List all examples and their status.
+    
+    In monitor mode the status and screen line of every displayed row are
+    recorded in monitoring_state so rows can later be redrawn individually.
+    """
+    if snapshot is None:
+        snapshot = take_snapshot()
+    all_examples = snapshot.keys()
     term_width, term_height = get_terminal_size()
     
     # Calculate available lines for examples (accounting for headers and summary)
@@ -267,9 +543,11 @@ def list_all_examples(is_monitor_mode=False):
     not_started = []
     in_progress = []
     done = []
+    statuses = {}
     
     for example in sorted(all_examples):
-        status, _ = get_example_status(example)
+        status, _ = get_example_status(example, snapshot[example])
+        statuses[example] = status
         if status == "DONE":
             done.append(example)
         elif status == "IN_PROGRESS":
@@ -287,35 +565,19 @@ def list_all_examples(is_monitor_mode=False):
     print(f"{'-' * min(70, term_width)}")
     
     displayed_examples = 0
+    separators = 0
     max_to_display = max_example_lines - 1 if is_monitor_mode else float('inf')
+    rows = {}
     
     # Helper function to print example info
     def print_example_info(example):
         nonlocal displayed_examples
         if displayed_examples >= max_to_display:
             return False
-            
-        status, _ = get_example_status(example)
-        zig_file = root_dir / "examples" / f"{example}.zig"
-        zig_exists = "✅" if zig_file.exists() else "❌"
-        
-        screenshots_exist = check_screenshots_exist(example)
-        screenshots_status = "✅" if screenshots_exist else "❌"
-        
-        if screenshots_exist:
-            comparison_match, _ = check_comparison_results(example)
-            visual_status = "✅" if comparison_match else "❌"
-        else:
-            visual_status = "❓"
-        
-        if status == "DONE":
-            formatted_status = "DONE"
-        elif status == "IN_PROGRESS":
-            formatted_status = "IN PROGRESS"
-        else:
-            formatted_status = "NOT_STARTED"
         
-        print(f"{example:<30} {formatted_status:<20} {zig_exists:<5} {screenshots_status:<5} {visual_status:<5}")
+        # Screen lines are 1-based: preamble, then 3 header lines, then rows
+        rows[example] = MONITOR_PREAMBLE_LINES + header_lines + separators + displayed_examples + 1
+        print(format_example_row(example, snapshot[example], statuses[example]))
         displayed_examples += 1
         return True
 
@@ -327,6 +589,7 @@ def list_all_examples(is_monitor_mode=False):
     if in_progress and displayed_examples < max_to_display:
         if displayed_examples > 0:
             print(f"{'-' * min(70, term_width)}")  # Separator between groups
+            separators += 1
         for example in in_progress:
             if not print_example_info(example):
                 break
@@ -334,6 +597,7 @@ def list_all_examples(is_monitor_mode=False):
     if done and displayed_examples < max_to_display:
         if displayed_examples > 0:
             print(f"{'-' * min(70, term_width)}")  # Separator between groups
+            separators += 1
         for example in done:
             if not print_example_info(example):
                 break
@@ -348,6 +612,11 @@ def list_all_examples(is_monitor_mode=False):
     print(f"Progress: {done_count/total*100:.1f}% complete,") 
     print(f"{(done_count+in_progress_count)/total*100:.1f}% in progress or complete")
     print(f"{'=' * min(70, term_width)}", end='')
+    
+    if is_monitor_mode:
+        monitoring_state['snapshot'] = snapshot
+        monitoring_state['statuses'] = statuses
+        monitoring_state['rows'] = rows
 
 
 def get_c_excel_file(example_name):
@@ -397,6 +666,13 @@ def cleanup_excel_file(example_name, zig_excel_file):
         return False
 
 
+def format_monitor_header():
+    """Format the monitor mode status line."""
+    watcher = monitoring_state['watcher']
+    backend = f" ({watcher.backend})" if watcher else ""
+    return f"Last update: {monitoring_state['current_time']}{backend}".ljust(48) + "[Press Ctrl+C to exit]"
+
+
 def redraw_screen():
     """Redraw the screen with current state."""
     if not monitoring_state['current_time']:
@@ -404,8 +680,9 @@ def redraw_screen():
         
     clear_screen()
     print("")
-    print(f"Last update: {monitoring_state['current_time']}".ljust(48) + "[Press Ctrl+C to exit]")
-    list_all_examples(is_monitor_mode=True)
+    print(format_monitor_header())
+    list_all_examples(is_monitor_mode=True, snapshot=monitoring_state['snapshot'])
+    sys.stdout.flush()
 
 
 def handle_resize(signum, frame):
@@ -413,10 +690,123 @@ def handle_resize(signum, frame):
     redraw_screen()
 
 
+def update_changed_rows(changed_examples):
+    """
+    Recompute the state of the changed examples and redraw only their rows.
+    
+    Falls back to a full redraw when an example moves between status groups,
+    or when examples are added or removed, since the table layout changes.
+    """
+    snapshot = dict(monitoring_state['snapshot'])
+    statuses = monitoring_state['statuses']
+    rows = monitoring_state['rows']
+    
+    refreshed = take_snapshot(sorted(changed_examples))
+    c_dir = Path(__file__).parent.parent / "examples" / "c"
+    
+    needs_full_redraw = False
+    redraw = []
+    for example, state in refreshed.items():
+        is_known = example in snapshot
+        is_listed = (c_dir / f"{example}.c").exists()
+        if is_known != is_listed:
+            needs_full_redraw = True
+        if not is_listed:
+            snapshot.pop(example, None)
+            continue
+        
+        snapshot[example] = state
+        if not is_known:
+            continue
+        if get_example_status(example, state)[0] != statuses.get(example):
+            needs_full_redraw = True
+        elif example in rows:
+            redraw.append(example)
+    
+    monitoring_state['current_time'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    monitoring_state['snapshot'] = snapshot
+    
+    if needs_full_redraw:
+        redraw_screen()
+        return
+    
+    # Move the cursor to each affected line, clear it and rewrite it
+    output = [f"\x1b[{MONITOR_PREAMBLE_LINES};1H\x1b[2K{format_monitor_header()}"]
+    for example in redraw:
+        row = format_example_row(example, snapshot[example], statuses[example])
+        output.append(f"\x1b[{rows[example]};1H\x1b[2K{row}")
+    sys.stdout.write("".join(output))
+    sys.stdout.flush()
+
+
+def run_monitor(interval, force_polling=False):
+    """
+    Run the monitor dashboard until interrupted.
+    
+    The watched directories are only rescanned for examples whose files
+    changed; a change to the Zig wrapper in src/ or to the build files
+    rescans every example. With inotify the process sleeps until something changes; the
+    polling fallback lists the directories every interval seconds.
+    """
+    root_dir = Path(__file__).parent.parent
+    testing_dir = root_dir / "testing"
+    watched_dirs = [
+        root_dir / "examples",
+        root_dir / "examples" / "c",
+        root_dir / "src",
+        testing_dir / "screenshots",
+        testing_dir / "comparison_results",
+        testing_dir / "c-output-xls",
+        testing_dir / "zig-output-xls",
+    ]
+    
+    missing_dirs = [path for path in watched_dirs if not path.is_dir()]
+    # The build root is watched for build.zig, and testing/ for new directories
+    watcher = monitor.create_watcher([root_dir, testing_dir] + watched_dirs, force_polling)
+    monitoring_state['watcher'] = watcher
+    monitoring_state['current_time'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    monitoring_state['snapshot'] = take_snapshot()
+    redraw_screen()
+    
+    try:
+        while True:
+            changes = watcher.wait(interval)
+            if not changes:
+                continue
+            
+            changed_examples = set()
+            full_rescan = False
+            for directory, file_name in changes:
+                # Directories created after startup (e.g. zig-output-xls) need a watch
+                if Path(directory) == testing_dir:
+                    for path in [p for p in missing_dirs if p.is_dir()]:
+                        missing_dirs.remove(path)
+                        watcher.add(path)
+                        full_rescan = True
+                    continue
+                # The wrapper and build files are inputs of every verdict
+                if file_name is None or monitor.is_shared_input(directory, file_name):
+                    full_rescan = True
+                    continue
+                example = monitor.example_for_file(directory, file_name)
+                if example:
+                    changed_examples.add(example)
+            
+            if full_rescan:
+                monitoring_state['current_time'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                monitoring_state['snapshot'] = take_snapshot()
+                redraw_screen()
+            elif changed_examples:
+                update_changed_rows(changed_examples)
+    finally:
+        watcher.close()
+        monitoring_state['watcher'] = None
+
+
 def display_monitor_status():
     """Display status of all examples in monitor mode."""
-    root_dir = Path(__file__).parent.parent
-    all_examples = get_all_examples()
+    snapshot = take_snapshot()
+    all_examples = snapshot.keys()
     term_width, term_height = get_terminal_size()
     
     # Calculate available lines for examples (accounting for headers and summary)
@@ -441,23 +831,11 @@ def display_monitor_status():
             print(f"... and {remaining} more examples ...")
             break
             
-        status, message = get_example_status(example)
-        
-        # Check if the example file exists
-        file_exists, file_message = check_example_file_exists(example)
-        
-        # Check if screenshots exist
-        screenshots_exist = check_screenshots_exist(example)
-        screenshots_message = "✅ Screenshots exist" if screenshots_exist else "❌ Screenshots do not exist"
-        
-        # Check comparison results
-        comparison_match = False
-        if screenshots_exist:
-            comparison_match, comparison_message = check_comparison_results(example)
+        status, message = get_example_status(example, snapshot[example])
         
         if status == "DONE":
             done_count += 1
-        elif status == "IN PROGRESS":
+        elif status == "IN_PROGRESS":
             in_progress_count += 1
         else:
             not_started_count += 1
@@ -473,12 +851,97 @@ def display_monitor_status():
     print(f"{'=' * min(70, term_width)}", end='')
 
 
+def display_bench(threshold, examples=None):
+    """
+    Show benchmark deltas between the latest run and the previous run on this host.
+    
+    Every metric is compared with benchmark.compare_samples(). The Zig
+    binary is also compared with the C binary from the same run, to catch
+    overhead added by the wrapper.
+    
+    Returns:
+        int: 0 if no regression crossed the threshold, 3 otherwise
+    """
+    import benchmark
+
+    history = benchmark.load_history()
+    if not history:
+        print("❌ No benchmark history. Run python3 utils/benchmark.py first.")
+        return 3
+    
+    current = history[-1]
+    baseline = None
+    for record in reversed(history[:-1]):
+        if record.get('host') == current.get('host'):
+            baseline = record
+            break
+    
+    print(f"Current:  {current['timestamp']} ({current.get('revision') or 'unknown revision'})")
+    if baseline:
+        print(f"Baseline: {baseline['timestamp']} ({baseline.get('revision') or 'unknown revision'})")
+    else:
+        print("Baseline: none (only comparing Zig with C)")
+    print(f"Regression threshold: {threshold:.1f}%\n")
+    
+    print(f"{'EXAMPLE':<30} {'WALL Δ':>8} {'CPU Δ':>8} {'RSS Δ':>8} {'ZIG/C':>8}  STATUS")
+    print("-" * 78)
+    
+    regressions = 0
+    for example, entry in sorted(current['results'].items()):
+        if examples and example not in examples:
+            continue
+        zig = entry.get('zig')
+        if not zig:
+            print(f"{example:<30} {'-':>8} {'-':>8} {'-':>8} {'-':>8}  ❓ no Zig samples")
+            continue
+        
+        columns = []
+        problems = []
+        base_zig = ((baseline or {}).get('results', {}).get(example) or {}).get('zig')
+        for metric in ('wall', 'cpu', 'rss'):
+            if not base_zig:
+                columns.append("-")
+                continue
+            delta, regressed = benchmark.compare_samples(base_zig[metric], zig[metric], threshold)
+            columns.append(f"{delta:+.1f}%")
+            if regressed:
+                problems.append(metric)
+        
+        c = entry.get('c')
+        if c:
+            overhead, regressed = benchmark.compare_samples(c['wall'], zig['wall'], threshold)
+            columns.append(f"{overhead:+.1f}%")
+            if regressed:
+                problems.append("overhead vs C")
+        else:
+            columns.append("-")
+        
+        status = "✅" if not problems else f"❌ {', '.join(problems)}"
+        if problems:
+            regressions += 1
+        print(f"{example:<30} {columns[0]:>8} {columns[1]:>8} {columns[2]:>8} {columns[3]:>8}  {status}")
+    
+    print("-" * 78)
+    if regressions:
+        print(f"❌ {regressions} examples regressed by more than {threshold:.1f}%")
+        return 3
+    print("✅ No significant regressions")
+    return 0
+
+
 def main():
     """Main function to evaluate an example."""
     parser = argparse.ArgumentParser(description="Evaluate the implementation status of examples")
     parser.add_argument("example", nargs="?", help="Example name to evaluate")
     parser.add_argument("--monitor", type=int, nargs="?", const=5, 
-                        help="Monitor mode: continuously update status every N seconds (default: 5)")
+                        help="Monitor mode: update status as files change, polling every N seconds "
+                             "when inotify is unavailable (default: 5)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Show benchmark deltas from utils/benchmark.py and exit with 3 on regression")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Regression threshold in percent for --bench (default: 10)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Use the polling backend in monitor mode even if inotify is available")
     parser.add_argument("--cleanup", action="store_true",
                         help="Move generated Excel file to zig-output-xls directory")
     
@@ -490,17 +953,14 @@ def main():
             # Set up resize handler
             signal.signal(signal.SIGWINCH, handle_resize)
             
-            while True:
-                monitoring_state['current_time'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                clear_screen()
-                print("")
-                print(f"Last update: {monitoring_state['current_time']}".ljust(48) + "[Press Ctrl+C to exit]")
-                list_all_examples(is_monitor_mode=True)
-                time.sleep(args.monitor)
+            run_monitor(args.monitor, force_polling=args.poll)
         except KeyboardInterrupt:
             print("\nMonitoring stopped.")
             return 0
     
+    if args.bench:
+        return display_bench(args.threshold, [args.example] if args.example else None)
+    
     if not args.example:
         # No example specified, list all examples
         list_all_examples(is_monitor_mode=False)
@@ -537,6 +997,18 @@ def main():
         is_fresh, fresh_message = check_implementation_freshness(args.example)
         print(fresh_message)
     
+    # Check if the recorded verdict still matches the inputs
+    _, manifest_message = check_manifest_freshness(args.example)
+    print(manifest_message)
+    
+    # Structurally compare the C and Zig Excel files
+    structural_match, structural_message = check_structural_match(args.example)
+    print(structural_message)
+
+    # Check that the Zig Excel file is a valid package
+    _, package_message = check_package_valid(args.example)
+    print(package_message)
+    
     # Check if screenshots exist
     screenshots_exist = check_screenshots_exist(args.example)
     screenshots_message = "✅ Screenshots exist" if screenshots_exist else "❌ Screenshots do not exist"
@@ -559,7 +1031,7 @@ def main():
     if status == "DONE":
         print("\n🎉 Example is fully implemented and verified!")
         return 0
-    elif status == "IN PROGRESS":
+    elif status == "IN_PROGRESS":
         print("\n🔧 Example is implemented but not fully verified.")
         return 1
     else:
@@ -0,0 +1,137 @@
+const std = @import("std");
+const registry = @import("registry");
+const mem = std.mem;
+
+// Runs the examples built into this binary by `zig build runner`, in one
+// process instead of one process per example. The registry module is
+// generated by build.zig and imports every example in examples/.
+//
+// Examples write their files to the current directory, as the separate
+// binaries do. An example that panics aborts the whole run.
+
+const Example = struct {
+    name: []const u8,
+    run: *const fn () anyerror!void,
+};
+
+const examples = blk: {
+    var table: [registry.examples.len]Example = undefined;
+    for (registry.examples, 0..) |entry, i| {
+        table[i] = .{ .name = entry[0], .run = wrapMain(entry[1]) };
+    }
+    const final = table;
+    break :blk &final;
+};
+
+/// Wraps an example's main, which returns either void or an error union
+fn wrapMain(comptime example: type) *const fn () anyerror!void {
+    return struct {
+        fn run() anyerror!void {
+            const Return = @typeInfo(@TypeOf(example.main)).@"fn".return_type.?;
+            if (@typeInfo(Return) == .error_union) {
+                try example.main();
+            } else {
+                example.main();
+            }
+        }
+    }.run;
+}
+
+const Result = struct {
+    example: *const Example,
+    err: ?anyerror = null,
+    nanoseconds: u64 = 0,
+
+    fn run(self: *Result) void {
+        var timer = std.time.Timer.start() catch unreachable;
+        self.example.run() catch |err| {
+            self.err = err;
+        };
+        self.nanoseconds = timer.read();
+    }
+};
+
+pub fn main() !void {
+    var gpa = std.heap.GeneralPurposeAllocator(.{}){};
+    defer _ = gpa.deinit();
+    const allocator = gpa.allocator();
+
+    const args = try std.process.argsAlloc(allocator);
+    defer std.process.argsFree(allocator, args);
+
+    var threads: usize = 0;
+    var selected = std.ArrayList(*const Example).init(allocator);
+    defer selected.deinit();
+
+    var i: usize = 1;
+    while (i < args.len) : (i += 1) {
+        const arg = args[i];
+        if (mem.eql(u8, arg, "--list")) {
+            const stdout = std.io.getStdOut().writer();
+            for (examples) |*example| try stdout.print("{s}\n", .{example.name});
+            return;
+        } else if (mem.eql(u8, arg, "--threads") or mem.eql(u8, arg, "-j")) {
+            i += 1;
+            if (i == args.len) return usage(args[0]);
+            threads = std.fmt.parseInt(usize, args[i], 10) catch return usage(args[0]);
+        } else if (mem.eql(u8, arg, "--help") or mem.eql(u8, arg, "-h")) {
+            return usage(args[0]);
+        } else {
+            const example = find(arg) orelse {
+                std.debug.print("Unknown example '{s}', see --list\n", .{arg});
+                std.process.exit(1);
+            };
+            try selected.append(example);
+        }
+    }
+    if (selected.items.len == 0) {
+        for (examples) |*example| try selected.append(example);
+    }
+
+    const results = try allocator.alloc(Result, selected.items.len);
+    defer allocator.free(results);
+    for (results, selected.items) |*result, example| result.* = .{ .example = example };
+
+    var timer = try std.time.Timer.start();
+    if (threads > 1) {
+        var pool: std.Thread.Pool = undefined;
+        try pool.init(.{ .allocator = allocator, .n_jobs = threads });
+        var wait_group = std.Thread.WaitGroup{};
+        for (results) |*result| pool.spawnWg(&wait_group, Result.run, .{result});
+        pool.waitAndWork(&wait_group);
+        pool.deinit();
+    } else {
+        for (results) |*result| result.run();
+    }
+    const total = timer.read();
+
+    var failed: usize = 0;
+    for (results) |result| {
+        const ms = @as(f64, @floatFromInt(result.nanoseconds)) / std.time.ns_per_ms;
+        if (result.err) |err| {
+            failed += 1;
+            std.debug.print("FAIL {s} ({d:.1} ms): {s}\n", .{ result.example.name, ms, @errorName(err) });
+        } else {
+            std.debug.print("ok   {s} ({d:.1} ms)\n", .{ result.example.name, ms });
+        }
+    }
+    std.debug.print("{d} examples, {d} failed in {d:.1} ms\n", .{
+        results.len,
+        failed,
+        @as(f64, @floatFromInt(total)) / std.time.ns_per_ms,
+    });
+    if (failed > 0) std.process.exit(1);
+}
+
+fn find(name: []const u8) ?*const Example {
+    for (examples) |*example| {
+        if (mem.eql(u8, example.name, name)) return example;
+    }
+    return null;
+}
+
+fn usage(prog_name: []const u8) void {
+    std.debug.print("Usage: {s} [--list] [--threads N] [example...]\n", .{std.fs.path.basename(prog_name)});
+    std.debug.print("\nRun the named examples, or all of them, in this process and time each one.\n", .{});
+    std.debug.print("With --threads N, up to N examples run at the same time.\n", .{});
+}
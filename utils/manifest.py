@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Content-hashed verification manifest.
+The manifest records, for every example, the hashes of all inputs that a
+verification verdict depends on together with the verdict itself. Tools use
+it to skip verification work whose inputs have not changed since the last run.
+
+The manifest is stored as JSON in testing/verification_manifest.json.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import datetime
+import argparse
+import threading
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+_lock = threading.Lock()
+
+# Set when the in-memory manifest differs from the file on disk
+_changed = False
+
+
+def get_manifest_path():
+    """Get the path of the verification manifest."""
+    root_dir = Path(__file__).parent.parent
+    return root_dir / "testing" / "verification_manifest.json"
+
+
+def load_manifest():
+    """Load the manifest, or return an empty one if it does not exist or is unreadable."""
+    try:
+        with open(get_manifest_path(), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": MANIFEST_VERSION, "hash_cache": {}, "examples": {}}
+
+
+def save_manifest(manifest, only_if_changed=True):
+    """Atomically write the manifest to disk."""
+    global _changed
+    if only_if_changed and not _changed:
+        return
+    path = get_manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with _lock:
+        _changed = False
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+
+def hash_file(manifest, path):
+    """
+    Return the SHA-256 of a file, or None if it does not exist.
+
+    Hashes are cached in the manifest by path, size and modification time,
+    so unchanged files are never read twice.
+    """
+    global _changed
+    root_dir = Path(__file__).parent.parent
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = os.path.relpath(path, root_dir)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    with _lock:
+        cached = manifest["hash_cache"].get(key)
+    if cached and cached["stat"] == signature:
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+
+    with _lock:
+        manifest["hash_cache"][key] = {"stat": signature, "sha256": sha256}
+        _changed = True
+    return sha256
+
+
+def hash_wrapper(manifest):
+    """Return a combined hash of the Zig wrapper sources and build files."""
+    root_dir = Path(__file__).parent.parent
+    paths = sorted((root_dir / "src").glob("*.zig"))
+    paths += [root_dir / "build.zig", root_dir / "build.zig.zon"]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, root_dir).encode())
+        digest.update((hash_file(manifest, path) or "-").encode())
+    return digest.hexdigest()
+
+
+def compute_inputs(manifest, example_name, wrapper_hash=None):
+    """
+    Hash every input that a verdict for this example depends on.
+
+    Args:
+        manifest: The loaded manifest, used as the hash cache
+        example_name: The name of the example
+        wrapper_hash: Precomputed result of hash_wrapper(), to avoid
+                      recomputing it for every example in a batch
+
+    Returns:
+        dict: Input name to hash, None for inputs that do not exist
+    """
+    root_dir = Path(__file__).parent.parent
+    extension = ".xlsm" if example_name == "macro" else ".xlsx"
+    testing_dir = root_dir / "testing"
+
+    return {
+        "zig_source": hash_file(manifest, root_dir / "examples" / f"{example_name}.zig"),
+        "wrapper": wrapper_hash or hash_wrapper(manifest),
+        "c_output": hash_file(manifest, testing_dir / "c-output-xls" / f"{example_name}{extension}"),
+        "zig_output": hash_file(
+            manifest, testing_dir / "zig-output-xls" / f"zig-{example_name}{extension}"),
+        "screenshot": hash_file(
+            manifest, testing_dir / "screenshots" / f"comparison_{example_name}.png"),
+    }
+
+
+def get_verdict(manifest, example_name, inputs, method):
+    """
+    Return the recorded verdict if none of the inputs changed since it was recorded.
+
+    Args:
+        manifest: The loaded manifest
+        example_name: The name of the example
+        inputs: Current input hashes from compute_inputs()
+        method: The verification method, "structural" or "visual"
+
+    Returns:
+        str: "MATCH" or "DIFFERENT", or None if there is no fresh verdict
+    """
+    with _lock:
+        entry = manifest["examples"].get(example_name, {}).get(method)
+    if not entry or entry["inputs"] != inputs:
+        return None
+    return entry["verdict"]
+
+
+def record_verdict(manifest, example_name, inputs, verdict, method):
+    """Record a verdict together with the input hashes it was based on."""
+    global _changed
+    with _lock:
+        manifest["examples"].setdefault(example_name, {})[method] = {
+            "inputs": inputs,
+            "verdict": verdict,
+            "verified_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        _changed = True
+
+
+def list_stale(manifest, examples):
+    """Return the examples without a fresh verdict from any verification method."""
+    wrapper_hash = hash_wrapper(manifest)
+    stale = []
+    for example in examples:
+        inputs = compute_inputs(manifest, example, wrapper_hash)
+        methods = manifest["examples"].get(example, {})
+        if not any(get_verdict(manifest, example, inputs, method) for method in methods):
+            stale.append(example)
+    return stale
+
+
+def main():
+    """Main function to show the manifest state of examples."""
+    parser = argparse.ArgumentParser(description="Show the verification manifest state of examples")
+    parser.add_argument("examples", nargs="*", help="Example names to show (default: all recorded)")
+    parser.add_argument("--stale", action="store_true",
+                        help="Only list examples that need re-verification")
+
+    args = parser.parse_args()
+    manifest = load_manifest()
+    examples = args.examples or sorted(manifest["examples"])
+
+    if args.stale:
+        for example in list_stale(manifest, examples):
+            print(example)
+        save_manifest(manifest)
+        return 0
+
+    wrapper_hash = hash_wrapper(manifest)
+    print(f"{'EXAMPLE':<30} {'METHOD':<11} {'VERDICT':<10} {'FRESH':<5}")
+    print("-" * 60)
+    for example in examples:
+        methods = manifest["examples"].get(example)
+        if not methods:
+            print(f"{example:<30} {'-':<11} {'-':<10} {'❓':<5}")
+            continue
+        inputs = compute_inputs(manifest, example, wrapper_hash)
+        for method, entry in sorted(methods.items()):
+            fresh = "✅" if entry["inputs"] == inputs else "❌"
+            print(f"{example:<30} {method:<11} {entry['verdict']:<10} {fresh:<5}")
+
+    save_manifest(manifest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
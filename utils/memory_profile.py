@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Memory profiles of the examples and benchmarks.
+Programs run with the malloc hook built by `zig build profile` preloaded
+(Linux with glibc only) write a JSON report of their C allocations when
+they exit: peak, live and total bytes overall, by phase and by call site.
+Call sites are recorded as offsets into the executable or library that made
+the call and are named here with addr2line.
+
+Sites are grouped into categories by function and source file, to tell
+libxlsxwriter's cell tree from shared strings, images, charts, comments,
+the zip container and the Zig side. The Zig side can also be counted with
+xlsxwriter.profile.CountingAllocator, which reports in the same format.
+
+Usage:
+    python3 utils/batch_run.py --profile          # profile all examples
+    python3 utils/memory_profile.py REPORT.json... [--top N]
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+
+# Categories of call sites, first match wins. Patterns are matched against
+# the function name and source file of the site.
+CATEGORIES = [
+    ("zig", re.compile(r"\.zig\b")),
+    ("container", re.compile(r"zip|deflate|packager|tmpfile|minizip|zlib", re.I)),
+    ("images", re.compile(r"image|png|jpeg|jpg|gif|bmp", re.I)),
+    ("charts", re.compile(r"chart|series|drawing", re.I)),
+    ("comments", re.compile(r"comment|vml|note", re.I)),
+    ("strings", re.compile(r"sst|shared_str|rich_str|strdup", re.I)),
+    ("cells", re.compile(r"cell|_row|worksheet_write|merged|table", re.I)),
+    ("styles", re.compile(r"format|style|xf_|font|fill|border", re.I)),
+]
+
+ELF_TYPE_EXEC = 2
+
+
+def get_hook_library():
+    """Get the path of the malloc hook library, ZXW_PROFILE_LIB if set."""
+    if os.environ.get("ZXW_PROFILE_LIB"):
+        return Path(os.environ["ZXW_PROFILE_LIB"])
+    root_dir = Path(__file__).parent.parent
+    return root_dir / "zig-out" / "lib" / "libzxwprofile.so"
+
+
+def build_hook_library():
+    """Build the malloc hook library. Returns True on success."""
+    root_dir = Path(__file__).parent.parent
+    try:
+        subprocess.run(["zig", "build", "profile"], cwd=root_dir, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Error building the malloc hook library: {e}")
+        return False
+
+
+def profile_env(report_path, env=None):
+    """
+    Environment running a program with the malloc hook preloaded.
+
+    Args:
+        report_path: File the report is written to when the program exits
+        env: Environment to extend (default: os.environ)
+
+    Returns:
+        dict: The environment
+    """
+    env = dict(os.environ if env is None else env)
+    preload = str(get_hook_library().resolve())
+    if env.get("LD_PRELOAD"):
+        preload = f"{preload}:{env['LD_PRELOAD']}"
+    env["LD_PRELOAD"] = preload
+    env["ZXW_PROFILE_OUT"] = str(report_path)
+    return env
+
+
+def load_report(path):
+    """Load a report, or return None if the program did not write one."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _is_position_dependent(module):
+    """Whether an ELF file is loaded at the addresses it was linked for."""
+    try:
+        with open(module, 'rb') as f:
+            header = f.read(18)
+    except OSError:
+        return False
+    return len(header) == 18 and header[:4] == b"\x7fELF" and \
+        int.from_bytes(header[16:18], "little") == ELF_TYPE_EXEC
+
+
+def _module_path(report, module):
+    """Resolve the module name dladdr gave, which is argv[0] for the program."""
+    if os.path.isabs(module):
+        return module
+    program = report.get('program', "")
+    if program and os.path.basename(program) == os.path.basename(module):
+        return program
+    return None
+
+
+def symbolize(report):
+    """
+    Name the call sites of a hook report with addr2line, in place.
+
+    Sites get "function" and "source" where the module has symbols. Sites
+    of a CountingAllocator report are named already and are left alone.
+    """
+    addr2line = shutil.which("addr2line")
+    if not addr2line:
+        return report
+
+    by_module = {}
+    for site in report.get('sites', []):
+        if 'function' in site or 'module' not in site:
+            continue
+        module = _module_path(report, site['module'])
+        if module:
+            by_module.setdefault(module, []).append(site)
+
+    for module, sites in by_module.items():
+        absolute = _is_position_dependent(module)
+        # Return addresses point past the call, step back into it
+        addresses = [hex((site['address'] if absolute else site['offset']) - 1) for site in sites]
+        try:
+            completed = subprocess.run([addr2line, "-f", "-C", "-e", module, *addresses],
+                                       capture_output=True, text=True, timeout=120)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        lines = completed.stdout.splitlines()
+        if completed.returncode != 0 or len(lines) != 2 * len(sites):
+            continue
+        for site, function, source in zip(sites, lines[0::2], lines[1::2]):
+            site['function'] = function
+            site['source'] = source
+    return report
+
+
+def categorize(site):
+    """Category of a call site, "other" if nothing matches."""
+    source = site.get('source') or site.get('file') or ""
+    name = f"{site.get('function', '')} {source}"
+    for category, pattern in CATEGORIES:
+        if pattern.search(name):
+            return category
+    return "other"
+
+
+def summarize(report, top=10):
+    """
+    Summarize a report.
+
+    Per category, peak_bytes adds the peaks of its sites, which is an upper
+    bound of the memory the category held at once.
+
+    Returns:
+        dict: peak, live and total bytes, allocations, phases, categories
+              and the top sites by peak
+    """
+    categories = {}
+    for site in report.get('sites', []):
+        counts = categories.setdefault(categorize(site), {
+            'allocations': 0, 'total_bytes': 0, 'peak_bytes': 0, 'live_bytes': 0,
+        })
+        for field in counts:
+            counts[field] += site[field]
+
+    sites = sorted(report.get('sites', []), key=lambda site: site['peak_bytes'], reverse=True)
+    return {
+        'peak_bytes': report['peak_bytes'],
+        'live_bytes': report['live_bytes'],
+        'total_bytes': report['total_bytes'],
+        'allocations': report['allocations'],
+        'phases': report['phases'],
+        'categories': dict(sorted(categories.items(), key=lambda item: -item[1]['peak_bytes'])),
+        'top_sites': [
+            {
+                'function': site.get('function', "??"),
+                'source': site.get('source') or (f"{site['file']}:{site['line']}" if 'file' in site else "??"),
+                'phase': site['phase'],
+                'category': categorize(site),
+                'allocations': site['allocations'],
+                'total_bytes': site['total_bytes'],
+                'peak_bytes': site['peak_bytes'],
+            }
+            for site in sites[:top]
+        ],
+    }
+
+
+def format_bytes(count):
+    """Format a byte count with a binary unit."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+def print_summary(name, summary):
+    """Print a summary as from summarize()."""
+    print(f"{name}: peak {format_bytes(summary['peak_bytes'])}, "
+          f"total {format_bytes(summary['total_bytes'])} in {summary['allocations']} allocations, "
+          f"{format_bytes(summary['live_bytes'])} live at exit")
+    for phase, counts in summary['phases'].items():
+        if counts['allocations']:
+            print(f"  phase {phase:<11} peak {format_bytes(counts['peak_bytes']):>11}  "
+                  f"total {format_bytes(counts['total_bytes']):>11}")
+    for category, counts in summary['categories'].items():
+        print(f"  {category:<17} peak {format_bytes(counts['peak_bytes']):>11}  "
+              f"total {format_bytes(counts['total_bytes']):>11}  {counts['allocations']:>9} allocations")
+    for site in summary['top_sites']:
+        print(f"    {format_bytes(site['peak_bytes']):>11}  {site['phase']:<10} {site['function']} "
+              f"({site['source']})")
+
+
+def main():
+    """Main function to print memory profile reports."""
+    parser = argparse.ArgumentParser(description="Summarize memory profile reports")
+    parser.add_argument("reports", nargs="+", help="Reports written by the malloc hook or CountingAllocator")
+    parser.add_argument("--top", type=int, default=10, help="Sites to list per report (default: 10)")
+    parser.add_argument("--json", help="Write the summaries as JSON to this file")
+
+    args = parser.parse_args()
+
+    summaries = {}
+    for path in args.reports:
+        report = load_report(path)
+        if report is None:
+            print(f"❌ Cannot read report {path}")
+            continue
+        summaries[path] = summarize(symbolize(report), args.top)
+        print_summary(path, summaries[path])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summaries, f, indent=2)
+
+    return 0 if len(summaries) == len(args.reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+File change watchers for the evaluate.py monitor mode.
+On Linux the watcher is backed by inotify so the monitor sleeps until
+something on disk changes. Other platforms, or Linux systems where inotify
+is unavailable, fall back to polling directory listings.
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify event masks from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+EVENT_HEADER = struct.Struct("iIII")
+
+# Time to keep collecting events after the first one, so a burst of writes
+# (e.g. a zip file being written) is handled as a single update.
+COALESCE_SECONDS = 0.05
+
+
+class PollingWatcher:
+    """Detect changes by comparing directory listings between polls."""
+
+    backend = "polling"
+
+    def __init__(self, paths):
+        self.listings = {}
+        for path in paths:
+            self.add(path)
+
+    def add(self, path):
+        """Start watching a directory. Missing directories are picked up once created."""
+        self.listings[str(path)] = self._list(path)
+
+    def wait(self, timeout):
+        """
+        Sleep for the timeout, then return the files that changed.
+
+        Returns:
+            set: (directory, file name) tuples for every changed entry
+        """
+        time.sleep(timeout)
+        changes = set()
+        for path, old in self.listings.items():
+            new = self._list(path)
+            for name in old.keys() | new.keys():
+                if old.get(name) != new.get(name):
+                    changes.add((path, name))
+            self.listings[path] = new
+        return changes
+
+    def close(self):
+        self.listings = {}
+
+    @staticmethod
+    def _list(path):
+        try:
+            with os.scandir(path) as entries:
+                result = {}
+                for entry in entries:
+                    stat = entry.stat()
+                    result[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                return result
+        except FileNotFoundError:
+            return {}
+
+
+class InotifyWatcher:
+    """Block on an inotify descriptor until files in the watched directories change."""
+
+    backend = "inotify"
+
+    def __init__(self, paths):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches = {}
+        for path in paths:
+            self.add(path)
+
+    def add(self, path):
+        """Start watching a directory. Returns False if it could not be watched."""
+        path = str(path)
+        if path in self.watches.values():
+            return True
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.watches[wd] = path
+        return True
+
+    def wait(self, timeout):
+        """
+        Wait up to the timeout for changes and return the files that changed.
+
+        Returns:
+            set: (directory, file name) tuples for every changed entry. A
+                 (directory, None) entry means the whole directory must be
+                 rescanned, e.g. after a queue overflow.
+        """
+        changes = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changes
+
+        deadline = time.monotonic() + COALESCE_SECONDS
+        while True:
+            self._read_events(changes)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                break
+        return changes
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _read_events(self, changes):
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                for path in self.watches.values():
+                    changes.add((path, None))
+                continue
+
+            path = self.watches.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                changes.add((path, None))
+                continue
+            changes.add((path, os.fsdecode(name) if name else None))
+
+
+def create_watcher(paths, force_polling=False):
+    """
+    Create the best available watcher for the given directories.
+
+    Uses inotify on Linux and falls back to polling elsewhere or if
+    inotify cannot be initialized (e.g. the watch limit is exhausted).
+    """
+    if sys.platform.startswith("linux") and not force_polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+def example_for_file(directory, file_name):
+    """
+    Map a changed file back to the example whose status depends on it.
+
+    Returns:
+        str: The example name, or None if the file does not affect any example
+    """
+    if file_name is None:
+        return None
+
+    parts = directory.replace("\\", "/").rstrip("/").split("/")
+    parent = parts[-1]
+    grandparent = parts[-2] if len(parts) > 1 else ""
+    stem, _, suffix = file_name.rpartition(".")
+
+    if parent == "examples" and suffix == "zig":
+        return stem
+    if parent == "c" and grandparent == "examples" and suffix == "c":
+        return stem
+    if parent == "screenshots" and stem.startswith("comparison_") and suffix == "png":
+        return stem[len("comparison_"):]
+    if parent == "comparison_results" and file_name.endswith("_output.txt"):
+        return file_name[:-len("_output.txt")]
+    if parent == "zig-output-xls" and stem.startswith("zig-") and suffix in ("xlsx", "xlsm"):
+        return stem[len("zig-"):]
+    if parent == "c-output-xls" and suffix in ("xlsx", "xlsm"):
+        return stem
+    return None
+
+
+def is_shared_input(directory, file_name):
+    """
+    Check whether a changed file is an input of every example: a Zig wrapper
+    source in src/ or a build file in the build root.
+
+    Returns:
+        bool: True if the status of all examples must be recomputed
+    """
+    if file_name is None:
+        return False
+
+    parent = directory.replace("\\", "/").rstrip("/").split("/")[-1]
+    if parent == "src" and file_name.endswith(".zig"):
+        return True
+    return file_name in ("build.zig", "build.zig.zon")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Write NumPy arrays and column blocks to xlsx files through the Zig library.
+The zigxlsxwriter shared library (`zig build python`) is loaded with ctypes
+and each block of rows is passed as buffers to zxw_write_columns, so cells
+are written by the Zig layer without a Python object per cell.
+
+Accepted column dtypes are floats, signed and unsigned ints, bools,
+datetime64 and fixed width strings ('S' and 'U'). NaN and NaT cells are
+left empty. Object columns, such as pandas strings, are converted one chunk
+at a time.
+
+    from numpy_writer import Workbook
+
+    with Workbook("out.xlsx", constant_memory=True) as workbook:
+        sheet = workbook.add_worksheet("Data")
+        sheet.write_array(0, 0, matrix)
+        sheet.write_columns(0, 0, data_frame, header=True)
+"""
+
+import os
+import sys
+import time
+import ctypes
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Rows passed to the library per call, bounding the memory used for
+# converted copies of chunks
+DEFAULT_CHUNK_ROWS = 65536
+
+DEFAULT_DATE_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+# lxw_error codes checked here
+LXW_NO_ERROR = 0
+
+# ColumnKind in src/capi.zig
+KIND_FLOAT64 = 0
+KIND_INT64 = 1
+KIND_BOOLEAN = 2
+KIND_DATETIME64 = 3
+KIND_BYTES = 4
+KIND_UNICODE = 5
+
+TICKS_PER_DAY = {
+    'D': 1,
+    'h': 24,
+    'm': 24 * 60,
+    's': 86400,
+    'ms': 86400 * 10**3,
+    'us': 86400 * 10**6,
+    'ns': 86400 * 10**9,
+}
+
+
+class Column(ctypes.Structure):
+    """One column of a block, as the Column extern struct in src/capi.zig."""
+    _fields_ = [
+        ('kind', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('stride', ctypes.c_ssize_t),
+        ('itemsize', ctypes.c_size_t),
+        ('ticks_per_day', ctypes.c_double),
+        ('format', ctypes.c_void_p),
+    ]
+
+
+class XlsxError(Exception):
+    """A libxlsxwriter error code returned by the library."""
+
+    def __init__(self, library, code):
+        self.code = code
+        super().__init__(library.zxw_strerror(code).decode())
+
+
+def get_library_path():
+    """Get the path of the shared library installed by `zig build python`."""
+    if os.environ.get("ZIG_XLSXWRITER_LIB"):
+        return Path(os.environ["ZIG_XLSXWRITER_LIB"])
+    root_dir = Path(__file__).parent.parent
+    if sys.platform == "win32":
+        return root_dir / "zig-out" / "bin" / "zigxlsxwriter.dll"
+    suffix = ".dylib" if sys.platform == "darwin" else ".so"
+    return root_dir / "zig-out" / "lib" / f"libzigxlsxwriter{suffix}"
+
+
+def load_library(path=None):
+    """
+    Load the shared library and declare the functions used.
+
+    Args:
+        path: Library path, by default from get_library_path()
+
+    Returns:
+        ctypes.CDLL: The library
+    """
+    path = Path(path) if path else get_library_path()
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found, run `zig build python` first")
+
+    library = ctypes.CDLL(str(path))
+    library.zxw_workbook_new.argtypes = [ctypes.c_char_p, ctypes.c_bool, ctypes.c_char_p, ctypes.c_bool]
+    library.zxw_workbook_new.restype = ctypes.c_void_p
+    library.zxw_workbook_close.argtypes = [ctypes.c_void_p]
+    library.zxw_workbook_close.restype = ctypes.c_int
+    library.zxw_add_worksheet.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    library.zxw_add_worksheet.restype = ctypes.c_void_p
+    library.zxw_add_num_format.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    library.zxw_add_num_format.restype = ctypes.c_void_p
+    library.zxw_strerror.argtypes = [ctypes.c_int]
+    library.zxw_strerror.restype = ctypes.c_char_p
+    library.zxw_write_columns.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint32,
+        ctypes.c_uint16,
+        ctypes.POINTER(Column),
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+    ]
+    library.zxw_write_columns.restype = ctypes.c_int
+    return library
+
+
+def prepare_column(values):
+    """
+    Convert a 1-D chunk to an array the library can read in place.
+
+    Arrays with a supported dtype are returned unchanged, whatever their
+    stride. Other dtypes are converted, which copies only this chunk.
+
+    Returns:
+        tuple: (array, kind, ticks per day)
+    """
+    array = np.asarray(values)
+    if array.ndim != 1:
+        raise ValueError(f"expected a 1-D column, got {array.ndim} dimensions")
+    if not array.dtype.isnative:
+        array = array.astype(array.dtype.newbyteorder('='))
+
+    kind = array.dtype.kind
+    if kind == 'f':
+        return array.astype(np.float64, copy=False), KIND_FLOAT64, 0.0
+    if kind in 'iu':
+        if array.dtype == np.uint64:
+            return array.astype(np.float64), KIND_FLOAT64, 0.0
+        return array.astype(np.int64, copy=False), KIND_INT64, 0.0
+    if kind == 'b':
+        return array.view(np.uint8), KIND_BOOLEAN, 0.0
+    if kind == 'M':
+        unit, count = np.datetime_data(array.dtype)
+        if unit not in TICKS_PER_DAY:
+            # Weeks, months and years are converted to days
+            array = array.astype('datetime64[D]')
+            unit, count = 'D', 1
+        return array.view(np.int64), KIND_DATETIME64, TICKS_PER_DAY[unit] / count
+    if kind == 'S':
+        return array, KIND_BYTES, 0.0
+    if kind == 'U':
+        return array, KIND_UNICODE, 0.0
+    if kind == 'O':
+        # Missing values of object columns become empty cells
+        strings = np.array(["" if value is None or value != value else str(value) for value in array])
+        return prepare_column(strings)
+    raise TypeError(f"unsupported column dtype {array.dtype}")
+
+
+def get_columns(block):
+    """
+    Get (name, 1-D values) pairs from a column block.
+
+    A block is a 2-D array, a mapping of names to columns, a pandas-like
+    frame with a `columns` attribute, or a sequence of 1-D columns.
+    """
+    if isinstance(block, np.ndarray):
+        if block.ndim == 1:
+            return [(None, block)]
+        if block.ndim != 2:
+            raise ValueError(f"expected 1 or 2 dimensions, got {block.ndim}")
+        return [(None, block[:, index]) for index in range(block.shape[1])]
+    if hasattr(block, 'columns'):
+        return [(str(name), to_numpy(block[name])) for name in block.columns]
+    if hasattr(block, 'items'):
+        return [(str(name), to_numpy(values)) for name, values in block.items()]
+    return [(None, to_numpy(values)) for values in block]
+
+
+def to_numpy(values):
+    """Get a NumPy view of a column without copying where possible."""
+    if hasattr(values, 'to_numpy'):
+        return values.to_numpy()
+    return np.asarray(values)
+
+
+class Worksheet:
+    """A worksheet of a Workbook."""
+
+    def __init__(self, workbook, handle):
+        self.workbook = workbook
+        self.handle = handle
+
+    def write_array(self, row, col, array, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Write a 1-D array down a column or a 2-D array as rows and columns.
+
+        Args:
+            row: First row
+            col: First column
+            array: The array
+            format: A format from Workbook.add_num_format, or None
+            chunk_rows: Rows written per library call
+        """
+        array = np.asarray(array)
+        self.write_columns(row, col, array, format=format, chunk_rows=chunk_rows)
+
+    def write_columns(self, row, col, block, header=False, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Write a block of columns, which may have different dtypes.
+
+        Rows are written in order in chunks of chunk_rows, as constant_memory
+        mode requires. datetime64 columns get the workbook date format unless
+        format is given.
+
+        Args:
+            row: First row
+            col: First column
+            block: 2-D array, mapping, pandas-like frame or sequence of columns
+            header: Write the column names in the first row
+            format: A format from Workbook.add_num_format, or None
+            chunk_rows: Rows written per library call
+
+        Returns:
+            int: The number of rows written, including the header
+        """
+        columns = get_columns(block)
+        if not columns:
+            return 0
+        lengths = {len(values) for _, values in columns}
+        if len(lengths) != 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        length = lengths.pop()
+
+        first_row = row
+        if header:
+            names = np.array(["" if name is None else name for name, _ in columns])
+            self._write_block(row, col, [names[index:index + 1] for index in range(len(columns))], None)
+            row += 1
+
+        for start in range(0, length, chunk_rows):
+            chunk = [values[start:start + chunk_rows] for _, values in columns]
+            self._write_block(row + start, col, chunk, format)
+        return row + length - first_row
+
+    def _write_block(self, row, col, chunk, format):
+        """Pass one chunk of rows to zxw_write_columns."""
+        prepared = [prepare_column(values) for values in chunk]
+        structs = (Column * len(prepared))()
+        for struct, (array, kind, ticks_per_day) in zip(structs, prepared):
+            struct.kind = kind
+            struct.data = array.ctypes.data
+            struct.stride = array.strides[0]
+            struct.itemsize = array.dtype.itemsize
+            struct.ticks_per_day = ticks_per_day
+            if format is None and kind == KIND_DATETIME64:
+                struct.format = self.workbook.date_format()
+            else:
+                struct.format = format
+
+        # The prepared arrays stay referenced until the call returns
+        err = self.workbook.library.zxw_write_columns(
+            self.handle, row, col, structs, len(prepared), len(prepared[0][0]))
+        if err != LXW_NO_ERROR:
+            raise XlsxError(self.workbook.library, err)
+
+
+class Workbook:
+    """An xlsx workbook written through the zigxlsxwriter library."""
+
+    def __init__(self, filename, constant_memory=False, tmpdir=None, use_zip64=False,
+                 date_format=DEFAULT_DATE_FORMAT, library=None):
+        """
+        Args:
+            filename: Output path
+            constant_memory: Flush each row to disk once the next row starts
+            tmpdir: Directory for temporary files
+            use_zip64: Allow files larger than 4 GiB
+            date_format: Number format for datetime64 columns
+            library: A library from load_library(), loaded if None
+        """
+        self.library = library or load_library()
+        self.handle = self.library.zxw_workbook_new(
+            os.fsencode(filename),
+            constant_memory,
+            os.fsencode(tmpdir) if tmpdir else None,
+            use_zip64,
+        )
+        if not self.handle:
+            raise OSError(f"could not create workbook {filename}")
+        self._date_format_string = date_format
+        self._date_format = None
+
+    def add_worksheet(self, name=None):
+        """Add a worksheet, named Sheet1, Sheet2, ... if name is None."""
+        handle = self.library.zxw_add_worksheet(self.handle, name.encode() if name else None)
+        if not handle:
+            raise ValueError(f"could not add worksheet {name!r}")
+        return Worksheet(self, handle)
+
+    def add_num_format(self, num_format):
+        """Add a format with a number format, such as "0.00"."""
+        handle = self.library.zxw_add_num_format(self.handle, num_format.encode())
+        if not handle:
+            raise MemoryError("could not add format")
+        return handle
+
+    def date_format(self):
+        """Get the format used for datetime64 columns, created on first use."""
+        if self._date_format is None:
+            self._date_format = self.add_num_format(self._date_format_string)
+        return self._date_format
+
+    def close(self):
+        """Write the file and free the workbook."""
+        if self.handle is None:
+            return
+        err = self.library.zxw_workbook_close(self.handle)
+        self.handle = None
+        if err != LXW_NO_ERROR:
+            raise XlsxError(self.library, err)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a random float64 matrix through the Zig library")
+    parser.add_argument("output", help="Output xlsx file")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of rows")
+    parser.add_argument("--cols", type=int, default=100, help="Number of columns")
+    parser.add_argument("--constant-memory", action="store_true", help="Use constant_memory mode")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per library call")
+    parser.add_argument("--lib", help="Path of the shared library")
+    args = parser.parse_args()
+
+    matrix = np.random.default_rng(0).random((args.rows, args.cols))
+
+    start = time.perf_counter()
+    with Workbook(args.output, constant_memory=args.constant_memory, library=load_library(args.lib)) as workbook:
+        workbook.add_worksheet().write_array(0, 0, matrix, chunk_rows=args.chunk_rows)
+        write_seconds = time.perf_counter() - start
+    close_seconds = time.perf_counter() - start - write_seconds
+
+    cells = args.rows * args.cols
+    print(f"{cells} cells: write {write_seconds:.3f}s ({cells / write_seconds:,.0f} cells/s), "
+          f"close {close_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Perceptual hash index of the screenshots in testing/screenshots.
+Every screenshot is decoded once and stored as a 64-bit pHash, a 64-bit
+dHash and a pyramid of small grayscale thumbnails, keyed by example,
+renderer and side (C or Zig). The C and Zig sides of an example are aligned
+and, for Excel captures, cropped of the window chrome with image_compare
+before they are hashed, so both sides describe the same part of the sheet.
+Entries are reused while the size and modification time of the PNGs are
+unchanged.
+
+With a current index, checking whether the C and Zig screenshots of an
+example look the same, or finding near-duplicate screenshots across
+examples, needs no PNG decoding. image_compare.py is only needed when the
+hashes are further apart than the thresholds below.
+
+The index is stored as JSON in testing/screenshot_index.json.
+"""
+
+import os
+import sys
+import json
+import base64
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from image_compare import (EXCEL_CHROME, get_all_screenshot_examples, load_gray,
+                           prepare_pair, split_comparison)
+
+INDEX_VERSION = 2
+
+# Edge lengths of the square thumbnails stored per screenshot, largest first
+THUMBNAIL_SIZES = (64, 32, 16)
+
+# Images are reduced to this size before the DCT of the pHash
+PHASH_SIZE = 32
+
+# Screenshots are unchanged when the pHash and dHash distances and the mean
+# absolute difference of the 64 pixel thumbnails, in 8-bit gray levels, are
+# all within these limits. Tuned on the aligned and cropped halves of
+# testing/screenshots: 59 of the 64 pairs image_compare accepts pass, while
+# none of the pairs it rejects and none with a 250x140 pixel block of
+# content erased from the Zig side do. The captures are never pixel
+# identical, so the thumbnail limit sits just below the closest rejected
+# pair (0.25) and above the selection and antialiasing noise of most pairs.
+UNCHANGED_PHASH_DISTANCE = 8
+UNCHANGED_DHASH_DISTANCE = 1
+UNCHANGED_THUMBNAIL_DIFF = 0.22
+
+# pHash distance up to which screenshots of different examples are reported
+# as near duplicates
+NEAR_DUPLICATE_DISTANCE = 6
+
+# Renderer recorded for screenshots without a "renderer" PNG text chunk,
+# which are the screenshots taken of Microsoft Excel
+DEFAULT_RENDERER = "excel"
+
+
+def get_index_path():
+    """Get the path of the screenshot index."""
+    root_dir = Path(__file__).parent.parent
+    return root_dir / "testing" / "screenshot_index.json"
+
+
+def get_screenshots_dir():
+    """Get the directory holding the screenshots."""
+    root_dir = Path(__file__).parent.parent
+    return root_dir / "testing" / "screenshots"
+
+
+def load_index():
+    """Load the index, or return an empty one if it does not exist or is unreadable."""
+    try:
+        with open(get_index_path(), 'r') as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": INDEX_VERSION, "entries": {}}
+
+
+_cached_index = {'signature': None, 'index': None}
+
+
+def get_cached_index():
+    """Load the index, reusing the last load while the file is unchanged."""
+    signature = _signature(get_index_path())
+    if _cached_index['index'] is None or _cached_index['signature'] != signature:
+        _cached_index['index'] = load_index()
+        _cached_index['signature'] = signature
+    return _cached_index['index']
+
+
+def save_index(index):
+    """Atomically write the index to disk."""
+    path = get_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def entry_key(example, renderer, side):
+    """Key of an index entry."""
+    return f"{example}/{renderer}/{side}"
+
+
+def dhash(gray):
+    """64-bit difference hash: the sign of horizontal gradients on a 9x8 image."""
+    pixels = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(gray):
+    """64-bit perceptual hash: the 8x8 lowest DCT frequencies against their median."""
+    pixels = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.BILINEAR), dtype=np.float64)
+    n = np.arange(PHASH_SIZE)
+    dct = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * PHASH_SIZE))
+    low = (dct @ pixels @ dct.T)[:8, :8].flatten()
+    # The DC term only reflects the mean brightness
+    return _pack_bits(low > np.median(low[1:]))
+
+
+def _pack_bits(bits):
+    """Pack 64 booleans into an int."""
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def hamming(a, b):
+    """Number of differing bits of two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def make_thumbnails(gray):
+    """Base64 encoded square grayscale thumbnails, one per THUMBNAIL_SIZES."""
+    thumbnails = []
+    level = gray.resize((THUMBNAIL_SIZES[0], THUMBNAIL_SIZES[0]), Image.BOX)
+    for size in THUMBNAIL_SIZES:
+        if level.size != (size, size):
+            level = level.resize((size, size), Image.BOX)
+        thumbnails.append(base64.b64encode(level.tobytes()).decode())
+    return thumbnails
+
+
+def load_thumbnail(entry, level=0):
+    """Decode a thumbnail of an entry as a 2-D uint8 array."""
+    size = THUMBNAIL_SIZES[level]
+    data = base64.b64decode(entry['thumbnails'][level])
+    return np.frombuffer(data, dtype=np.uint8).reshape(size, size)
+
+
+def describe(gray):
+    """Hashes and thumbnails of one screenshot."""
+    return {
+        'phash': f"{phash(gray):016x}",
+        'dhash': f"{dhash(gray):016x}",
+        'size': list(gray.size),
+        'thumbnails': make_thumbnails(gray),
+    }
+
+
+def list_screenshots(screenshots_dir=None):
+    """
+    Find the screenshots of every example.
+
+    Returns:
+        dict: Example name to a list of (side, path, split) tuples, where
+              split is set for side-by-side comparison_<name>.png files
+    """
+    screenshots_dir = Path(screenshots_dir or get_screenshots_dir())
+    screenshots = {}
+    for example in get_all_screenshot_examples():
+        c_path = screenshots_dir / f"c_{example}.png"
+        zig_path = screenshots_dir / f"zig_{example}.png"
+        if c_path.exists() and zig_path.exists():
+            screenshots[example] = [("c", c_path, False), ("zig", zig_path, False)]
+        else:
+            comparison = screenshots_dir / f"comparison_{example}.png"
+            screenshots[example] = [("c", comparison, True), ("zig", comparison, True)]
+    return screenshots
+
+
+def _signature(path):
+    """Size and modification time of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _renderer(path):
+    """Renderer recorded in the PNG text chunks of a screenshot."""
+    with Image.open(path) as img:
+        return img.info.get("renderer", DEFAULT_RENDERER)
+
+
+def _index_example(job):
+    """Decode the screenshots of one example, align the sides and describe each of them."""
+    example, paths, split = job
+    renderer = _renderer(paths["c"])
+    if split:
+        c_gray, zig_gray = split_comparison(paths["c"])
+    else:
+        c_gray, zig_gray = load_gray(paths["c"]), load_gray(paths["zig"])
+    chrome = EXCEL_CHROME if renderer == DEFAULT_RENDERER else None
+    c_gray, zig_gray, _, _ = prepare_pair(c_gray, zig_gray, chrome)
+    return example, renderer, paths, split, {"c": describe(c_gray), "zig": describe(zig_gray)}
+
+
+def update_index(index, examples=None, max_workers=None):
+    """
+    Add new and changed screenshots to the index.
+
+    A screenshot rendered again is compared with its previous entry, so
+    re-rendering reports which screenshots actually look different.
+
+    Returns:
+        list: (key, status) for every entry written, where status is "new",
+              "unchanged" or "changed"
+    """
+    screenshots = list_screenshots()
+    if examples:
+        screenshots = {name: screenshots[name] for name in examples if name in screenshots}
+
+    # Examples whose recorded signatures are all current are skipped without
+    # decoding. Both sides are indexed together since they are aligned.
+    current = {}
+    for entry in index['entries'].values():
+        current[(entry['path'], entry['side'])] = entry['stat']
+
+    jobs = []
+    for example, files in screenshots.items():
+        stale = False
+        for side, path, split in files:
+            relative_path = os.path.relpath(path, get_screenshots_dir())
+            if current.get((relative_path, side)) != _signature(path):
+                stale = True
+        if stale and all(path.exists() for _, path, _ in files):
+            jobs.append((example, {side: path for side, path, _ in files}, files[0][2]))
+
+    updates = []
+    if not jobs:
+        return updates
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for example, renderer, paths, split, described in pool.map(_index_example, jobs):
+            # A file rendered again may come from another renderer
+            previous = {}
+            for key in [key for key, entry in index['entries'].items() if entry['example'] == example]:
+                entry = index['entries'].pop(key)
+                previous[entry['side']] = entry
+            for side, entry in described.items():
+                entry.update(example=example, renderer=renderer, side=side,
+                             path=os.path.relpath(paths[side], get_screenshots_dir()),
+                             split=split, stat=_signature(paths[side]))
+                key = entry_key(example, renderer, side)
+                index['entries'][key] = entry
+                if side not in previous:
+                    updates.append((key, "new"))
+                else:
+                    same, _ = compare_entries(previous[side], entry)
+                    updates.append((key, "unchanged" if same else "changed"))
+    return updates
+
+
+def get_pair(index, example, allow_split=True):
+    """
+    Get the current C and Zig entries of an example, or None if either is
+    missing. Entries of files changed since indexing are ignored, as are
+    halves of comparison_<name>.png files unless allow_split is set.
+    """
+    screenshots_dir = get_screenshots_dir()
+    entries = {}
+    for entry in index['entries'].values():
+        if entry['example'] != example or (entry['split'] and not allow_split):
+            continue
+        if _signature(screenshots_dir / entry['path']) != entry['stat']:
+            continue
+        entries[entry['side']] = entry
+    if "c" not in entries or "zig" not in entries:
+        return None
+    return entries["c"], entries["zig"]
+
+
+def check_unchanged(index, example, allow_split=True):
+    """
+    Check from the index alone whether the C and Zig screenshots look the same.
+
+    Returns:
+        tuple: (unchanged, details)
+            unchanged: True if both hashes and the thumbnails agree, False
+                       if they do not, None if the index has no current
+                       entries for the example
+            details: Distances behind the verdict
+    """
+    pair = get_pair(index, example, allow_split)
+    if pair is None:
+        return None, "not indexed"
+    return compare_entries(*pair)
+
+
+def compare_entries(a, b):
+    """
+    Compare two index entries by hashes and thumbnails.
+
+    Returns:
+        tuple: (same, details) where details lists the distances
+    """
+    phash_distance = hamming(int(a['phash'], 16), int(b['phash'], 16))
+    dhash_distance = hamming(int(a['dhash'], 16), int(b['dhash'], 16))
+    thumbnail_diff = float(np.mean(np.abs(
+        load_thumbnail(a).astype(np.int16) - load_thumbnail(b).astype(np.int16))))
+    details = f"pHash {phash_distance}, dHash {dhash_distance}, thumbnail diff {thumbnail_diff:.2f}"
+    same = (phash_distance <= UNCHANGED_PHASH_DISTANCE and dhash_distance <= UNCHANGED_DHASH_DISTANCE
+            and thumbnail_diff <= UNCHANGED_THUMBNAIL_DIFF and a['size'] == b['size'])
+    return same, details
+
+
+def find_near_duplicates(index, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """
+    Find screenshots of different examples with close pHashes.
+
+    Returns:
+        list: (distance, key_a, key_b) sorted by distance
+    """
+    keys = sorted(index['entries'])
+    if len(keys) < 2:
+        return []
+    hashes = np.array([int(index['entries'][key]['phash'], 16) for key in keys], dtype=np.uint64)
+    examples = [index['entries'][key]['example'] for key in keys]
+
+    duplicates = []
+    for i in range(len(keys) - 1):
+        xor = np.bitwise_xor(hashes[i + 1:], hashes[i])
+        distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        for offset in np.nonzero(distances <= max_distance)[0]:
+            j = i + 1 + offset
+            if examples[i] != examples[j]:
+                duplicates.append((int(distances[offset]), keys[i], keys[j]))
+    duplicates.sort()
+    return duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perceptual hash index of the screenshots")
+    parser.add_argument("examples", nargs="*", help="Examples to check (default: all indexed)")
+    parser.add_argument("--update", action="store_true", help="Index new and changed screenshots first")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="List near-duplicate screenshots across examples")
+    parser.add_argument("--distance", type=int, default=NEAR_DUPLICATE_DISTANCE,
+                        help=f"pHash distance for near duplicates (default: {NEAR_DUPLICATE_DISTANCE})")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    index = load_index()
+    if args.update:
+        updates = update_index(index, args.examples, max(1, args.jobs))
+        save_index(index)
+        for key, status in updates:
+            if status != "new":
+                print(f"{status:<10} {key}")
+        print(f"Indexed {len(updates)} screenshots, {len(index['entries'])} entries")
+
+    if args.duplicates:
+        for distance, key_a, key_b in find_near_duplicates(index, args.distance):
+            print(f"{distance:>3}  {key_a}  {key_b}")
+        return 0
+
+    examples = args.examples or sorted({entry['example'] for entry in index['entries'].values()})
+    changed = 0
+    for example in examples:
+        unchanged, details = check_unchanged(index, example)
+        if unchanged is None:
+            print(f"❓ {example:<30} {details}")
+        elif unchanged:
+            print(f"✅ {example:<30} unchanged ({details})")
+        else:
+            changed += 1
+            print(f"❌ {example:<30} differs ({details})")
+    return 0 if changed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Headless rendering of Excel files to PNG.
+Renderers turn a single workbook into an image without a GUI session, so
+screenshots can be produced on Linux build machines. The built-in "grid"
+renderer is pure Python: it reads the worksheet XML, shared strings and
+styles and draws the cell grid with PIL. Other backends can be added with
+register_renderer().
+"""
+
+import re
+import sys
+import shutil
+import zipfile
+import argparse
+import tempfile
+import subprocess
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+from PIL import Image, ImageDraw, ImageFont, PngImagePlugin
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Fixed output size of a rendered workbook
+RENDER_WIDTH = 1280
+RENDER_HEIGHT = 800
+
+# Excel defaults: column width in characters and row height in points
+DEFAULT_COL_WIDTH = 8.43
+DEFAULT_ROW_HEIGHT = 15.0
+
+HEADER_WIDTH = 40
+HEADER_HEIGHT = 20
+GRID_COLOR = (218, 220, 224)
+HEADER_FILL = (240, 240, 240)
+TEXT_COLOR = (0, 0, 0)
+
+# Horizontal shift per pixel of text height used to slant italic text
+ITALIC_SHEAR = 0.2
+
+CELL_REF_RE = re.compile(r"^([A-Z]+)(\d+)$")
+
+# Registered renderers: name -> function(xlsx_path, png_path) -> bool
+RENDERERS = {}
+
+
+def register_renderer(name, render_function):
+    """Register a renderer that converts an Excel file into a PNG file."""
+    RENDERERS[name] = render_function
+
+
+def get_renderer(name):
+    """Get a registered renderer by name, or None if it is unknown."""
+    return RENDERERS.get(name)
+
+
+def column_letters(col):
+    """Convert a zero based column index to Excel column letters."""
+    letters = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def parse_cell_ref(ref):
+    """Convert an A1 style reference to zero based (row, col)."""
+    match = CELL_REF_RE.match(ref)
+    if not match:
+        return -1, -1
+    letters, digits = match.groups()
+    col = 0
+    for char in letters:
+        col = col * 26 + (ord(char) - ord("A") + 1)
+    return int(digits) - 1, col - 1
+
+
+def _parse_color(elem):
+    """Convert an ARGB color element into an RGB tuple, or None."""
+    if elem is None or "rgb" not in elem.attrib:
+        return None
+    rgb = elem.get("rgb")[-6:]
+    try:
+        return tuple(int(rgb[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+def load_styles(zf):
+    """
+    Load the cell formats from styles.xml.
+
+    Returns:
+        list: One dict per cellXfs entry with bold, italic, color, fill and align
+    """
+    if "xl/styles.xml" not in zf.namelist():
+        return []
+    root = ET.fromstring(zf.read("xl/styles.xml"))
+
+    fonts = []
+    for font in root.iterfind(f"{NS_MAIN}fonts/{NS_MAIN}font"):
+        fonts.append({
+            'bold': font.find(f"{NS_MAIN}b") is not None,
+            'italic': font.find(f"{NS_MAIN}i") is not None,
+            'color': _parse_color(font.find(f"{NS_MAIN}color")),
+        })
+
+    fills = []
+    for fill in root.iterfind(f"{NS_MAIN}fills/{NS_MAIN}fill"):
+        pattern = fill.find(f"{NS_MAIN}patternFill")
+        color = None
+        if pattern is not None and pattern.get("patternType") not in (None, "none", "gray125"):
+            color = _parse_color(pattern.find(f"{NS_MAIN}fgColor"))
+        fills.append(color)
+
+    formats = []
+    for xf in root.iterfind(f"{NS_MAIN}cellXfs/{NS_MAIN}xf"):
+        font = fonts[int(xf.get("fontId", 0))] if fonts else {}
+        fill_id = int(xf.get("fillId", 0))
+        alignment = xf.find(f"{NS_MAIN}alignment")
+        formats.append({
+            'bold': font.get('bold', False),
+            'italic': font.get('italic', False),
+            'color': font.get('color'),
+            'fill': fills[fill_id] if fill_id < len(fills) else None,
+            'align': alignment.get("horizontal") if alignment is not None else None,
+        })
+    return formats
+
+
+def load_shared_strings(zf):
+    """Load the shared string table as a list."""
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    return [
+        "".join(t.text or "" for t in si.iter(f"{NS_MAIN}t"))
+        for si in root.iterfind(f"{NS_MAIN}si")
+    ]
+
+
+def find_first_sheet(zf):
+    """Return the part name of the active (or first) worksheet, or None."""
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    sheets = workbook.findall(f"{NS_MAIN}sheets/{NS_MAIN}sheet")
+    if not sheets:
+        return None
+
+    active = 0
+    view = workbook.find(f"{NS_MAIN}bookViews/{NS_MAIN}workbookView")
+    if view is not None:
+        active = min(int(view.get("activeTab", 0)), len(sheets) - 1)
+    rel_id = sheets[active].get(f"{NS_REL}id")
+
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iterfind(f"{NS_PKG_REL}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target[1:]
+            return posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+
+def load_sheet(zf, part_name, max_row, max_col):
+    """
+    Load the visible part of a worksheet.
+
+    Only cells within (max_row, max_col) are kept, so large sheets cost
+    little memory.
+
+    Returns:
+        tuple: (cells, col_widths, row_heights) where cells maps (row, col)
+               to (type, style, value)
+    """
+    cells = {}
+    col_widths = {}
+    row_heights = {}
+
+    for event, elem in ET.iterparse(zf.open(part_name), events=("end",)):
+        tag = elem.tag
+        if tag == f"{NS_MAIN}col":
+            width = float(elem.get("width", DEFAULT_COL_WIDTH))
+            if elem.get("hidden") == "1":
+                width = 0
+            for col in range(int(elem.get("min")) - 1, min(int(elem.get("max")), max_col)):
+                col_widths[col] = width
+        elif tag == f"{NS_MAIN}c":
+            row, col = parse_cell_ref(elem.get("r", ""))
+            if 0 <= row < max_row and 0 <= col < max_col:
+                value = elem.findtext(f"{NS_MAIN}v")
+                if value is None:
+                    value = "".join(t.text or "" for t in elem.iter(f"{NS_MAIN}t")) or None
+                cells[(row, col)] = (elem.get("t", "n"), int(elem.get("s", 0)), value)
+            elem.clear()
+        elif tag == f"{NS_MAIN}row":
+            row = int(elem.get("r", 0)) - 1
+            if elem.get("hidden") == "1":
+                row_heights[row] = 0
+            elif "ht" in elem.attrib:
+                row_heights[row] = float(elem.get("ht"))
+            elem.clear()
+            if row >= max_row:
+                break
+
+    return cells, col_widths, row_heights
+
+
+def format_value(cell_type, value, strings):
+    """Convert a stored cell value to display text."""
+    if value is None:
+        return ""
+    if cell_type == "s":
+        try:
+            return strings[int(value)]
+        except (ValueError, IndexError):
+            return ""
+    if cell_type == "b":
+        return "TRUE" if value == "1" else "FALSE"
+    if cell_type in ("str", "inlineStr", "e"):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return f"{number:.10g}"
+
+
+def draw_sheared_text(img, position, text, color, font, anchor, offsets=(0,)):
+    """Draw text slanted to the right, leaning ITALIC_SHEAR pixels per pixel of height."""
+    left, top, right, bottom = ImageDraw.Draw(img).textbbox(position, text, font=font, anchor=anchor)
+    height = bottom - top
+    lean = round(height * ITALIC_SHEAR)
+    mask = Image.new("L", (right - left + max(offsets) + lean, height), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    for dx in offsets:
+        mask_draw.text((dx, 0), text, fill=255, font=font, anchor="lt")
+    # Rows near the top are shifted right the most, the bottom row not at all
+    sheared = mask.transform(mask.size, Image.AFFINE,
+                             (1, ITALIC_SHEAR, -lean, 0, 1, 0), Image.NEAREST)
+    img.paste(color, (left, top), sheared)
+
+
+def render_grid(xlsx_path, png_path, width=RENDER_WIDTH, height=RENDER_HEIGHT):
+    """
+    Render the active worksheet of an Excel file as a cell grid.
+
+    Draws row and column headers, gridlines, cell fills, bold and italic
+    fonts, font colors and horizontal alignment. Charts, images and
+    conditional formats are not drawn.
+    """
+    # Points to pixels at 96 DPI and character widths to pixels
+    px_per_point = 96 / 72
+    px_per_char = 7
+
+    max_col = width // 20 + 1
+    max_row = height // 10 + 1
+
+    with zipfile.ZipFile(xlsx_path) as zf:
+        part_name = find_first_sheet(zf)
+        formats = load_styles(zf)
+        strings = load_shared_strings(zf)
+        if part_name is None or part_name not in zf.namelist():
+            cells, col_widths, row_heights = {}, {}, {}
+        else:
+            cells, col_widths, row_heights = load_sheet(zf, part_name, max_row, max_col)
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+
+    # Column and row pixel positions
+    col_x = [HEADER_WIDTH]
+    while col_x[-1] < width and len(col_x) <= max_col:
+        chars = col_widths.get(len(col_x) - 1, DEFAULT_COL_WIDTH)
+        col_x.append(col_x[-1] + round(chars * px_per_char + 5 if chars else 0))
+    row_y = [HEADER_HEIGHT]
+    while row_y[-1] < height and len(row_y) <= max_row:
+        points = row_heights.get(len(row_y) - 1, DEFAULT_ROW_HEIGHT)
+        row_y.append(row_y[-1] + round(points * px_per_point))
+
+    # Headers
+    draw.rectangle((0, 0, width, HEADER_HEIGHT), fill=HEADER_FILL)
+    draw.rectangle((0, 0, HEADER_WIDTH, height), fill=HEADER_FILL)
+    for col in range(len(col_x) - 1):
+        if col_x[col + 1] > col_x[col]:
+            draw.text(((col_x[col] + col_x[col + 1]) // 2, HEADER_HEIGHT // 2),
+                      column_letters(col), fill=TEXT_COLOR, font=font, anchor="mm")
+    for row in range(len(row_y) - 1):
+        if row_y[row + 1] > row_y[row]:
+            draw.text((HEADER_WIDTH // 2, (row_y[row] + row_y[row + 1]) // 2),
+                      str(row + 1), fill=TEXT_COLOR, font=font, anchor="mm")
+
+    # Cell fills are drawn before the gridlines so the lines stay visible
+    for (row, col), (_, style, _) in cells.items():
+        if row + 1 < len(row_y) and col + 1 < len(col_x) and style < len(formats):
+            fill = formats[style]['fill']
+            if fill:
+                draw.rectangle((col_x[col], row_y[row], col_x[col + 1], row_y[row + 1]), fill=fill)
+
+    for x in col_x:
+        draw.line((x, 0, x, height), fill=GRID_COLOR)
+    for y in row_y:
+        draw.line((0, y, width, y), fill=GRID_COLOR)
+
+    for (row, col), (cell_type, style, value) in sorted(cells.items()):
+        if row + 1 >= len(row_y) or col + 1 >= len(col_x):
+            continue
+        text = format_value(cell_type, value, strings)
+        if not text:
+            continue
+
+        cell_format = formats[style] if style < len(formats) else {}
+        is_number = cell_type == "n"
+        align = cell_format.get('align') or ("right" if is_number else "left")
+        color = cell_format.get('color') or TEXT_COLOR
+
+        x0, x1 = col_x[col] + 3, col_x[col + 1] - 3
+        y = (row_y[row] + row_y[row + 1]) // 2
+        if align == "right":
+            position, anchor = (x1, y), "rm"
+        elif align in ("center", "centerContinuous"):
+            position, anchor = ((x0 + x1) // 2, y), "mm"
+        else:
+            position, anchor = (x0, y), "lm"
+
+        # Bold is drawn with a one pixel offset and italic with a small shear,
+        # since the default bitmap font has no variants
+        offsets = [0, 1] if cell_format.get('bold') else [0]
+        if cell_format.get('italic'):
+            draw_sheared_text(img, position, text, color, font, anchor, offsets)
+        else:
+            for dx in offsets:
+                draw.text((position[0] + dx, position[1]), text, fill=color, font=font, anchor=anchor)
+
+    img.save(png_path)
+    return True
+
+
+def render_libreoffice(xlsx_path, png_path):
+    """Render the first sheet of an Excel file with a headless LibreOffice."""
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice is None:
+        print("LibreOffice (soffice) not found.")
+        return False
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        try:
+            subprocess.run([
+                soffice, "--headless", "--convert-to", "png",
+                "--outdir", out_dir, str(xlsx_path),
+            ], check=True, capture_output=True, timeout=120)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"Error rendering with LibreOffice: {e}")
+            return False
+        rendered = Path(out_dir) / f"{Path(xlsx_path).stem}.png"
+        if not rendered.exists():
+            return False
+        shutil.move(str(rendered), str(png_path))
+    return True
+
+
+register_renderer("grid", render_grid)
+register_renderer("libreoffice", render_libreoffice)
+
+
+def render_comparison(c_file, zig_file, png_path, renderer="grid"):
+    """
+    Render the C and Zig Excel files side by side into one PNG.
+
+    The layout matches the Excel screenshots: C on the left, Zig on the right.
+    """
+    render = get_renderer(renderer)
+    if render is None:
+        print(f"Unknown renderer: {renderer}")
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        c_png = Path(tmp_dir) / "c.png"
+        zig_png = Path(tmp_dir) / "zig.png"
+        if not render(c_file, c_png) or not render(zig_file, zig_png):
+            return False
+
+        with Image.open(c_png) as c_img, Image.open(zig_png) as zig_img:
+            height = max(c_img.height, zig_img.height)
+            combined = Image.new("RGB", (c_img.width + zig_img.width, height), "white")
+            combined.paste(c_img, (0, 0))
+            combined.paste(zig_img, (c_img.width, 0))
+            # Recorded for the screenshot index of phash_index.py
+            info = PngImagePlugin.PngInfo()
+            info.add_text("renderer", renderer)
+            combined.save(png_path, pnginfo=info)
+    return True
+
+
+def _render_job(job):
+    """Process pool entry point for render_many()."""
+    c_file, zig_file, png_path, renderer = job
+    try:
+        return render_comparison(c_file, zig_file, png_path, renderer)
+    except Exception as e:
+        print(f"Error rendering {png_path}: {e}")
+        return False
+
+
+def render_many(jobs, max_workers=None):
+    """
+    Render several comparisons on a process pool.
+
+    Args:
+        jobs: List of (c_file, zig_file, png_path, renderer) tuples
+        max_workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        list: A success flag for each job, in order
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def main():
+    """Main function to render an Excel file to PNG."""
+    parser = argparse.ArgumentParser(description="Render an Excel file to PNG without a GUI")
+    parser.add_argument("xlsx", help="Excel file to render")
+    parser.add_argument("png", help="Output PNG file")
+    parser.add_argument("--renderer", default="grid", choices=sorted(RENDERERS),
+                        help="Rendering backend (default: grid)")
+
+    args = parser.parse_args()
+    render = get_renderer(args.renderer)
+    return 0 if render(args.xlsx, args.png) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
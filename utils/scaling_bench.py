@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for constant_memory versus default mode.
+Runs the bench/scaling.zig program over a sweep of row counts, column counts
+and cell types, with and without constant_memory and use_zip64 and with
+different tmpdir settings. Time, peak RSS and temporary disk usage of every
+run are written to a CSV file and plotted as scaling curves in a PNG.
+
+Temporary disk usage is measured as the largest drop in free space on the
+filesystem of the tmpdir while the run is in progress, because libxlsxwriter
+unlinks its temporary files right after creating them. The drop includes the
+output file when it is written to the same filesystem, so the output size is
+recorded next to it.
+"""
+
+import os
+import sys
+import csv
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import itertools
+import statistics
+import subprocess
+import threading
+from pathlib import Path
+
+from benchmark import measure
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+CELL_TYPES = ["numbers", "strings", "formulas", "dates"]
+
+# Columns of the CSV file, in order
+CSV_FIELDS = [
+    'type', 'rows', 'cols', 'cells', 'mode', 'zip64', 'tmpdir', 'status',
+    'wall_s', 'cpu_s', 'rss_kib', 'disk_peak_kib', 'output_kib',
+    'write_s', 'close_s', 'cells_per_s', 'xml_kib', 'unique_strings',
+]
+
+# Log-log slope of wall time over cells above which a curve is flagged
+SUPERLINEAR_SLOPE = 1.2
+
+# Seconds between free space samples
+DISK_SAMPLE_INTERVAL = 0.005
+
+PLOT_COLORS = [
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40),
+    (148, 103, 189), (140, 86, 75), (227, 119, 194), (127, 127, 127),
+    (188, 189, 34), (23, 190, 207),
+]
+
+
+def get_scaling_binary():
+    """Get the path of the scaling benchmark executable built by zig build bench."""
+    root_dir = Path(__file__).parent.parent
+    suffix = ".exe" if os.name == "nt" else ""
+    return root_dir / "zig-out" / "bin" / f"scaling{suffix}"
+
+
+def build_benchmark(optimize="ReleaseFast"):
+    """Build the benchmark programs. Returns True on success."""
+    root_dir = Path(__file__).parent.parent
+    try:
+        subprocess.run(["zig", "build", "bench", f"-Doptimize={optimize}"], cwd=root_dir, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Error building benchmark: {e}")
+        return False
+
+
+class DiskSampler:
+    """
+    Track the largest drop in free space on a filesystem while running.
+
+    Use as a context manager around the measured run; peak_bytes holds the
+    result afterwards.
+    """
+
+    def __init__(self, path, interval=DISK_SAMPLE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _free_bytes(self):
+        stat = os.statvfs(self.path)
+        return stat.f_bavail * stat.f_frsize
+
+    def _run(self):
+        while True:
+            self.peak_bytes = max(self.peak_bytes, self._baseline - self._free_bytes())
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self._baseline = self._free_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_case(binary, case, repeats):
+    """
+    Run one configuration of the sweep several times.
+
+    Args:
+        binary: Path of the scaling executable
+        case: dict with type, rows, cols, mode, zip64 and tmpdir
+        repeats: Number of measured runs
+
+    Returns:
+        dict: The case with the median of each metric and a status of "ok",
+              or the exit status of the first failing run
+    """
+    cmd = [str(binary), "--rows", str(case['rows']), "--cols", str(case['cols']),
+           "--type", case['type']]
+    if case['mode'] == "constant_memory":
+        cmd.append("--constant-memory")
+    if case['zip64']:
+        cmd.append("--zip64")
+    if case['tmpdir']:
+        cmd += ["--tmpdir", case['tmpdir']]
+
+    samples = {field: [] for field in ('wall_s', 'cpu_s', 'rss_kib', 'disk_peak_kib',
+                                       'output_kib', 'write_s', 'close_s', 'xml_kib',
+                                       'unique_strings')}
+    result = dict(case, cells=case['rows'] * case['cols'], status="ok")
+
+    for _ in range(repeats):
+        work_dir = tempfile.mkdtemp(prefix="zig-xlsxwriter-scaling-")
+        try:
+            with DiskSampler(case['tmpdir'] or tempfile.gettempdir()) as sampler:
+                run = measure(cmd, work_dir, capture_output=True)
+            if run['status'] != 0:
+                result['status'] = f"exit {run['status']}"
+                return result
+            timings = json.loads(run['stdout'])
+            samples['wall_s'].append(run['wall'])
+            samples['cpu_s'].append(run['cpu'])
+            samples['rss_kib'].append(run['rss'])
+            samples['disk_peak_kib'].append(sampler.peak_bytes / 1024)
+            samples['output_kib'].append(
+                os.path.getsize(os.path.join(work_dir, "zig-scaling.xlsx")) / 1024)
+            samples['write_s'].append(timings['write_seconds'])
+            samples['close_s'].append(timings['close_seconds'])
+            # Uncompressed size of all parts, the XML libxlsxwriter generated
+            stats = timings['stats']
+            samples['xml_kib'].append(
+                sum(part['uncompressed_size'] for part in stats['parts']) / 1024)
+            samples['unique_strings'].append(stats['unique_strings'])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for field, values in samples.items():
+        result[field] = statistics.median(values)
+    result['cells_per_s'] = result['cells'] / result['wall_s'] if result['wall_s'] else 0.0
+    return result
+
+
+def series_key(result):
+    """Key identifying the curve a result belongs to."""
+    return (result['type'], result['cols'], result['mode'], result['zip64'], result['tmpdir'])
+
+
+def series_label(key):
+    """Human readable label of a curve."""
+    cell_type, cols, mode, zip64, tmpdir = key
+    label = f"{cell_type} x{cols} {mode}"
+    if zip64:
+        label += " zip64"
+    if tmpdir:
+        label += f" {tmpdir}"
+    return label
+
+
+def group_series(results):
+    """Group successful results into curves sorted by row count."""
+    series = {}
+    for result in results:
+        if result['status'] == "ok":
+            series.setdefault(series_key(result), []).append(result)
+    for points in series.values():
+        points.sort(key=lambda result: result['rows'])
+    return series
+
+
+def find_superlinear(series, slope_limit=SUPERLINEAR_SLOPE):
+    """
+    Find curve segments where wall time grows faster than the cell count.
+
+    Returns:
+        list: (key, rows_from, rows_to, slope) for every segment whose
+              log-log slope exceeds slope_limit
+    """
+    flagged = []
+    for key, points in series.items():
+        for a, b in zip(points, points[1:]):
+            if a['wall_s'] <= 0 or b['wall_s'] <= 0 or a['cells'] == b['cells']:
+                continue
+            slope = math.log(b['wall_s'] / a['wall_s']) / math.log(b['cells'] / a['cells'])
+            if slope > slope_limit:
+                flagged.append((key, a['rows'], b['rows'], slope))
+    return flagged
+
+
+def find_crossovers(series, metric='wall_s'):
+    """
+    Find the smallest row count at which constant_memory beats default mode.
+
+    Returns:
+        dict: (type, cols, zip64, tmpdir) to the first row count where the
+              constant_memory metric is lower, or None if it never is
+    """
+    crossovers = {}
+    for key, points in series.items():
+        cell_type, cols, mode, zip64, tmpdir = key
+        if mode != "constant_memory":
+            continue
+        default = {p['rows']: p[metric] for p in series.get((cell_type, cols, "default", zip64, tmpdir), [])}
+        first = None
+        for point in points:
+            if point['rows'] in default and point[metric] < default[point['rows']]:
+                first = point['rows']
+                break
+        crossovers[(cell_type, cols, zip64, tmpdir)] = first
+    return crossovers
+
+
+def write_csv(results, path):
+    """Write the results of the sweep as CSV."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+
+
+def _log_ticks(low, high):
+    """Powers of ten covering the range low..high."""
+    first = math.floor(math.log10(low))
+    last = math.ceil(math.log10(high))
+    return [10 ** exponent for exponent in range(first, last + 1)]
+
+
+def _draw_panel(draw, font, box, series, metric, title):
+    """Draw one log-log panel of metric over rows for all curves."""
+    left, top, right, bottom = box
+    draw.text((left, top - 16), title, fill="black", font=font)
+    draw.rectangle(box, outline="black")
+
+    points = [(p['rows'], p[metric]) for curve in series.values() for p in curve if p[metric] > 0]
+    if not points:
+        draw.text((left + 10, top + 10), "no data", fill="gray", font=font)
+        return
+
+    x_ticks = _log_ticks(min(x for x, _ in points), max(x for x, _ in points))
+    y_ticks = _log_ticks(min(y for _, y in points), max(y for _, y in points))
+    x_lo, x_hi = math.log10(x_ticks[0]), math.log10(x_ticks[-1])
+    y_lo, y_hi = math.log10(y_ticks[0]), math.log10(y_ticks[-1])
+    x_span = (x_hi - x_lo) or 1
+    y_span = (y_hi - y_lo) or 1
+
+    def to_screen(x, y):
+        sx = left + (math.log10(x) - x_lo) / x_span * (right - left)
+        sy = bottom - (math.log10(y) - y_lo) / y_span * (bottom - top)
+        return sx, sy
+
+    for tick in x_ticks:
+        sx, _ = to_screen(tick, y_ticks[0])
+        draw.line((sx, top, sx, bottom), fill=(225, 225, 225))
+        draw.text((sx - 10, bottom + 4), f"{tick:g}", fill="black", font=font)
+    for tick in y_ticks:
+        _, sy = to_screen(x_ticks[0], tick)
+        draw.line((left, sy, right, sy), fill=(225, 225, 225))
+        draw.text((left - 44, sy - 6), f"{tick:g}", fill="black", font=font)
+
+    for index, (key, curve) in enumerate(sorted(series.items())):
+        color = PLOT_COLORS[index % len(PLOT_COLORS)]
+        screen = [to_screen(p['rows'], p[metric]) for p in curve if p[metric] > 0]
+        if len(screen) > 1:
+            draw.line(screen, fill=color, width=2)
+        for sx, sy in screen:
+            draw.ellipse((sx - 3, sy - 3, sx + 3, sy + 3), fill=color)
+
+
+def plot_curves(results, path):
+    """
+    Plot wall time, peak RSS and temporary disk usage over rows as a PNG.
+
+    Returns:
+        bool: True if the plot was written, False if PIL is not installed
+    """
+    if Image is None:
+        return False
+
+    series = group_series(results)
+    panels = [('wall_s', "Wall time (s)"), ('rss_kib', "Peak RSS (KiB)"),
+              ('disk_peak_kib', "Temporary disk (KiB)")]
+    panel_width, panel_height, margin = 420, 320, 60
+    legend_height = 16 * len(series) + 20
+    width = len(panels) * (panel_width + margin) + margin
+    height = panel_height + 2 * margin + legend_height
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+
+    for index, (metric, title) in enumerate(panels):
+        left = margin + index * (panel_width + margin)
+        _draw_panel(draw, font, (left, margin, left + panel_width, margin + panel_height),
+                    series, metric, f"{title} over rows")
+
+    y = margin + panel_height + 30
+    for index, key in enumerate(sorted(series)):
+        color = PLOT_COLORS[index % len(PLOT_COLORS)]
+        draw.rectangle((margin, y + 3, margin + 10, y + 11), fill=color)
+        draw.text((margin + 16, y), series_label(key), fill="black", font=font)
+        y += 16
+
+    img.save(path)
+    return True
+
+
+def main():
+    """Main function to run the scaling sweep."""
+    parser = argparse.ArgumentParser(description="Sweep the scaling of constant_memory versus default mode")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="Row counts to sweep")
+    parser.add_argument("--cols", type=int, nargs="+", default=[10], help="Column counts to sweep")
+    parser.add_argument("--types", nargs="+", choices=CELL_TYPES, default=CELL_TYPES,
+                        help="Cell types to sweep")
+    parser.add_argument("--modes", nargs="+", choices=["default", "constant_memory"],
+                        default=["default", "constant_memory"], help="Workbook modes to sweep")
+    parser.add_argument("--zip64", choices=["off", "on", "both"], default="both",
+                        help="Whether to run with use_zip64 (default: both)")
+    parser.add_argument("--tmpdir", action="append", default=None,
+                        help="tmpdir to pass to the workbook, repeatable (default: system default)")
+    parser.add_argument("-n", "--repeats", type=int, default=3, help="Measured runs per case (default: 3)")
+    parser.add_argument("--no-build", action="store_true", help="Use the existing benchmark binary")
+    parser.add_argument("--optimize", default="ReleaseFast",
+                        choices=["Debug", "ReleaseSafe", "ReleaseFast", "ReleaseSmall"],
+                        help="Optimization mode for the benchmark build (default: ReleaseFast)")
+    parser.add_argument("--csv", default="testing/benchmarks/scaling.csv", help="CSV output path")
+    parser.add_argument("--plot", default="testing/benchmarks/scaling.png", help="PNG output path")
+
+    args = parser.parse_args()
+
+    if not args.no_build and not build_benchmark(args.optimize):
+        return 1
+    binary = get_scaling_binary()
+    if not binary.exists():
+        print(f"❌ Benchmark binary not found: {binary}")
+        return 1
+
+    zip64_values = {'off': [False], 'on': [True], 'both': [False, True]}[args.zip64]
+    tmpdirs = args.tmpdir or [None]
+    cases = [
+        {'type': cell_type, 'rows': rows, 'cols': cols, 'mode': mode, 'zip64': zip64, 'tmpdir': tmpdir}
+        for cell_type, cols, mode, zip64, tmpdir, rows in itertools.product(
+            args.types, args.cols, args.modes, zip64_values, tmpdirs, sorted(args.rows))
+    ]
+
+    print(f"{'CASE':<50} {'ROWS':>9} {'WALL (s)':>9} {'RSS (KiB)':>10} {'DISK (KiB)':>11}")
+    print("-" * 93)
+    results = []
+    start = time.perf_counter()
+    for case in cases:
+        result = run_case(binary, case, args.repeats)
+        results.append(result)
+        label = series_label(series_key(result))
+        if result['status'] != "ok":
+            print(f"{label:<50} {case['rows']:>9} ❌ {result['status']}")
+            continue
+        print(f"{label:<50} {case['rows']:>9} {result['wall_s']:>9.3f} "
+              f"{result['rss_kib']:>10.0f} {result['disk_peak_kib']:>11.0f}")
+    print(f"\nSweep finished in {time.perf_counter() - start:.1f}s")
+
+    Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+    write_csv(results, args.csv)
+    print(f"CSV written to {args.csv}")
+    Path(args.plot).parent.mkdir(parents=True, exist_ok=True)
+    if plot_curves(results, args.plot):
+        print(f"Plot written to {args.plot}")
+    else:
+        print("⚠️ PIL not installed, plot skipped")
+
+    series = group_series(results)
+    for key, rows_from, rows_to, slope in find_superlinear(series):
+        print(f"⚠️ Superlinear: {series_label(key)} from {rows_from} to {rows_to} rows (slope {slope:.2f})")
+    for (cell_type, cols, zip64, tmpdir), rows in find_crossovers(series).items():
+        where = f"from {rows} rows" if rows is not None else "never in this sweep"
+        print(f"Crossover for {series_label((cell_type, cols, 'constant_memory', zip64, tmpdir))}: "
+              f"faster than default {where}")
+
+    return 0 if all(result['status'] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
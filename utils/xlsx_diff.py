@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Structurally compare C and Zig generated Excel files.
+This script opens the C reference workbook and the Zig output workbook as zip
+archives, canonicalizes every XML part and reports part-level and cell-level
+differences. XML is parsed incrementally so memory stays bounded even for
+very large worksheets.
+
+Files are first compared by hash. Byte-identical files, as written with
+deterministic.close, match on the SHA-256 of the file. Otherwise files
+whose parts have the same CRCs and sizes, apart from the volatile dates in
+docProps/core.xml, match on their content digest, which reads only the
+zip central directory. Only files that differ in content are parsed.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+# Size of the chunks fed to the incremental XML parser
+CHUNK_SIZE = 64 * 1024
+
+# Parts that are parsed as XML. Anything else is compared by CRC and size.
+XML_SUFFIXES = (".xml", ".rels", ".vml")
+
+WORKSHEET_RE = re.compile(r"^xl/(worksheets|chartsheets)/sheet\d+\.xml$")
+CELL_REF_RE = re.compile(r"^([A-Z]+)(\d+)$")
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_DCTERMS = "{http://purl.org/dc/terms/}"
+
+# Elements whose text changes on every run and is not part of the output
+# that the examples control.
+VOLATILE_TEXT = {
+    ("docProps/core.xml", f"{NS_DCTERMS}created"),
+    ("docProps/core.xml", f"{NS_DCTERMS}modified"),
+}
+
+
+def get_excel_paths(example_name):
+    """Get the paths of the C and Zig Excel files for an example."""
+    root_dir = Path(__file__).parent.parent
+    extension = ".xlsm" if example_name == "macro" else ".xlsx"
+    c_file = root_dir / "testing" / "c-output-xls" / f"{example_name}{extension}"
+    zig_file = root_dir / "testing" / "zig-output-xls" / f"zig-{example_name}{extension}"
+    return c_file, zig_file
+
+
+def file_digest(path):
+    """Get the SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_digest(path):
+    """
+    Get a digest of the parts of an xlsx file that ignores zip metadata.
+
+    Each part contributes its name, CRC and size from the central directory,
+    so no part is decompressed except docProps/core.xml, whose volatile
+    dates are dropped. Equal digests mean equal content even when zip
+    timestamps or compression differ.
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(path) as zf:
+        for info in sorted(zf.infolist(), key=lambda info: info.filename):
+            digest.update(info.filename.encode())
+            if any(info.filename == part for part, _ in VOLATILE_TEXT):
+                for _, token in iter_canonical_tokens(zf, info.filename):
+                    digest.update(repr(token).encode())
+            else:
+                digest.update(f"{info.CRC:08x}:{info.file_size}".encode())
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def hash_compare(c_file, zig_file):
+    """
+    Compare two xlsx files by hash only.
+
+    Returns:
+        str: "identical" if the bytes match, "equivalent" if the content
+             digests match, or None if a deeper comparison is needed
+    """
+    if os.path.getsize(c_file) == os.path.getsize(zig_file) and file_digest(c_file) == file_digest(zig_file):
+        return "identical"
+    if content_digest(c_file) == content_digest(zig_file):
+        return "equivalent"
+    return None
+
+
+def iter_xml_events(zf, part_name):
+    """
+    Stream the elements of an XML part from a zip archive.
+
+    Yields ('start', element) and ('end', element) tuples. Finished elements
+    are detached from their parent so only the current element path is
+    kept in memory.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    with zf.open(part_name) as stream:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            for event, elem in parser.read_events():
+                if event == "start":
+                    stack.append(elem)
+                    yield event, elem
+                else:
+                    stack.pop()
+                    yield event, elem
+                    if stack:
+                        stack[-1].remove(elem)
+            if not chunk:
+                break
+
+
+def iter_canonical_tokens(zf, part_name):
+    """
+    Yield a canonical token stream for an XML part.
+
+    Namespace prefixes are resolved, attributes are sorted and whitespace
+    only text between elements is dropped. Each token is a tuple of
+    (path, token) where path is a readable element path for reporting.
+    """
+    path = []
+    for event, elem in iter_xml_events(zf, part_name):
+        if event == "start":
+            path.append(_local_name(elem.tag))
+            yield "/".join(path), ("start", elem.tag, tuple(sorted(elem.attrib.items())))
+        else:
+            text = elem.text or ""
+            if not text.strip():
+                text = ""
+            if (part_name, elem.tag) in VOLATILE_TEXT:
+                text = "<volatile>"
+            yield "/".join(path), ("end", elem.tag, text)
+            path.pop()
+
+
+def iter_cells(zf, part_name):
+    """
+    Stream the cells of a worksheet part in file order.
+
+    Yields (row, col, ref, cell) where cell is a tuple of
+    (type, style, value, formula).
+    """
+    in_cell = False
+    value = formula = None
+    inline_parts = []
+    for event, elem in iter_xml_events(zf, part_name):
+        tag = elem.tag
+        if event == "start":
+            if tag == f"{NS_MAIN}c":
+                in_cell = True
+                value = formula = None
+                inline_parts = []
+            continue
+
+        if not in_cell:
+            continue
+
+        if tag == f"{NS_MAIN}v":
+            value = elem.text or ""
+        elif tag == f"{NS_MAIN}f":
+            formula = elem.text or ""
+        elif tag == f"{NS_MAIN}t":
+            inline_parts.append(elem.text or "")
+        elif tag == f"{NS_MAIN}c":
+            in_cell = False
+            ref = elem.get("r", "")
+            row, col = parse_cell_ref(ref)
+            if inline_parts and value is None:
+                value = "".join(inline_parts)
+            yield row, col, ref, (elem.get("t", "n"), elem.get("s", "0"), value, formula)
+
+
+def parse_cell_ref(ref):
+    """Convert an A1 style reference to zero based (row, col)."""
+    match = CELL_REF_RE.match(ref)
+    if not match:
+        return -1, -1
+    letters, digits = match.groups()
+    col = 0
+    for char in letters:
+        col = col * 26 + (ord(char) - ord("A") + 1)
+    return int(digits) - 1, col - 1
+
+
+def load_shared_strings(zf):
+    """Load the shared string table as a list, or an empty list if absent."""
+    part_name = "xl/sharedStrings.xml"
+    if part_name not in zf.namelist():
+        return []
+
+    strings = []
+    parts = []
+    for event, elem in iter_xml_events(zf, part_name):
+        if event != "end":
+            continue
+        if elem.tag == f"{NS_MAIN}t":
+            parts.append(elem.text or "")
+        elif elem.tag == f"{NS_MAIN}si":
+            strings.append("".join(parts))
+            parts = []
+    return strings
+
+
+def compare_xml_part(c_zip, zig_zip, part_name):
+    """
+    Compare the canonical token streams of an XML part.
+
+    Returns None if the parts match, otherwise a message describing the
+    first point of divergence. Later tokens are not compared since the
+    streams are no longer aligned after the first difference.
+    """
+    c_tokens = iter_canonical_tokens(c_zip, part_name)
+    zig_tokens = iter_canonical_tokens(zig_zip, part_name)
+    try:
+        for c_item, zig_item in zip_longest(c_tokens, zig_tokens):
+            if c_item == zig_item:
+                continue
+            if c_item is None:
+                return f"{part_name}: extra content in Zig output at {zig_item[0]}"
+            if zig_item is None:
+                return f"{part_name}: missing content in Zig output at {c_item[0]}"
+            return (
+                f"{part_name}: differs at {c_item[0]}\n"
+                f"    C:   {_format_token(c_item[1])}\n"
+                f"    Zig: {_format_token(zig_item[1])}"
+            )
+    except ET.ParseError as e:
+        return f"{part_name}: XML parse error: {e}"
+    return None
+
+
+def compare_cells(c_zip, zig_zip, part_name, c_strings, zig_strings, max_diffs):
+    """
+    Merge-join the cells of a worksheet part from both workbooks.
+
+    Cells are streamed in row-major order from both files, so only one cell
+    from each side is held at a time. Shared string indices are resolved
+    before comparison when the string tables differ.
+    """
+    diffs = []
+    c_cells = iter_cells(c_zip, part_name)
+    zig_cells = iter_cells(zig_zip, part_name)
+    c_cell = next(c_cells, None)
+    zig_cell = next(zig_cells, None)
+
+    def resolve(cell, strings):
+        cell_type, style, value, formula = cell
+        if strings is not None and cell_type == "s" and value is not None:
+            try:
+                value = strings[int(value)]
+            except (ValueError, IndexError):
+                value = f"<bad string index {value}>"
+        return cell_type, style, value, formula
+
+    while c_cell is not None or zig_cell is not None:
+        if len(diffs) >= max_diffs:
+            diffs.append(f"{part_name}: ... further cell differences omitted")
+            break
+
+        if zig_cell is None or (c_cell is not None and c_cell[:2] < zig_cell[:2]):
+            diffs.append(f"{part_name}!{c_cell[2]}: missing in Zig output")
+            c_cell = next(c_cells, None)
+        elif c_cell is None or zig_cell[:2] < c_cell[:2]:
+            diffs.append(f"{part_name}!{zig_cell[2]}: only in Zig output")
+            zig_cell = next(zig_cells, None)
+        else:
+            c_value = resolve(c_cell[3], c_strings)
+            zig_value = resolve(zig_cell[3], zig_strings)
+            if c_value != zig_value:
+                diffs.append(
+                    f"{part_name}!{c_cell[2]}: C={_format_cell(c_value)} "
+                    f"Zig={_format_cell(zig_value)}"
+                )
+            c_cell = next(c_cells, None)
+            zig_cell = next(zig_cells, None)
+
+    return diffs
+
+
+def compare_workbooks(c_file, zig_file, max_diffs=20):
+    """
+    Compare two xlsx files part by part and cell by cell.
+
+    Returns:
+        list: Human readable difference descriptions. Empty if the
+              workbooks are structurally identical.
+    """
+    diffs = []
+    with zipfile.ZipFile(c_file) as c_zip, zipfile.ZipFile(zig_file) as zig_zip:
+        c_infos = {info.filename: info for info in c_zip.infolist()}
+        zig_infos = {info.filename: info for info in zig_zip.infolist()}
+
+        for name in sorted(c_infos.keys() - zig_infos.keys()):
+            diffs.append(f"{name}: part missing in Zig output")
+        for name in sorted(zig_infos.keys() - c_infos.keys()):
+            diffs.append(f"{name}: part only in Zig output")
+
+        common = sorted(c_infos.keys() & zig_infos.keys())
+
+        # Shared strings are only resolved when the tables differ. Otherwise
+        # the raw indices are compared and the tables are never loaded.
+        c_strings = zig_strings = None
+        sst = "xl/sharedStrings.xml"
+        if sst in common and compare_xml_part(c_zip, zig_zip, sst) is not None:
+            c_strings = load_shared_strings(c_zip)
+            zig_strings = load_shared_strings(zig_zip)
+
+        for name in common:
+            c_info, zig_info = c_infos[name], zig_infos[name]
+            if c_info.CRC == zig_info.CRC and c_info.file_size == zig_info.file_size:
+                continue
+
+            if not name.endswith(XML_SUFFIXES):
+                diffs.append(
+                    f"{name}: binary part differs "
+                    f"({c_info.file_size} vs {zig_info.file_size} bytes)"
+                )
+                continue
+
+            message = compare_xml_part(c_zip, zig_zip, name)
+            if message is None:
+                continue
+            diffs.append(message)
+
+            if WORKSHEET_RE.match(name):
+                diffs.extend(compare_cells(
+                    c_zip, zig_zip, name, c_strings, zig_strings, max_diffs,
+                ))
+
+    return diffs
+
+
+def compare_example(example_name, max_diffs=20, use_hash=True):
+    """
+    Structurally compare the C and Zig output for an example.
+
+    Files matching by hash_compare are not parsed unless use_hash is False.
+
+    Returns:
+        tuple: (match, diffs)
+            match: True if identical, False if different, None if a file is missing
+            diffs: List of difference descriptions or a single reason message
+    """
+    c_file, zig_file = get_excel_paths(example_name)
+    if not c_file.exists():
+        return None, [f"C Excel file not found: {c_file}"]
+    if not zig_file.exists():
+        return None, [f"Zig Excel file not found: {zig_file}"]
+
+    try:
+        if use_hash and hash_compare(c_file, zig_file):
+            return True, []
+        diffs = compare_workbooks(c_file, zig_file, max_diffs)
+    except zipfile.BadZipFile as e:
+        return False, [f"Invalid zip archive: {e}"]
+
+    return not diffs, diffs
+
+
+def get_all_c_outputs():
+    """Get the names of all examples that have C reference output."""
+    root_dir = Path(__file__).parent.parent
+    c_output_dir = root_dir / "testing" / "c-output-xls"
+    return sorted(
+        entry.name.rsplit(".", 1)[0]
+        for entry in os.scandir(c_output_dir)
+        if entry.name.endswith((".xlsx", ".xlsm"))
+    )
+
+
+def _local_name(tag):
+    """Strip the namespace from an ElementTree tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _format_token(token):
+    """Format a canonical token for display."""
+    kind, tag, data = token
+    if kind == "start":
+        attrs = " ".join(f'{_local_name(k)}="{v}"' for k, v in data)
+        return f"<{_local_name(tag)}{' ' + attrs if attrs else ''}>"
+    return f"</{_local_name(tag)}> text={data!r}"
+
+
+def _format_cell(cell):
+    """Format a cell tuple for display."""
+    cell_type, style, value, formula = cell
+    text = f"{value!r} (t={cell_type}, s={style}"
+    if formula is not None:
+        text += f", f={formula!r}"
+    return text + ")"
+
+
+def main():
+    """Main function to compare C and Zig Excel output."""
+    parser = argparse.ArgumentParser(description="Structurally compare C and Zig Excel output")
+    parser.add_argument("examples", nargs="*", help="Example names to compare (default: all)")
+    parser.add_argument("--max-diffs", type=int, default=20,
+                        help="Maximum cell differences to report per worksheet (default: 20)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Only print the summary line for each example")
+    parser.add_argument("--digest", nargs="+", metavar="FILE",
+                        help="Print the SHA-256 and content digest of xlsx files and exit")
+
+    args = parser.parse_args()
+    if args.digest:
+        for path in args.digest:
+            print(f"{file_digest(path)}  {content_digest(path)}  {path}")
+        return 0
+
+    examples = args.examples or get_all_c_outputs()
+
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = pool.map(compare_example, examples, [args.max_diffs] * len(examples))
+
+        counts = {"match": 0, "different": 0, "missing": 0}
+        for example, (match, diffs) in zip(examples, results):
+            if match is None:
+                counts["missing"] += 1
+                print(f"❓ {example:<30} {diffs[0]}")
+                continue
+            if match:
+                counts["match"] += 1
+                print(f"✅ {example:<30} MATCH")
+                continue
+            counts["different"] += 1
+            print(f"❌ {example:<30} DIFFERENT ({len(diffs)} differences)")
+            if not args.quiet:
+                for diff in diffs:
+                    print(f"    {diff}")
+
+    print(f"\nTotal: {len(examples)} examples ({counts['match']} match, "
+          f"{counts['different']} different, {counts['missing']} missing output)")
+    return 0 if counts["different"] == 0 and counts["missing"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Validate generated xlsx files as OOXML packages.
+Only the zip central directory is held in memory. Every part is read as a
+stream, which also verifies its CRC, and XML parts are parsed with expat
+callbacks that keep no elements, so memory stays flat even for multi-GB
+use_zip64 files. Parts are validated on a pool of worker processes,
+largest first.
+
+Checks:
+  - every part has a content type in [Content_Types].xml, and every
+    override names an existing part
+  - the relationship graph: ids are unique, internal targets exist, the
+    package has an officeDocument relationship and every part is reachable
+    from it (unreachable parts are warnings)
+  - every XML part is well-formed
+  - worksheet rows are in ascending order, cells within a row in ascending
+    column order, and cell references lie within the Excel limits
+  - shared string indices of worksheet cells are within the shared string
+    table, and its uniqueCount matches the strings it holds
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import zipfile
+import argparse
+import posixpath
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from xml.parsers import expat
+
+from xlsx_diff import CHUNK_SIZE, NS_MAIN, parse_cell_ref, get_excel_paths
+
+NS_CONTENT_TYPES = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+NS_RELATIONSHIPS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+CONTENT_TYPES_PART = "[Content_Types].xml"
+ROOT_RELS_PART = "_rels/.rels"
+
+TYPE_RELATIONSHIPS = "application/vnd.openxmlformats-package.relationships+xml"
+TYPE_WORKSHEET = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+TYPE_SHARED_STRINGS = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+
+REL_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+# Excel limits, zero based
+MAX_ROW = 1048575
+MAX_COL = 16383
+
+# Errors reported per part before the rest are only counted
+MAX_PART_ERRORS = 20
+
+# Parts below this many bytes in total are validated in-process
+POOL_THRESHOLD = 4 * 1024 * 1024
+
+# Open archives of a worker process, so parts of the same file do not read
+# the central directory again
+_open_archives = {}
+
+
+def _archive(path):
+    """Get the open ZipFile of a path in this process."""
+    zf = _open_archives.get(path)
+    if zf is None:
+        zf = _open_archives[path] = zipfile.ZipFile(path)
+    return zf
+
+
+def part_kind(content_type):
+    """How a part is validated, from its content type."""
+    if content_type == TYPE_WORKSHEET:
+        return "worksheet"
+    if content_type == TYPE_SHARED_STRINGS:
+        return "shared_strings"
+    if content_type == TYPE_RELATIONSHIPS:
+        return "relationships"
+    if content_type and (content_type.endswith("+xml") or content_type.endswith("/xml")):
+        return "xml"
+    return "binary"
+
+
+class PartErrors:
+    """Error list of one part that keeps at most MAX_PART_ERRORS messages."""
+
+    def __init__(self, part_name):
+        self.part_name = part_name
+        self.messages = []
+        self.dropped = 0
+
+    def add(self, message):
+        if len(self.messages) < MAX_PART_ERRORS:
+            self.messages.append(f"{self.part_name}: {message}")
+        else:
+            self.dropped += 1
+
+    def result(self):
+        if self.dropped:
+            return self.messages + [f"{self.part_name}: ... {self.dropped} more errors"]
+        return self.messages
+
+
+def _read_binary(zf, part_name):
+    """Read a part to the end, which checks its CRC."""
+    with zf.open(part_name) as stream:
+        while stream.read(CHUNK_SIZE):
+            pass
+
+
+def _parse(zf, part_name, handler):
+    """
+    Stream an XML part through expat.
+
+    The handler's start(name, attrs) and end(name) methods are called for
+    every element, and text(data) if it has one. Names are
+    "namespace}local", see _expat_name().
+    """
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    if hasattr(handler, "text"):
+        parser.CharacterDataHandler = handler.text
+    with zf.open(part_name) as stream:
+        while chunk := stream.read(CHUNK_SIZE):
+            parser.Parse(chunk, False)
+    parser.Parse(b"", True)
+
+
+def _expat_name(namespace, local):
+    """Element name as expat reports it, for an ElementTree style namespace."""
+    return f"{namespace[1:-1]}}}{local}"
+
+
+ROW = _expat_name(NS_MAIN, "row")
+CELL = _expat_name(NS_MAIN, "c")
+VALUE = _expat_name(NS_MAIN, "v")
+STRING_ITEM = _expat_name(NS_MAIN, "si")
+RELATIONSHIP = _expat_name(NS_RELATIONSHIPS, "Relationship")
+DEFAULT = _expat_name(NS_CONTENT_TYPES, "Default")
+OVERRIDE = _expat_name(NS_CONTENT_TYPES, "Override")
+
+
+class WellFormed:
+    """Handler that only checks that a part parses."""
+
+    def start(self, name, attrs):
+        pass
+
+    def end(self, name):
+        pass
+
+
+class WorksheetHandler:
+    """Checks the row and cell order of a worksheet and collects its shared string indices."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.last_row = -1
+        self.row = -1
+        self.last_col = -1
+        self.max_string = -1
+        self.string_cells = 0
+        self.in_string_cell = False
+        self.value = None
+
+    def start(self, name, attrs):
+        if name == CELL:
+            self.cell(attrs)
+        elif name == ROW:
+            self.start_row(attrs)
+        elif name == VALUE and self.in_string_cell:
+            self.value = []
+
+    def start_row(self, attrs):
+        try:
+            row = int(attrs.get("r")) - 1
+        except (TypeError, ValueError):
+            self.errors.add(f"row without a valid r attribute after row {self.last_row + 1}")
+            row = self.last_row + 1
+        if row <= self.last_row:
+            self.errors.add(f"row {row + 1} follows row {self.last_row + 1}")
+        elif row > MAX_ROW:
+            self.errors.add(f"row {row + 1} is beyond the last row")
+        self.row = row
+        self.last_row = max(self.last_row, row)
+        self.last_col = -1
+
+    def cell(self, attrs):
+        ref = attrs.get("r")
+        self.in_string_cell = attrs.get("t") == "s"
+        if ref is None:
+            self.last_col += 1
+            return
+        row, col = parse_cell_ref(ref)
+        if row < 0:
+            self.errors.add(f"invalid cell reference {ref!r}")
+        elif row != self.row:
+            self.errors.add(f"cell {ref} in row {self.row + 1}")
+        elif col <= self.last_col:
+            self.errors.add(f"cell {ref} follows column {self.last_col + 1} in row {self.row + 1}")
+        elif col > MAX_COL:
+            self.errors.add(f"cell {ref} is beyond the last column")
+        self.last_col = max(self.last_col, col)
+
+    def text(self, data):
+        if self.value is not None:
+            self.value.append(data)
+
+    def end(self, name):
+        if name != VALUE or self.value is None:
+            return
+        text = "".join(self.value)
+        self.value = None
+        try:
+            index = int(text)
+        except ValueError:
+            self.errors.add(f"shared string index {text!r} is not a number")
+            return
+        if index < 0:
+            self.errors.add(f"negative shared string index {index}")
+        self.max_string = max(self.max_string, index)
+        self.string_cells += 1
+
+    def facts(self):
+        return {'max_string': self.max_string, 'string_cells': self.string_cells}
+
+
+class SharedStringsHandler:
+    """Counts the strings of the shared string table."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.depth = 0
+        self.strings = 0
+        self.unique_count = None
+
+    def start(self, name, attrs):
+        self.depth += 1
+        if self.depth == 1:
+            self.unique_count = attrs.get("uniqueCount")
+        elif self.depth == 2 and name == STRING_ITEM:
+            self.strings += 1
+
+    def end(self, name):
+        self.depth -= 1
+
+    def facts(self):
+        if self.unique_count is not None and self.unique_count != str(self.strings):
+            self.errors.add(f"uniqueCount is {self.unique_count} but the table holds {self.strings} strings")
+        return {'strings': self.strings}
+
+
+class RelationshipsHandler:
+    """Collects the relationships of a .rels part and checks their ids."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.ids = set()
+        self.relationships = []
+
+    def start(self, name, attrs):
+        if name != RELATIONSHIP:
+            return
+        rel_id = attrs.get("Id")
+        if rel_id in self.ids:
+            self.errors.add(f"duplicate relationship id {rel_id}")
+        self.ids.add(rel_id)
+        if attrs.get("Target") is None:
+            self.errors.add(f"relationship {rel_id} has no target")
+            return
+        self.relationships.append({
+            'type': attrs.get("Type", ""),
+            'target': attrs["Target"],
+            'external': attrs.get("TargetMode") == "External",
+        })
+
+    def end(self, name):
+        pass
+
+    def facts(self):
+        return {'relationships': self.relationships}
+
+
+HANDLERS = {
+    'worksheet': WorksheetHandler,
+    'shared_strings': SharedStringsHandler,
+    'relationships': RelationshipsHandler,
+}
+
+
+def validate_part(path, part_name, kind):
+    """
+    Validate one part of a package.
+
+    Returns:
+        dict: name, kind, errors and the facts the package checks need
+    """
+    errors = PartErrors(part_name)
+    facts = {}
+    try:
+        zf = _archive(path)
+        if kind in HANDLERS:
+            handler = HANDLERS[kind](errors)
+            _parse(zf, part_name, handler)
+            facts = handler.facts()
+        elif kind == "xml":
+            _parse(zf, part_name, WellFormed())
+        else:
+            _read_binary(zf, part_name)
+    except expat.ExpatError as e:
+        errors.add(f"not well-formed XML: {e}")
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, zlib.error, NotImplementedError, OSError, EOFError) as e:
+        errors.add(f"cannot be read: {e}")
+    return {'name': part_name, 'kind': kind, 'errors': errors.result(), **facts}
+
+
+def read_content_types(zf, errors):
+    """
+    Parse [Content_Types].xml.
+
+    Returns:
+        tuple: (defaults, overrides) mapping extensions and part names to
+               content types
+    """
+    defaults = {}
+    overrides = {}
+    if CONTENT_TYPES_PART not in zf.NameToInfo:
+        errors.append(f"{CONTENT_TYPES_PART}: missing")
+        return defaults, overrides
+
+    class Handler(WellFormed):
+        def start(self, name, attrs):
+            if name == DEFAULT:
+                defaults[attrs.get("Extension", "").lower()] = attrs.get("ContentType")
+            elif name == OVERRIDE:
+                overrides[attrs.get("PartName", "").lstrip("/")] = attrs.get("ContentType")
+
+    try:
+        _parse(zf, CONTENT_TYPES_PART, Handler())
+    except expat.ExpatError as e:
+        errors.append(f"{CONTENT_TYPES_PART}: not well-formed XML: {e}")
+    except (zipfile.BadZipFile, zlib.error, OSError, EOFError) as e:
+        errors.append(f"{CONTENT_TYPES_PART}: cannot be read: {e}")
+    return defaults, overrides
+
+
+def content_type(part_name, defaults, overrides):
+    """Content type of a part, or None."""
+    if part_name in overrides:
+        return overrides[part_name]
+    # Not splitext, which gives _rels/.rels no extension
+    name = posixpath.basename(part_name)
+    if "." not in name:
+        return None
+    return defaults.get(name.rsplit(".", 1)[1].lower())
+
+
+def relationship_source(rels_part):
+    """Part a .rels part belongs to: "" for the package, else the part name."""
+    directory, name = posixpath.split(rels_part)
+    return posixpath.join(posixpath.dirname(directory), name[:-len(".rels")])
+
+
+def resolve_target(source, target):
+    """Part name a relationship target of a source part refers to."""
+    if target.startswith("/"):
+        return posixpath.normpath(target.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def check_relationships(parts, relationship_results, errors, warnings):
+    """Check the relationship graph and that every part is reachable."""
+    graph = {}
+    for result in relationship_results:
+        source = relationship_source(result['name'])
+        if source and source not in parts:
+            errors.append(f"{result['name']}: relationships of missing part {source}")
+        targets = []
+        for rel in result.get('relationships', []):
+            if rel['external']:
+                continue
+            target = resolve_target(source, rel['target'])
+            if target not in parts:
+                errors.append(f"{result['name']}: target {rel['target']} does not exist")
+                continue
+            targets.append((rel['type'], target))
+        graph[source] = targets
+
+    roots = [target for rel_type, target in graph.get("", []) if rel_type == REL_OFFICE_DOCUMENT]
+    if ROOT_RELS_PART not in parts:
+        errors.append(f"{ROOT_RELS_PART}: missing")
+    elif not roots:
+        errors.append(f"{ROOT_RELS_PART}: no officeDocument relationship")
+
+    reached = set()
+    pending = [target for _, target in graph.get("", [])]
+    while pending:
+        part = pending.pop()
+        if part in reached:
+            continue
+        reached.add(part)
+        pending.extend(target for _, target in graph.get(part, []))
+
+    for part in sorted(parts):
+        if part == CONTENT_TYPES_PART or part.endswith(".rels") or part in reached:
+            continue
+        warnings.append(f"{part}: not reachable through relationships")
+
+
+def validate_package(path, max_workers=None):
+    """
+    Validate an xlsx file as an OOXML package.
+
+    Args:
+        path: The xlsx file
+        max_workers: Worker processes for the parts (default: CPU count).
+                     Small files and max_workers=1 are validated in-process.
+
+    Returns:
+        dict: path, valid, errors, warnings, parts, bytes (uncompressed)
+              and seconds
+    """
+    start = time.perf_counter()
+    result = {'path': str(path), 'valid': False, 'errors': [], 'warnings': [],
+              'parts': 0, 'bytes': 0, 'seconds': 0.0}
+    errors = result['errors']
+    warnings = result['warnings']
+
+    try:
+        zf = zipfile.ZipFile(path)
+    except (zipfile.BadZipFile, OSError) as e:
+        errors.append(f"not a zip file: {e}")
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    with zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+        counts = Counter(info.filename for info in infos)
+        for name in sorted(name for name, count in counts.items() if count > 1):
+            errors.append(f"{name}: duplicate zip entry")
+        parts = {info.filename: info for info in infos}
+        result['parts'] = len(parts)
+        result['bytes'] = sum(info.file_size for info in infos)
+
+        defaults, overrides = read_content_types(zf, errors)
+
+    jobs = []
+    for name, info in parts.items():
+        if name == CONTENT_TYPES_PART:
+            continue
+        part_type = content_type(name, defaults, overrides)
+        if part_type is None:
+            errors.append(f"{name}: no content type")
+        jobs.append((info.compress_size, name, part_kind(part_type)))
+    for name in sorted(set(overrides) - set(parts)):
+        errors.append(f"{CONTENT_TYPES_PART}: override for missing part {name}")
+
+    # Largest parts first, so the pool is not left waiting on one
+    jobs.sort(reverse=True)
+    workers = max_workers or os.cpu_count() or 1
+    path = str(path)
+    if workers == 1 or len(jobs) < 2 or result['bytes'] < POOL_THRESHOLD:
+        part_results = [validate_part(path, name, kind) for _, name, kind in jobs]
+        zf = _open_archives.pop(path, None)
+        if zf is not None:
+            zf.close()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            part_results = list(pool.map(validate_part, [path] * len(jobs),
+                                         [name for _, name, _ in jobs],
+                                         [kind for _, _, kind in jobs]))
+
+    for part_result in sorted(part_results, key=lambda part_result: part_result['name']):
+        errors.extend(part_result['errors'])
+
+    check_relationships(parts, [r for r in part_results if r['kind'] == "relationships"],
+                        errors, warnings)
+
+    string_tables = [r for r in part_results if r['kind'] == "shared_strings"]
+    strings = string_tables[0].get('strings', 0) if string_tables else 0
+    for part_result in part_results:
+        max_string = part_result.get('max_string', -1)
+        if max_string >= strings:
+            errors.append(f"{part_result['name']}: shared string index {max_string} "
+                          f"but the table holds {strings} strings")
+
+    result['valid'] = not errors
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def validate_example(example_name, max_workers=None):
+    """Validate the Zig output of an example, or return None if it does not exist."""
+    _, zig_file = get_excel_paths(example_name)
+    if not zig_file.exists():
+        return None
+    return validate_package(zig_file, max_workers)
+
+
+def main():
+    """Main function to validate xlsx packages."""
+    parser = argparse.ArgumentParser(description="Validate xlsx files as OOXML packages")
+    parser.add_argument("files", nargs="+", help="xlsx files to validate")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes per file (default: CPU count)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary line of each file")
+    parser.add_argument("--json", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = []
+    for path in args.files:
+        result = validate_package(path, max(1, args.jobs))
+        results.append(result)
+        status = "✅ VALID" if result['valid'] else f"❌ INVALID ({len(result['errors'])} errors)"
+        print(f"{status:<22} {path} ({result['parts']} parts, "
+              f"{result['bytes'] / 1024:.0f} KiB, {result['seconds']:.2f}s)")
+        if not args.quiet:
+            for error in result['errors']:
+                print(f"    {error}")
+            for warning in result['warnings']:
+                print(f"    ⚠️ {warning}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    invalid = sum(not result['valid'] for result in results)
+    print(f"\nTotal: {len(results)} files ({len(results) - invalid} valid, {invalid} invalid)")
+    return 0 if invalid == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())